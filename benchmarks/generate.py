@@ -0,0 +1,126 @@
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+import time
+
+from database.connection import CONNECTION_PRAGMAS
+from database.migrations import migrate
+
+DEFAULT_CATEGORIES = 50
+DEFAULT_SEED = 1234
+CHUNK_SIZE = 10000
+START_DATE = datetime.date(2020, 1, 1)
+DAYS = 5 * 365
+READ_FRACTION = 0.4
+UNRATED_FRACTION = 0.15
+# Number of categories per article: most articles get one or two, a few get many
+CATEGORIES_PER_ARTICLE = [1, 2, 3, 4, 5, 6]
+CATEGORY_COUNT_WEIGHTS = [45, 30, 13, 7, 3, 2]
+# Category popularity follows a Zipf-like curve, so a handful of categories hold most articles
+ZIPF_EXPONENT = 1.1
+
+WORDS = [
+    "History", "Physics", "River", "Empire", "Theory", "Battle", "Music", "Island", "Language",
+    "Bridge", "Computer", "Novel", "Mountain", "Festival", "Chemistry", "Railway", "Painting",
+    "Dynasty", "Algorithm", "Cathedral", "Galaxy", "Protein", "Election", "Opera", "Volcano",
+]
+
+def database_file(directory, articles, categories=DEFAULT_CATEGORIES, seed=DEFAULT_SEED):
+    return os.path.join(directory, f"articles-n{articles}-c{categories}-s{seed}.db")
+
+def category_names(categories, rng):
+    names = []
+    for i in range(categories):
+        names.append(f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}")
+    return names
+
+def article_rows(articles, categories, rng):
+    # Yields (title, link, date_added, was_read, category_ids, interest_rating, quality_rating)
+    population = list(range(1, categories + 1))
+    weights = [1 / (rank ** ZIPF_EXPONENT) for rank in population]
+    for i in range(articles):
+        title = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}"
+        link = f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"
+        date_added = (START_DATE + datetime.timedelta(days=rng.randrange(DAYS))).isoformat()
+        was_read = rng.random() < READ_FRACTION
+
+        count = min(categories, rng.choices(CATEGORIES_PER_ARTICLE, CATEGORY_COUNT_WEIGHTS)[0])
+        category_ids = set()
+        while len(category_ids) < count:
+            category_ids.add(rng.choices(population, weights)[0])
+
+        if rng.random() < UNRATED_FRACTION:
+            interest_rating = quality_rating = None
+        else:
+            interest_rating = rng.randint(1, 5)
+            quality_rating = max(1, min(5, interest_rating + rng.randint(-1, 1)))
+        yield title, link, date_added, was_read, sorted(category_ids), interest_rating, quality_rating
+
+def generate(db_path, articles, categories=DEFAULT_CATEGORIES, seed=DEFAULT_SEED, verbose=False):
+    # Same seed, same database: rows are drawn from one seeded generator in a fixed order
+    rng = random.Random(seed)
+    for path in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+    start = time.perf_counter()
+
+    sqliteConnection = sqlite3.connect(db_path)
+    try:
+        # The app's page cache matters here: with the 2 MB default, FTS index merges thrash and loads go quadratic
+        for pragma in CONNECTION_PRAGMAS:
+            sqliteConnection.execute(pragma)
+        sqliteConnection.execute("PRAGMA synchronous=OFF;")
+        migrate(sqliteConnection)
+
+        with sqliteConnection:
+            sqliteConnection.executemany(
+                "INSERT INTO Categories(category_id, category_name) VALUES(?, ?)",
+                enumerate(category_names(categories, rng), start=1),
+            )
+
+        # Rows go in through the real schema, triggers included, one chunk per transaction
+        rows = article_rows(articles, categories, rng)
+        for offset in range(0, articles, CHUNK_SIZE):
+            chunk = [next(rows) for _ in range(min(CHUNK_SIZE, articles - offset))]
+            with sqliteConnection:
+                sqliteConnection.executemany(
+                    "INSERT INTO Articles(article_id, title, link, date_added, was_read) VALUES(?, ?, ?, ?, ?)",
+                    [(offset + i + 1, title, link, date_added, was_read)
+                     for i, (title, link, date_added, was_read, _, _, _) in enumerate(chunk)],
+                )
+                sqliteConnection.executemany(
+                    "INSERT INTO ArticleCategories(article_id, category_id) VALUES(?, ?)",
+                    [(offset + i + 1, category_id)
+                     for i, row in enumerate(chunk) for category_id in row[4]],
+                )
+                sqliteConnection.executemany(
+                    "INSERT INTO Reviews(article_id, interest_rating, quality_rating) VALUES(?, ?, ?)",
+                    [(offset + i + 1, row[5], row[6]) for i, row in enumerate(chunk)],
+                )
+            if verbose:
+                print(f'{offset + len(chunk)}/{articles} articles ({time.perf_counter() - start:.1f}s)')
+
+        sqliteConnection.execute("ANALYZE;")
+        sqliteConnection.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+    finally:
+        sqliteConnection.close()
+    return time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fill a database with seeded synthetic articles.")
+    parser.add_argument("articles", type=int)
+    parser.add_argument("--categories", type=int, default=DEFAULT_CATEGORIES)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--db", default="./database/articles.db")
+    parser.add_argument("--force", action="store_true", help="Replace the database if it already exists")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.db) and not args.force:
+        parser.error(f"{args.db} already exists, pass --force to replace it")
+    elapsed = generate(args.db, args.articles, args.categories, args.seed, verbose=True)
+    print(f'Generated {args.articles} articles in {elapsed:.1f}s at {args.db}')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.generate import DEFAULT_CATEGORIES, DEFAULT_SEED
+from benchmarks.suite import DEFAULT_DATA_DIR, git_revision, seeded_database, use_copy
+from database import connection, repository
+from database.library_query import DEFAULT_PAGE_SIZE, LibraryQuery, count_library, fetch_library_page
+from instrumentation.recorder import percentile, recorder
+
+DEFAULT_ARTICLES = 10000
+DEFAULT_SESSIONS = 8
+DEFAULT_OPERATIONS = 200
+# Relative weights of what a simulated session does next
+OPERATION_WEIGHTS = {"log": 30, "edit": 40, "delete": 10, "browse": 20}
+EDITS = ["read", "date", "categories", "review"]
+LOCKED_ERROR = "database is locked"
+START_DATE = datetime.date(2020, 1, 1)
+DAYS = 5 * 365
+LOST_WRITE_EXAMPLES = 10
+
+class Session:
+    # One simulated user. Sessions only edit and delete articles they logged themselves, so each
+    # knows what the database must hold for them once the run ends.
+    def __init__(self, number, categories, seed):
+        self.name = f"load-{number}"
+        self.rng = random.Random(seed * 1000 + number)
+        self.categories = list(range(1, categories + 1))
+        self.logged = 0
+        self.expected = {}
+        self.deleted = set()
+        self.samples = {operation: [] for operation in OPERATION_WEIGHTS}
+        self.failures = {operation: 0 for operation in OPERATION_WEIGHTS}
+        self.errors = {}
+
+    def random_date(self):
+        return (START_DATE + datetime.timedelta(days=self.rng.randrange(DAYS))).isoformat()
+
+    def random_categories(self):
+        return sorted(self.rng.sample(self.categories, min(len(self.categories), self.rng.randint(1, 3))))
+
+    def run(self, operations, think, barrier):
+        barrier.wait()
+        for _ in range(operations):
+            operation = self.rng.choices(list(OPERATION_WEIGHTS), list(OPERATION_WEIGHTS.values()))[0]
+            if operation in ("edit", "delete") and not self.expected:
+                operation = "log"
+
+            # The recorder scope collects the SQLite errors the repository only prints
+            recorder.start(self.name, "load")
+            start = time.perf_counter()
+            succeeded = getattr(self, operation)()
+            self.samples[operation].append(time.perf_counter() - start)
+            for event in recorder.run_events():
+                if event["kind"] == "sql" and event["status"]:
+                    self.errors[event["status"]] = self.errors.get(event["status"], 0) + 1
+            recorder.discard()
+
+            if not succeeded:
+                self.failures[operation] += 1
+            if think:
+                time.sleep(self.rng.uniform(0, 2 * think))
+        recorder.clear(self.name)
+
+    def log(self):
+        title = f"Load {self.name} {self.logged}"
+        self.logged += 1
+        interest_rating = self.rng.randint(1, 5)
+        state = {
+            "was_read": self.rng.randint(0, 1),
+            "date_added": self.random_date(),
+            "categories": self.random_categories(),
+            "interest_rating": interest_rating,
+            "quality_rating": self.rng.randint(1, 5),
+        }
+        write = repository.add_article(title, f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}",
+                                       state["date_added"], state["was_read"], state["categories"],
+                                       state["interest_rating"], state["quality_rating"])
+        if write is None:
+            return False
+        self.expected[title] = (write.article_id, state)
+        return True
+
+    def edit(self):
+        title = self.rng.choice(list(self.expected))
+        article_id, state = self.expected[title]
+        edit = self.rng.choice(EDITS)
+        if edit == "read":
+            changes = {"was_read": 1 - state["was_read"]}
+            succeeded = repository.switch_read(changes["was_read"], article_id)
+        elif edit == "date":
+            changes = {"date_added": self.random_date()}
+            succeeded = repository.update_date(article_id, changes["date_added"])
+        elif edit == "categories":
+            changes = {"categories": self.random_categories()}
+            succeeded = repository.update_categories(article_id, changes["categories"])
+        else:
+            changes = {"interest_rating": self.rng.randint(1, 5), "quality_rating": self.rng.randint(1, 5)}
+            succeeded = repository.update_review(article_id, changes["interest_rating"], changes["quality_rating"])
+        if succeeded:
+            state.update(changes)
+        return succeeded
+
+    def delete(self):
+        title = self.rng.choice(list(self.expected))
+        if not repository.delete_article(self.expected[title][0]):
+            return False
+        del self.expected[title]
+        self.deleted.add(title)
+        return True
+
+    def browse(self):
+        # What a Library page load reads
+        library_query = LibraryQuery()
+        fetch_library_page(library_query, None, DEFAULT_PAGE_SIZE + 1)
+        count_library(library_query)
+        return True
+
+def stored_state():
+    # Returns {title: state} for every article a session logged, read straight from the database
+    with connection.connection() as sqliteConnection:
+        rows = sqliteConnection.execute("""
+            SELECT a.article_id, a.title, a.was_read, a.date_added, r.interest_rating, r.quality_rating
+            FROM Articles a
+            LEFT JOIN Reviews r ON a.article_id = r.article_id
+            WHERE a.title LIKE 'Load load-%'
+        """).fetchall()
+        links = sqliteConnection.execute("""
+            SELECT ac.article_id, ac.category_id
+            FROM ArticleCategories ac
+            INNER JOIN Articles a ON ac.article_id = a.article_id
+            WHERE a.title LIKE 'Load load-%'
+        """).fetchall()
+    categories = {}
+    for article_id, category_id in links:
+        categories.setdefault(article_id, []).append(category_id)
+    return {
+        title: {
+            "was_read": int(was_read),
+            "date_added": str(date_added),
+            "categories": sorted(categories.get(article_id, [])),
+            "interest_rating": interest_rating,
+            "quality_rating": quality_rating,
+        }
+        for article_id, title, was_read, date_added, interest_rating, quality_rating in rows
+    }
+
+def lost_writes(sessions):
+    # A lost write is one the repository reported as saved that the database does not hold
+    stored = stored_state()
+    lost = []
+    for session in sessions:
+        for title, (_, state) in session.expected.items():
+            if title not in stored:
+                lost.append(f"{title}: missing")
+                continue
+            for field, value in state.items():
+                if stored[title][field] != value:
+                    lost.append(f"{title}: {field} is {stored[title][field]!r}, expected {value!r}")
+        for title in session.deleted:
+            if title in stored:
+                lost.append(f"{title}: still present after delete")
+    return lost
+
+def latency(samples):
+    samples = sorted(sample * 1000 for sample in samples)
+    row = {"count": len(samples)}
+    for pct in (50, 95, 99):
+        row[f"p{pct}_ms"] = round(percentile(samples, pct), 3)
+    row["max_ms"] = round(samples[-1], 3) if samples else 0.0
+    return row
+
+def run_load(sessions, operations, think):
+    barrier = threading.Barrier(len(sessions) + 1)
+    threads = [threading.Thread(target=session.run, args=(operations, think, barrier), name=session.name)
+               for session in sessions]
+    for thread in threads:
+        thread.start()
+    # The repository prints every failure; the report counts them instead
+    with contextlib.redirect_stdout(io.StringIO()):
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.join()
+    return time.perf_counter() - start
+
+def report(sessions, elapsed, lost):
+    operations = {}
+    for operation in OPERATION_WEIGHTS:
+        samples = [sample for session in sessions for sample in session.samples[operation]]
+        operations[operation] = {**latency(samples), "failed": sum(session.failures[operation] for session in sessions)}
+    errors = {}
+    for session in sessions:
+        for message, count in session.errors.items():
+            errors[message] = errors.get(message, 0) + count
+    total = sum(row["count"] for row in operations.values())
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "operations": total,
+        "throughput_per_second": round(total / elapsed, 1) if elapsed else 0.0,
+        "by_operation": operations,
+        "sqlite_errors": errors,
+        "locked_errors": sum(count for message, count in errors.items() if LOCKED_ERROR in message),
+        "lost_writes": len(lost),
+        "lost_write_examples": lost[:LOST_WRITE_EXAMPLES],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run concurrent simulated sessions against a seeded database.")
+    parser.add_argument("--articles", type=int, default=DEFAULT_ARTICLES, help="Size of the seeded database")
+    parser.add_argument("--categories", type=int, default=DEFAULT_CATEGORIES)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--sessions", type=int, default=DEFAULT_SESSIONS, help="Simulated users running at once")
+    parser.add_argument("--operations", type=int, default=DEFAULT_OPERATIONS, help="Operations per session")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Average pause between a session's operations")
+    parser.add_argument("--data-dir", default=str(DEFAULT_DATA_DIR), help="Where generated databases are kept")
+    parser.add_argument("--out", help="Also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    base_db, _ = seeded_database(args.data_dir, args.articles, args.categories, args.seed)
+    with tempfile.TemporaryDirectory() as work_dir:
+        use_copy(base_db, os.path.join(work_dir, "load.db"))
+        sessions = [Session(number, args.categories, args.seed) for number in range(args.sessions)]
+        print(f'Running {args.sessions} sessions x {args.operations} operations on {args.articles} articles')
+        elapsed = run_load(sessions, args.operations, args.think_ms / 1000)
+        results = report(sessions, elapsed, lost_writes(sessions))
+        connection.pool.close_all()
+
+    print(f'{results["operations"]} operations in {results["elapsed_seconds"]:.2f}s '
+          f'({results["throughput_per_second"]:.1f}/s)')
+    for operation, row in results["by_operation"].items():
+        print(f'  {operation:<8} {row["count"]:>6} ops  p50 {row["p50_ms"]:>8.2f} ms  p95 {row["p95_ms"]:>8.2f} ms  '
+              f'p99 {row["p99_ms"]:>8.2f} ms  failed {row["failed"]}')
+    print(f'database is locked errors: {results["locked_errors"]}')
+    for message, count in results["sqlite_errors"].items():
+        if LOCKED_ERROR not in message:
+            print(f'  other SQLite error x{count}: {message}')
+    print(f'Lost writes: {results["lost_writes"]}')
+    for example in results["lost_write_examples"]:
+        print(f'  {example}')
+
+    if args.out:
+        meta = {
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "articles": args.articles,
+            "sessions": args.sessions,
+            "operations": args.operations,
+            "think_ms": args.think_ms,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as results_file:
+            json.dump({"meta": meta, **results}, results_file, indent=2)
+        print(f'Results written to {args.out}')
+    return 1 if results["lost_writes"] or results["locked_errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.generate import DEFAULT_CATEGORIES, DEFAULT_SEED, database_file, generate
+from database import analytics, connection, recommender, repository
+from database.library_query import DEFAULT_PAGE_SIZE, LibraryQuery, count_library, fetch_library_page
+from database.query_cache import query_cache
+from database.table_query import TableQuery, count_table, fetch_table_page
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+DEFAULT_REPEAT = 5
+DEFAULT_RENDER_REPEAT = 3
+DEFAULT_DATA_DIR = ROOT / "benchmarks" / "data"
+# A case counts as a regression when its median is this many times the baseline median
+REGRESSION_RATIO = 1.25
+# Differences below this are timer noise, whatever the ratio
+REGRESSION_FLOOR_MS = 0.5
+RENDER_PAGES = {
+    "render_dashboard": "dashboard.py",
+    "render_library": "pages/2_library.py",
+    "render_dataframe": "pages/3_dataframe.py",
+}
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "runs": len(samples),
+        "min_ms": round(samples[0] * 1000, 3),
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "max_ms": round(samples[-1] * 1000, 3),
+    }
+
+def timed(function, repeat, cold=True):
+    samples = []
+    for _ in range(repeat):
+        # Cold runs drop cached results so every sample reaches SQLite
+        if cold:
+            query_cache.clear()
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+def dashboard_trends():
+    # Everything the Reading Trends section reads for the All Time range, per day
+    start, end = analytics.reading_range()
+    analytics.downsample(analytics.reads_per_period("day", start, end))
+    analytics.reading_streaks()
+    analytics.downsample(analytics.backlog(start, end), last_columns=("Want to Read", "Read"))
+    analytics.category_ratings(analytics.trend_categories(), start, end)
+
+def read_next_rebuild():
+    recommender.reading_matrix.reset()
+    recommender.read_next()
+
+def read_next_rescore():
+    # What a page load costs after a write that the matrix patches in place
+    recommender.reading_matrix.scores = None
+    recommender.read_next()
+
+def query_cases(repeat):
+    everything = LibraryQuery()
+    filtered = LibraryQuery(sort_column="date_added", descending=True, category_ids=[1, 2], match_all=False,
+                            interest_range=(3, 5))
+    tables = ("Articles", "Categories", "ArticleCategories", "Reviews")
+    combined = TableQuery("Combined Data", "title")
+
+    cases = {
+        "library_first_page": lambda: fetch_library_page(everything, None, DEFAULT_PAGE_SIZE + 1),
+        "library_filtered_page": lambda: fetch_library_page(filtered, None, DEFAULT_PAGE_SIZE + 1),
+        "library_count": lambda: count_library(everything),
+        "dashboard_top_categories": repository.grab_top_categories,
+        "dashboard_read_state": repository.grab_read_state_counts,
+        "dashboard_trends": dashboard_trends,
+        "read_next_rebuild": read_next_rebuild,
+        "read_next_rescore": read_next_rescore,
+        "dataframe_combined": repository.grab_combined_articles,
+        "dataframe_tables": lambda: [repository.grab_table(table) for table in tables],
+        "dataframe_page": lambda: (count_table(combined), fetch_table_page(combined)),
+    }
+    results = {name: timed(function, repeat) for name, function in cases.items()}
+    fetch_library_page(everything, None, DEFAULT_PAGE_SIZE + 1)
+    results["library_first_page_cached"] = timed(lambda: fetch_library_page(everything, None, DEFAULT_PAGE_SIZE + 1),
+                                                 repeat, cold=False)
+    return results
+
+def write_cases(repeat):
+    counter = iter(range(repeat))
+    def add():
+        i = next(counter)
+        repository.add_article(f"Benchmark Article {i}", f"https://en.wikipedia.org/wiki/Benchmark_Article_{i}",
+                               datetime.date.today(), False, [1, 2], 3, 4)
+    return {"add_article": timed(add, repeat, cold=False)}
+
+def render_cases(repeat):
+    from streamlit.testing.v1 import AppTest # type: ignore
+
+    results = {}
+    for name, page in RENDER_PAGES.items():
+        app = AppTest.from_file(str(ROOT / page), default_timeout=600)
+        # The first run pays for imports, so it is reported on its own
+        start = time.perf_counter()
+        app.run()
+        first_run = time.perf_counter() - start
+        if app.exception:
+            raise RuntimeError(f"{page} raised {app.exception[0].value}")
+        results[name] = {**timed(app.run, repeat), "first_run_ms": round(first_run * 1000, 3)}
+    return results
+
+def use_copy(base_db, work_db):
+    # Writes go to a copy so the generated database can be reused by later runs
+    source = sqlite3.connect(base_db)
+    target = sqlite3.connect(work_db)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+    connection.set_database(work_db)
+    query_cache.clear()
+
+def seeded_database(data_dir, articles, categories, seed):
+    # Returns (path, seconds spent generating it or None when it was already there)
+    base_db = database_file(data_dir, articles, categories, seed)
+    if os.path.exists(base_db):
+        return base_db, None
+    print(f'Generating {articles} articles')
+    return base_db, round(generate(base_db, articles, categories, seed), 3)
+
+def run_size(articles, args, work_dir):
+    base_db, generate_seconds = seeded_database(args.data_dir, articles, args.categories, args.seed)
+
+    work_db = os.path.join(work_dir, f"articles-{articles}.db")
+    use_copy(base_db, work_db)
+
+    print(f'Timing {articles} articles')
+    cases = query_cases(args.repeat)
+    if not args.no_render:
+        cases.update(render_cases(args.render_repeat))
+    cases.update(write_cases(args.repeat))
+    connection.pool.close_all()
+    return {"generate_seconds": generate_seconds, "cases": cases}
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline, ratio=REGRESSION_RATIO):
+    # Returns (size, case, baseline median, current median) for every case that got slower than ratio allows
+    regressions = []
+    for size, measured in results["sizes"].items():
+        previous = baseline.get("sizes", {}).get(size)
+        if previous is None:
+            continue
+        for case, stats in measured["cases"].items():
+            before = previous["cases"].get(case)
+            if before and stats["median_ms"] > max(before["median_ms"] * ratio, before["median_ms"] + REGRESSION_FLOOR_MS):
+                regressions.append((size, case, before["median_ms"], stats["median_ms"]))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the query, render and write paths on synthetic data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Article counts to test")
+    parser.add_argument("--categories", type=int, default=DEFAULT_CATEGORIES)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--render-repeat", type=int, default=DEFAULT_RENDER_REPEAT)
+    parser.add_argument("--no-render", action="store_true", help="Skip the headless page renders")
+    parser.add_argument("--data-dir", default=str(DEFAULT_DATA_DIR), help="Where generated databases are kept")
+    parser.add_argument("--out", help="JSON results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="Earlier results file to check for regressions")
+    parser.add_argument("--ratio", type=float, default=REGRESSION_RATIO)
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    started = datetime.datetime.now()
+    results = {
+        "meta": {
+            "created": started.isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "categories": args.categories,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "render_repeat": 0 if args.no_render else args.render_repeat,
+        },
+        "sizes": {},
+    }
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for articles in args.sizes:
+            results["sizes"][str(articles)] = run_size(articles, args, work_dir)
+
+    out = args.out or str(ROOT / "benchmarks" / "results" / f"{started:%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as results_file:
+        json.dump(results, results_file, indent=2)
+    print(f'Results written to {out}')
+
+    for size, measured in results["sizes"].items():
+        print(f'\n{size} articles')
+        for case, stats in measured["cases"].items():
+            print(f'  {case:<28} median {stats["median_ms"]:>10.2f} ms   max {stats["max_ms"]:>10.2f} ms')
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.ratio)
+        for size, case, before, after in regressions:
+            print(f'Regression at {size} articles: {case} {before:.2f} ms -> {after:.2f} ms', file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,59 +1,121 @@
 import streamlit as st # type: ignore
 import sqlite3
 import sys
-import pandas as pd #type: ignore
+import datetime
 import altair as alt
-import wikipedia # type: ignore
+from database import analytics
+from database.recommender import read_next
+from database.repository import grab_categories, grab_read_state_counts, grab_top_categories
+from instrumentation.panel import finish_page, start_page
 
 sys.stdout.reconfigure(encoding='utf-8')
 st.set_page_config(page_title="Dashboard", page_icon="📊")
-DB_PATH = './database/articles.db'
+start_page("dashboard.py")
 
-st.title("Dashboard")
+# Days shown by each range option; None is everything logged
+TREND_RANGES = {"Last 30 Days": 30, "Last 90 Days": 90, "Last Year": 365, "All Time": None}
 
-try:
-    sqliteConnection = sqlite3.connect(DB_PATH)
+def trend_start(first, end, range_name):
+    days = TREND_RANGES[range_name]
+    if days is None:
+        return first
+    return max(first, end - datetime.timedelta(days=days - 1))
+
+def reading_trends(first, end):
+    range_select, period_select = st.columns(2)
+    range_name = range_select.selectbox("Range", list(TREND_RANGES), index=1)
+    period = period_select.selectbox("Per", ["Day", "Week", "Month"]).lower()
+    start = trend_start(first, end, range_name)
+
+    reads = analytics.reads_per_period(period, start, end)
+    if period == "day":
+        reads = analytics.downsample(reads)
+        averages = [column for column in reads.columns if column.endswith("Average")]
+        base = alt.Chart(reads).encode(x=alt.X("Date:T"))
+        reads_chart = base.mark_bar(opacity=0.4).encode(y=alt.Y("Read:Q", title="Articles Read")) + \
+            base.transform_fold(averages, as_=["Average", "Articles"]).mark_line().encode(
+                y="Articles:Q",
+                color=alt.Color("Average:N", legend=alt.Legend(orient="bottom")),
+            )
+    else:
+        reads_chart = alt.Chart(reads).mark_bar().encode(
+            x=alt.X("Date:T", title=period.title()),
+            y=alt.Y("Read:Q", title="Articles Read", axis=alt.Axis(tickMinStep=1)),
+            tooltip=["Date:T", "Read:Q", "Logged:Q"],
+        )
+    st.altair_chart(reads_chart, theme=None, use_container_width=True)
+    st.write(f"Articles Read per {period.title()}")
+
+    streaks = analytics.reading_streaks()
+    current_metric, longest_metric = st.columns(2)
+    current_metric.metric("Current Streak", f"{streaks.current} days")
+    longest_metric.metric("Longest Streak", f"{streaks.longest} days")
+    if len(streaks.streaks):
+        with st.expander("View Longest Streaks"):
+            st.write(streaks.streaks)
 
-    df_articles = pd.read_sql_query("""
-        SELECT *
-        FROM Articles
-    """, sqliteConnection)
+    backlog = analytics.downsample(analytics.backlog(start, end), last_columns=("Want to Read", "Read"))
+    backlog_chart = alt.Chart(backlog).transform_fold(["Want to Read", "Read"], as_=["List", "Articles"]).mark_line().encode(
+        x=alt.X("Date:T"),
+        y=alt.Y("Articles:Q", title="Articles Logged"),
+        color=alt.Color("List:N", legend=alt.Legend(orient="bottom")),
+    )
+    st.altair_chart(backlog_chart, theme=None, use_container_width=True)
+    st.write("Want-to-Read Backlog")
 
-    df_categories = pd.read_sql_query("""
-        SELECT *
-        FROM Categories
-    """, sqliteConnection)
+    categories = {category.category_id: category.category_name for category in grab_categories()}
+    default_ids = analytics.trend_categories()
+    selected_names = st.multiselect("Categories", list(categories.values()),
+                                    default=[categories[category_id] for category_id in default_ids if category_id in categories])
+    rating = st.radio("Rating", ["Interest", "Quality"], horizontal=True)
+    selected_ids = [category_id for category_id, name in categories.items() if name in selected_names]
+    ratings = analytics.category_ratings(selected_ids, start, end)
+    if ratings.empty:
+        st.caption("No rated reads in these categories for this range.")
+    else:
+        ratings_chart = alt.Chart(ratings).mark_line(point=True).encode(
+            x=alt.X("Month:T"),
+            y=alt.Y(f"Running {rating}:Q", title=f"Average {rating}", scale=alt.Scale(domain=[1, 5])),
+            color=alt.Color("Category:N", legend=alt.Legend(orient="bottom")),
+            tooltip=["Category:N", "Month:T", f"{rating}:Q", f"Running {rating}:Q", "Reviews:Q"],
+        )
+        st.altair_chart(ratings_chart, theme=None, use_container_width=True)
+        st.write(f"Average {rating} Rating of Reads by Category")
 
-    df_junction = pd.read_sql_query("""
-        SELECT article_id, category_id
-        FROM ArticleCategories
-    """, sqliteConnection)
+# The article id is hidden; scores run from 0 to 1 and category affinity from -1 to 1
+READ_NEXT_COLUMNS = {
+    "article_id": None,
+    "Link": st.column_config.LinkColumn("Link", display_text="Visit 🔗"),
+    "Score": st.column_config.ProgressColumn("Score", min_value=0.0, max_value=1.0, format="%.2f"),
+    "Category Affinity": st.column_config.NumberColumn(format="%.2f"),
+    "Similarity": st.column_config.NumberColumn(format="%.2f"),
+    "Recency": st.column_config.NumberColumn(format="%.2f"),
+}
+
+st.title("Dashboard")
+
+try:
+    read_state_counts = grab_read_state_counts()
+    top_categories = grab_top_categories(10)
 
 except sqlite3.Error as error:
     print('Error occurred -', error)
 
-finally:
-    if sqliteConnection:
-        sqliteConnection.close()
-
-if (df_articles.empty):
+if (sum(read_state_counts.values()) == 0):
     with st.container(border=True):
         st.write("No articles have been logged yet.")
 else:
 
-    with st.container():
-        top_categories = (df_junction
-            .groupby("category_id")
-            .size()
-            .reset_index(name="num_categories")
-            .merge(df_categories, on="category_id", how="right")
-            .fillna(0)
-            .sort_values(by=["num_categories", "category_name"], ascending=[False, True])
-            .head(10)
-            .rename(columns={"category_name": "Category Name"})
-            .rename(columns={"num_categories": "Number of Categories"})
-        )
+    read_metric, want_to_read_metric = st.columns(2)
+    read_metric.metric("Read", read_state_counts[True])
+    want_to_read_metric.metric("Want to Read", read_state_counts[False])
 
+    if read_state_counts[False]:
+        st.subheader("Read Next")
+        st.dataframe(read_next(), column_config=READ_NEXT_COLUMNS, hide_index=True, use_container_width=True)
+        st.caption("Want-to-read articles ranked by how you rated reads in their categories, how close they are to your best-rated reads, and how recently they were logged.")
+
+    with st.container():
         top_categories_chart = alt.Chart(top_categories).mark_bar().encode(
             x=alt.X("Category Name",
                 sort="-y"
@@ -67,4 +129,11 @@ else:
         st.altair_chart(top_categories_chart, theme=None, use_container_width=True)
         st.write("Top Categories")
         with st.expander("View Dataframe"):
-            st.write(top_categories)
\ No newline at end of file
+            st.write(top_categories)
+
+    reading_range = analytics.reading_range()
+    if reading_range:
+        st.subheader("Reading Trends")
+        reading_trends(*reading_range)
+
+finish_page()
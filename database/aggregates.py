@@ -0,0 +1,76 @@
+import argparse
+import sqlite3
+import sys
+
+from database.connection import connection, transaction
+
+# Each summary table next to the query that recomputes it from the raw tables
+AGGREGATES = {
+    "CategoryCounts": ("category_id, num_articles", """
+        SELECT c.category_id, COUNT(ac.article_id) AS num_articles
+        FROM Categories c
+        LEFT JOIN ArticleCategories ac ON ac.category_id = c.category_id
+        GROUP BY c.category_id
+    """),
+    "ReadStateCounts": ("was_read, num_articles", """
+        SELECT COALESCE(was_read, 0) AS was_read, COUNT(*) AS num_articles
+        FROM Articles
+        GROUP BY COALESCE(was_read, 0)
+    """),
+    "DailyCounts": ("date_added, num_articles, num_read", """
+        SELECT date_added, COUNT(*) AS num_articles, SUM(COALESCE(was_read, 0)) AS num_read
+        FROM Articles
+        GROUP BY date_added
+    """),
+}
+
+def check_aggregates():
+    # Returns {table: number of keys whose stored counts differ from a fresh recount}; zero counts are ignored
+    mismatches = {}
+    with connection() as sqliteConnection:
+        for table, (columns, recount) in AGGREGATES.items():
+            key_column, count_column = columns.split(", ")[:2]
+            stored = f"SELECT {columns} FROM {table} WHERE {count_column} != 0"
+            expected = f"SELECT {columns} FROM ({recount}) WHERE {count_column} != 0"
+            differing = sqliteConnection.execute(f"""
+                SELECT COUNT(DISTINCT {key_column}) FROM (
+                    SELECT * FROM ({stored} EXCEPT {expected})
+                    UNION ALL
+                    SELECT * FROM ({expected} EXCEPT {stored})
+                )
+            """).fetchone()[0]
+            if differing:
+                mismatches[table] = differing
+    return mismatches
+
+def rebuild_aggregates():
+    with transaction() as sqliteConnection:
+        for table, (columns, recount) in AGGREGATES.items():
+            sqliteConnection.execute(f"DELETE FROM {table}")
+            sqliteConnection.execute(f"INSERT INTO {table} ({columns}) {recount}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check or rebuild the Dashboard summary tables.")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute every summary table from the raw tables")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.rebuild:
+            rebuild_aggregates()
+            print('Aggregates rebuilt')
+        mismatches = check_aggregates()
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return 1
+
+    if not mismatches:
+        print('Aggregates are consistent')
+        return 0
+    for table, differing in mismatches.items():
+        print(f'{table}: {differing} keys out of date')
+    print('Run with --rebuild to repair them')
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
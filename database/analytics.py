@@ -0,0 +1,223 @@
+import datetime
+import json
+import sqlite3
+from typing import Optional
+
+import numpy as np
+import pandas as pd # type: ignore
+
+from database.query_cache import cached_dataframe, cached_rows
+
+# Everything here reads the DailyCounts aggregate or a single grouped join, so results are small and
+# the query cache keeps them until the next write
+PERIOD_BUCKETS = {
+    # Weeks start on Monday
+    "week": "date(date_added, '-6 days', 'weekday 1')",
+    "month": "strftime('%Y-%m-01', date_added)",
+}
+ROLLING_WINDOWS = (7, 30)
+MAX_CHART_POINTS = 400
+DEFAULT_TREND_CATEGORIES = 5
+
+class ReadingStreaks:
+    def __init__(self, current, longest, streaks):
+        self.current = current
+        self.longest = longest
+        self.streaks = streaks
+
+# Day by day from ?1 to ?2, with the reads and new want-to-read articles logged on each day
+CALENDAR = """
+    WITH RECURSIVE calendar(day) AS (
+        SELECT ?1
+        UNION ALL
+        SELECT date(day, '+1 day') FROM calendar WHERE day < ?2
+    ),
+    daily AS (
+        SELECT
+            c.day,
+            COALESCE(d.num_read, 0) AS num_read,
+            COALESCE(d.num_articles - d.num_read, 0) AS num_unread
+        FROM calendar c
+        LEFT JOIN DailyCounts d ON d.date_added = c.day
+    )
+"""
+
+def reading_range() -> Optional[tuple[datetime.date, datetime.date]]:
+    # First logged day, and the last one or today, whichever is later
+    try:
+        first, last = cached_rows("SELECT MIN(date_added), MAX(date_added) FROM DailyCounts")[0]
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return None
+    if first is None:
+        return None
+    return datetime.date.fromisoformat(first), max(datetime.date.fromisoformat(last), datetime.date.today())
+
+def reads_per_day(start: datetime.date, end: datetime.date) -> pd.DataFrame:
+    # The calendar starts a window early so the first days' rolling averages cover full windows
+    lead = max(ROLLING_WINDOWS) - 1
+    averages = ",\n".join(
+        f'AVG(num_read) OVER (ORDER BY day ROWS BETWEEN {days - 1} PRECEDING AND CURRENT ROW) AS "{days}-Day Average"'
+        for days in ROLLING_WINDOWS
+    )
+    try:
+        return cached_dataframe(f"""
+            {CALENDAR}
+            SELECT * FROM (
+                SELECT
+                    day AS "Date",
+                    num_read AS "Read",
+                    {averages}
+                FROM daily
+            )
+            WHERE "Date" >= ?3
+        """, ((start - datetime.timedelta(days=lead)).isoformat(), end.isoformat(), start.isoformat()))
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return pd.DataFrame()
+
+def reads_per_period(period: str, start: datetime.date, end: datetime.date) -> pd.DataFrame:
+    if period == "day":
+        return reads_per_day(start, end)
+    try:
+        return cached_dataframe(f"""
+            SELECT
+                {PERIOD_BUCKETS[period]} AS "Date",
+                SUM(num_read) AS "Read",
+                SUM(num_articles) AS "Logged"
+            FROM DailyCounts
+            WHERE date_added BETWEEN ? AND ?
+            GROUP BY 1
+            ORDER BY 1
+        """, (start.isoformat(), end.isoformat()))
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return pd.DataFrame()
+
+def reading_streaks(limit: int = 5) -> ReadingStreaks:
+    # Gaps and islands: consecutive reading days share julianday(day) - row number
+    try:
+        rows = cached_rows("""
+            WITH reading_days AS (
+                SELECT
+                    date_added AS day,
+                    julianday(date_added) - ROW_NUMBER() OVER (ORDER BY date_added) AS island
+                FROM DailyCounts
+                WHERE num_read > 0
+            )
+            SELECT MIN(day), MAX(day), COUNT(*)
+            FROM reading_days
+            GROUP BY island
+            ORDER BY MAX(day) DESC
+        """)
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        rows = ()
+    streaks = pd.DataFrame(list(rows), columns=["Start", "End", "Days"])
+    # A streak is still going if its last reading day is today or yesterday
+    yesterday = (datetime.date.today() - datetime.timedelta(days=1)).isoformat()
+    current = int(streaks["Days"].iloc[0]) if len(streaks) and streaks["End"].iloc[0] >= yesterday else 0
+    longest = streaks.sort_values(["Days", "End"], ascending=False, kind="stable").head(limit).reset_index(drop=True)
+    return ReadingStreaks(current, int(longest["Days"].iloc[0]) if len(longest) else 0, longest)
+
+def trend_categories(limit: int = DEFAULT_TREND_CATEGORIES) -> list[int]:
+    # The most used categories, which the ratings chart shows until others are picked
+    try:
+        rows = cached_rows("""
+            SELECT category_id
+            FROM CategoryCounts
+            WHERE num_articles > 0
+            ORDER BY num_articles DESC, category_id
+            LIMIT ?
+        """, (int(limit),))
+        return [category_id for (category_id,) in rows]
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return []
+
+def category_ratings(category_ids, start: datetime.date, end: datetime.date) -> pd.DataFrame:
+    # Monthly averages of read articles' ratings, with a running average over each category's whole
+    # history; months before start still feed the running average. The unary + on date_added keeps SQLite
+    # from walking every article through the date index instead of the chosen categories' links.
+    try:
+        return cached_dataframe("""
+            WITH monthly AS (
+                SELECT
+                    ac.category_id,
+                    strftime('%Y-%m-01', a.date_added) AS month,
+                    SUM(r.interest_rating) AS interest_sum,
+                    COUNT(r.interest_rating) AS interest_count,
+                    SUM(r.quality_rating) AS quality_sum,
+                    COUNT(r.quality_rating) AS quality_count
+                FROM ArticleCategories ac
+                INNER JOIN Articles a ON a.article_id = ac.article_id
+                INNER JOIN Reviews r ON r.article_id = a.article_id
+                WHERE ac.category_id IN (SELECT value FROM json_each(?1))
+                    AND a.was_read = 1
+                    AND +a.date_added <= ?3
+                GROUP BY ac.category_id, month
+            ),
+            trends AS (
+                SELECT
+                    c.category_name AS "Category",
+                    m.month AS "Month",
+                    m.interest_sum * 1.0 / NULLIF(m.interest_count, 0) AS "Interest",
+                    m.quality_sum * 1.0 / NULLIF(m.quality_count, 0) AS "Quality",
+                    SUM(m.interest_sum) OVER history * 1.0 / NULLIF(SUM(m.interest_count) OVER history, 0) AS "Running Interest",
+                    SUM(m.quality_sum) OVER history * 1.0 / NULLIF(SUM(m.quality_count) OVER history, 0) AS "Running Quality",
+                    m.interest_count AS "Reviews"
+                FROM monthly m
+                INNER JOIN Categories c ON c.category_id = m.category_id
+                WINDOW history AS (PARTITION BY m.category_id ORDER BY m.month)
+            )
+            SELECT *
+            FROM trends
+            WHERE "Month" >= strftime('%Y-%m-01', ?2)
+            ORDER BY "Category", "Month"
+        """, (json.dumps(sorted({int(category_id) for category_id in category_ids})), start.isoformat(), end.isoformat()))
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return pd.DataFrame()
+
+def backlog(start: datetime.date, end: datetime.date) -> pd.DataFrame:
+    # Running totals of want-to-read articles logged and articles read. Marking an article read keeps its
+    # date, so the gap between the two lines is how far reading has kept up with logging.
+    try:
+        return cached_dataframe(f"""
+            {CALENDAR}
+            SELECT
+                day AS "Date",
+                SUM(num_unread) OVER running
+                    + (SELECT COALESCE(SUM(num_articles - num_read), 0) FROM DailyCounts WHERE date_added < ?1) AS "Want to Read",
+                SUM(num_read) OVER running
+                    + (SELECT COALESCE(SUM(num_read), 0) FROM DailyCounts WHERE date_added < ?1) AS "Read"
+            FROM daily
+            WINDOW running AS (ORDER BY day)
+        """, (start.isoformat(), end.isoformat()))
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return pd.DataFrame()
+
+def downsample(frame: pd.DataFrame, max_points: int = MAX_CHART_POINTS, last_columns=()) -> pd.DataFrame:
+    # Long daily series are cut into equal runs of consecutive rows, one point each, so charts stay small.
+    # A run is labelled by its first date and takes the mean of each column, or its last value for the
+    # running totals in last_columns.
+    rows = len(frame)
+    if rows <= max_points:
+        return frame
+    size = -(-rows // max_points)
+    starts = np.arange(0, rows, size)
+    lengths = np.diff(np.append(starts, rows))
+    sampled = {frame.columns[0]: frame[frame.columns[0]].to_numpy()[starts]}
+    for column in frame.columns[1:]:
+        values = frame[column].to_numpy(dtype=float)
+        if column in last_columns:
+            sampled[column] = values[starts + lengths - 1]
+        else:
+            sampled[column] = np.add.reduceat(values, starts) / lengths
+    return pd.DataFrame(sampled)
@@ -0,0 +1,219 @@
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd # type: ignore
+
+from database.migrations import migrate
+from instrumentation.recorder import recorder, statement_name
+
+DB_PATH = './database/articles.db'
+POOL_SIZE = 8
+STATEMENT_CACHE_SIZE = 256
+BUSY_TIMEOUT_MS = 5000
+# How long a session waits for a pooled connection before giving up, so a leaked one can't hang every page
+ACQUIRE_TIMEOUT_SECONDS = 30
+
+CONNECTION_PRAGMAS = [
+    "PRAGMA journal_mode=WAL;",
+    "PRAGMA synchronous=NORMAL;",
+    "PRAGMA foreign_keys=ON;",
+    "PRAGMA mmap_size=268435456;",
+    "PRAGMA cache_size=-65536;",
+    "PRAGMA temp_store=MEMORY;",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS};",
+]
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    # A sqlite3.Error, so callers handle it like a locked database
+    pass
+
+class TracedCursor(sqlite3.Cursor):
+    # Times statements and counts the rows they return while a debug scope is open; failed
+    # statements carry the SQLite error as their status.
+    # Fetch time is added to the statement's event, since SQLite produces rows lazily.
+    event = None
+
+    def execute(self, sql, parameters=()):
+        if not recorder.active():
+            return super().execute(sql, parameters)
+        start = time.perf_counter()
+        status = None
+        try:
+            return super().execute(sql, parameters)
+        except sqlite3.Error as error:
+            status = str(error)
+            raise
+        finally:
+            self.event = recorder.record("sql", statement_name(sql), time.perf_counter() - start, max(self.rowcount, 0), status)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not recorder.active():
+            return super().executemany(sql, seq_of_parameters)
+        start = time.perf_counter()
+        status = None
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        except sqlite3.Error as error:
+            status = str(error)
+            raise
+        finally:
+            self.event = recorder.record("sql", statement_name(sql), time.perf_counter() - start, max(self.rowcount, 0), status)
+
+    def _fetched(self, start, rows):
+        if self.event is not None:
+            self.event["duration_ms"] = round(self.event["duration_ms"] + (time.perf_counter() - start) * 1000, 3)
+            self.event["rows"] += rows
+        return rows
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows))
+        return rows
+
+class TracedConnection(sqlite3.Connection):
+    # Connection.execute doesn't go through cursor() in C, so traced runs route it to TracedCursor
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        if not recorder.active():
+            return super().execute(sql, parameters)
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not recorder.active():
+            return super().executemany(sql, seq_of_parameters)
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        if not recorder.active():
+            return super().commit()
+        start = time.perf_counter()
+        status = None
+        try:
+            return super().commit()
+        except sqlite3.Error as error:
+            status = str(error)
+            raise
+        finally:
+            recorder.record("sql", "COMMIT", time.perf_counter() - start, 0, status)
+
+class ConnectionPool:
+    # Connections are handed to one thread at a time, so check_same_thread can be relaxed.
+    # Each connection keeps its own prepared statement cache for as long as it stays pooled.
+    def __init__(self, db_path=DB_PATH, size=POOL_SIZE, acquire_timeout=ACQUIRE_TIMEOUT_SECONDS):
+        self.db_path = db_path
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        self.idle = queue.LifoQueue(maxsize=size)
+        self.lock = threading.Lock()
+        self.opened = 0
+        self.migrated = False
+
+    def _open(self):
+        sqliteConnection = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            factory=TracedConnection,
+        )
+        for pragma in CONNECTION_PRAGMAS:
+            sqliteConnection.execute(pragma)
+        # The first connection of the process brings the schema up to date
+        with self.lock:
+            if not self.migrated:
+                migrate(sqliteConnection)
+                self.migrated = True
+        return sqliteConnection
+
+    def acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self.lock:
+            can_open = self.opened < self.size
+            if can_open:
+                self.opened += 1
+        if can_open:
+            try:
+                return self._open()
+            except sqlite3.Error:
+                with self.lock:
+                    self.opened -= 1
+                raise
+        try:
+            return self.idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise PoolTimeoutError(
+                f"No database connection came free within {self.acquire_timeout:g}s; all {self.size} are in use"
+            ) from None
+
+    def release(self, sqliteConnection):
+        if sqliteConnection.in_transaction:
+            sqliteConnection.rollback()
+        self.idle.put(sqliteConnection)
+
+    def discard(self, sqliteConnection):
+        sqliteConnection.close()
+        with self.lock:
+            self.opened -= 1
+
+    def close_all(self):
+        while True:
+            try:
+                self.discard(self.idle.get_nowait())
+            except queue.Empty:
+                return
+
+pool = ConnectionPool()
+
+def set_database(db_path):
+    # Points every later connection() at another database file, e.g. a benchmark copy
+    global pool
+    pool.close_all()
+    pool = ConnectionPool(db_path)
+
+@contextmanager
+def connection():
+    sqliteConnection = pool.acquire()
+    try:
+        yield sqliteConnection
+    finally:
+        pool.release(sqliteConnection)
+
+@contextmanager
+def transaction(immediate=False):
+    with connection() as sqliteConnection:
+        try:
+            if immediate:
+                # Takes the write lock up front; a deferred transaction that reads first can hit
+                # SQLITE_BUSY when it later upgrades to write while another session is writing
+                sqliteConnection.execute("BEGIN IMMEDIATE")
+            yield sqliteConnection
+            sqliteConnection.commit()
+        except BaseException:
+            sqliteConnection.rollback()
+            raise
+
+def read_dataframe(query, params=()):
+    with connection() as sqliteConnection:
+        return pd.read_sql_query(query, sqliteConnection, params=params)
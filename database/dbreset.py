@@ -1,59 +1,52 @@
+import json
+import os
 import sqlite3
+import sys
+
+# Allows running as `python database/dbreset.py` from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.migrations import migrate
 
 DB_PATH = './database/articles.db'
 
+sqliteConnection = None
 try:
     # Connect to SQLite Database and create a cursor
     sqliteConnection = sqlite3.connect(DB_PATH)
     cursor = sqliteConnection.cursor()
     print('Resetting Database')
 
-    drop_queries = [
-        "DROP TABLE IF EXISTS ArticleCategories;",
-        "DROP TABLE IF EXISTS Categories;",
-        "DROP TABLE IF EXISTS Articles;",
-        "DROP TABLE IF EXISTS Reviews;"
-    ]
-
-    for query in drop_queries:
-        cursor.execute(query)
-
-    article_table_setup = ["""
-    CREATE TABLE IF NOT EXISTS Articles (
-        article_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        title TEXT UNIQUE,
-        link TEXT UNIQUE,
-        date_added DATE DEFAULT CURRENT_DATE,
-        was_read BOOLEAN DEFAULT 0
-    );
-    """,
-    """
-    CREATE TABLE IF NOT EXISTS Categories (
-        category_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        category_name TEXT UNIQUE
-    );
-    """,
-    """
-    CREATE TABLE IF NOT EXISTS ArticleCategories (
-        article_id INTEGER,
-        category_id INTEGER,
-        PRIMARY KEY (article_id, category_id),
-        FOREIGN KEY(article_id) REFERENCES Articles(article_id) ON DELETE CASCADE,
-        FOREIGN KEY(category_id) REFERENCES Categories(category_id) ON DELETE CASCADE
-    );
-    """,
-    """
-    CREATE TABLE IF NOT EXISTS Reviews (
-        review_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        article_id INTEGER,
-        interest_rating INTEGER,
-        quality_rating INTEGER,
-        FOREIGN KEY(article_id) REFERENCES Articles(article_id) ON DELETE CASCADE
-    );
-    """]
-
-    for query in article_table_setup:
-        cursor.execute(query)
+    # A running app keeps caches keyed on DataRevision, so the revision only ever moves forward and every
+    # article is journaled as changed, as a delete would be
+    revision = 0
+    if cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'DataRevision'").fetchone():
+        revision = cursor.execute("SELECT revision FROM DataRevision WHERE id = 1").fetchone()[0]
+    cursor.execute("DROP TABLE IF EXISTS temp.ResetArticles;")
+    if cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'Articles'").fetchone():
+        cursor.execute("CREATE TEMP TABLE ResetArticles AS SELECT article_id FROM Articles;")
+    else:
+        cursor.execute("CREATE TEMP TABLE ResetArticles (article_id INTEGER);")
+
+    # Drops everything the migrations created: triggers and views first, then virtual tables (which take
+    # their shadow tables with them), then the remaining tables along with their indexes
+    for kinds in (("trigger", "view"), ("virtual",), ("table",)):
+        objects = cursor.execute("""
+            SELECT type, name
+            FROM sqlite_master
+            WHERE name NOT LIKE 'sqlite_%'
+                AND (CASE WHEN sql LIKE 'CREATE VIRTUAL TABLE%' THEN 'virtual' ELSE type END) IN (SELECT value FROM json_each(?))
+        """, (json.dumps(kinds),)).fetchall()
+        for object_type, name in objects:
+            cursor.execute(f'DROP {object_type.upper()} IF EXISTS "{name}";')
+    cursor.execute("PRAGMA user_version = 0;")
+
+    migrate(sqliteConnection, verbose=True, analyze=True)
+
+    revision += 1
+    cursor.execute("UPDATE DataRevision SET revision = ? WHERE id = 1;", (revision,))
+    cursor.execute("INSERT OR REPLACE INTO ArticleChanges (article_id, revision) SELECT article_id, ? FROM ResetArticles;", (revision,))
+    cursor.execute("DROP TABLE temp.ResetArticles;")
+    sqliteConnection.commit()
 
     # Close the cursor after use
     cursor.close()
@@ -65,4 +58,4 @@ finally:
     # Ensure the database connection is closed
     if sqliteConnection:
         sqliteConnection.close()
-        print('Reset Complete')
\ No newline at end of file
+        print('Reset Complete')
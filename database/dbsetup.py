@@ -1,52 +1,19 @@
+import os
 import sqlite3
+import sys
+
+# Allows running as `python database/dbsetup.py` from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.migrations import migrate
 
 DB_PATH = './database/articles.db'
 
+sqliteConnection = None
 try:
-    # Connect to SQLite Database and create a cursor
+    # Connect to SQLite Database and bring the schema up to date
     sqliteConnection = sqlite3.connect(DB_PATH)
-    cursor = sqliteConnection.cursor()
     print('Preparing Database')
-
-    article_table_setup = ["""
-    CREATE TABLE IF NOT EXISTS Articles (
-        article_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        title TEXT UNIQUE,
-        link TEXT UNIQUE,
-        date_added DATE DEFAULT CURRENT_DATE,
-        was_read BOOLEAN DEFAULT 0
-    );
-    """,
-    """
-    CREATE TABLE IF NOT EXISTS Categories (
-        category_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        category_name TEXT UNIQUE
-    );
-    """,
-    """
-    CREATE TABLE IF NOT EXISTS ArticleCategories (
-        article_id INTEGER,
-        category_id INTEGER,
-        PRIMARY KEY (article_id, category_id),
-        FOREIGN KEY(article_id) REFERENCES Articles(article_id) ON DELETE CASCADE,
-        FOREIGN KEY(category_id) REFERENCES Categories(category_id) ON DELETE CASCADE
-    );
-    """,
-    """
-    CREATE TABLE IF NOT EXISTS Reviews (
-        review_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        article_id INTEGER,
-        interest_rating INTEGER,
-        quality_rating INTEGER,
-        FOREIGN KEY(article_id) REFERENCES Articles(article_id) ON DELETE CASCADE
-    );
-    """]
-
-    for query in article_table_setup:
-        cursor.execute(query)
-
-    # Close the cursor after use
-    cursor.close()
+    migrate(sqliteConnection, verbose=True, analyze=True)
 
 except sqlite3.Error as error:
     print('Error occurred -', error)
@@ -55,4 +22,4 @@ finally:
     # Ensure the database connection is closed
     if sqliteConnection:
         sqliteConnection.close()
-        print('Database Created')
\ No newline at end of file
+        print('Database Created')
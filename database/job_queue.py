@@ -0,0 +1,222 @@
+import sqlite3
+import time
+from typing import Iterable, Optional
+
+from database.connection import connection, transaction
+
+# fetch: get a summary unless a fresh one is stored
+# refetch: always go upstream, e.g. to replace a stale summary
+# enrich: fill in a summary for a library article that has none, in the background
+JOB_KINDS = ("fetch", "refetch", "enrich")
+# Higher runs first
+PRIORITY_INTERACTIVE = 10
+PRIORITY_REFRESH = 0
+PRIORITY_BACKGROUND = -10
+DEFAULT_MAX_ATTEMPTS = 5
+LEASE_SECONDS = 60
+CLAIM_BATCH_SIZE = 20
+
+JOB_COLUMNS = "job_id, kind, title, lang, priority, status, attempts, max_attempts, error, created_at"
+
+class Job:
+    def __init__(self, job_id, kind, title, lang, priority, status, attempts, max_attempts, error, created_at):
+        self.job_id = job_id
+        self.kind = kind
+        self.title = title
+        self.lang = lang
+        self.priority = priority
+        self.status = status
+        self.attempts = attempts
+        self.max_attempts = max_attempts
+        self.error = error
+        self.created_at = created_at
+
+# A page has at most one live job. Asking again can only raise its priority, bring it forward or
+# turn it into a refetch; otherwise the existing job is left alone and nothing is written.
+ENQUEUE = """
+    INSERT INTO FetchJobs (kind, title, lang, priority, max_attempts, run_after, created_at)
+    VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?6)
+    ON CONFLICT(title, lang) WHERE status IN ('queued', 'leased') DO UPDATE SET
+        priority = MAX(priority, excluded.priority),
+        run_after = MIN(run_after, excluded.run_after),
+        kind = CASE WHEN excluded.kind = 'refetch' THEN 'refetch' ELSE kind END
+    WHERE excluded.priority > priority OR (excluded.kind = 'refetch' AND kind <> 'refetch')
+"""
+
+def enqueue(kind: str, title: str, lang: str, priority: int = PRIORITY_REFRESH,
+            max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> bool:
+    return enqueue_many([(kind, title, lang, priority)], max_attempts)
+
+def enqueue_many(jobs: Iterable[tuple], max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> bool:
+    # jobs are (kind, title, lang, priority) tuples
+    now = time.time()
+    rows = []
+    for kind, title, lang, priority in jobs:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind {kind}")
+        rows.append((kind, title, lang, int(priority), int(max_attempts), now))
+    try:
+        with transaction() as sqliteConnection:
+            sqliteConnection.executemany(ENQUEUE, rows)
+        return True
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return False
+
+def latest_job(title: str, lang: str) -> Optional[Job]:
+    # Job status changes don't bump the data revision, so this read is never served from the query cache
+    try:
+        with connection() as sqliteConnection:
+            row = sqliteConnection.execute(f"""
+                SELECT {JOB_COLUMNS}
+                FROM FetchJobs
+                WHERE title = ? AND lang = ?
+                ORDER BY job_id DESC
+                LIMIT 1
+            """, (title, lang)).fetchone()
+        return Job(*row) if row else None
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return None
+
+def claim(worker: str, limit: int = CLAIM_BATCH_SIZE, lease_seconds: float = LEASE_SECONDS) -> list[Job]:
+    # Leases up to limit ready jobs, highest priority first. Each claim counts as an attempt.
+    now = time.time()
+    try:
+        with transaction(immediate=True) as sqliteConnection:
+            # A lease that ran out belongs to a worker that died or stalled, so its job goes back in line
+            sqliteConnection.execute("""
+                UPDATE FetchJobs
+                SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+                    finished_at = CASE WHEN attempts >= max_attempts THEN ?1 END,
+                    error = 'Lease expired',
+                    leased_until = NULL,
+                    worker = NULL
+                WHERE status = 'leased' AND leased_until < ?1
+            """, (now,))
+            rows = sqliteConnection.execute(f"""
+                UPDATE FetchJobs
+                SET status = 'leased', attempts = attempts + 1, leased_until = ?, worker = ?
+                WHERE job_id IN (
+                    SELECT job_id
+                    FROM FetchJobs
+                    WHERE status = 'queued' AND run_after <= ?
+                    ORDER BY priority DESC, run_after, job_id
+                    LIMIT ?
+                )
+                RETURNING {JOB_COLUMNS}
+            """, (now + lease_seconds, worker, now, int(limit))).fetchall()
+        jobs = [Job(*row) for row in rows]
+        jobs.sort(key=lambda job: (-job.priority, job.job_id))
+        return jobs
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return []
+
+def complete(job_ids: Iterable[int], worker: str) -> int:
+    # Only jobs this worker still holds are marked done; returns how many were
+    now = time.time()
+    try:
+        with transaction() as sqliteConnection:
+            cursor = sqliteConnection.executemany("""
+                UPDATE FetchJobs
+                SET status = 'done', finished_at = ?, error = NULL, leased_until = NULL
+                WHERE job_id = ? AND worker = ? AND status = 'leased'
+            """, [(now, int(job_id), worker) for job_id in job_ids])
+            return cursor.rowcount
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return 0
+
+def retry(job_id: int, worker: str, error_message: str, run_after: float) -> bool:
+    try:
+        with transaction() as sqliteConnection:
+            sqliteConnection.execute("""
+                UPDATE FetchJobs
+                SET status = 'queued', run_after = ?, error = ?, leased_until = NULL, worker = NULL
+                WHERE job_id = ? AND worker = ? AND status = 'leased'
+            """, (run_after, error_message, int(job_id), worker))
+        return True
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return False
+
+def fail(job_id: int, worker: str, error_message: str) -> bool:
+    # Returns whether the worker still held the job
+    try:
+        with transaction() as sqliteConnection:
+            return sqliteConnection.execute("""
+                UPDATE FetchJobs
+                SET status = 'failed', finished_at = ?, error = ?, leased_until = NULL
+                WHERE job_id = ? AND worker = ? AND status = 'leased'
+            """, (time.time(), error_message, int(job_id), worker)).rowcount > 0
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return False
+
+def queue_stats() -> dict:
+    try:
+        with connection() as sqliteConnection:
+            return dict(sqliteConnection.execute("""
+                SELECT status, COUNT(*)
+                FROM FetchJobs
+                GROUP BY status
+            """).fetchall())
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return {}
+
+def prune(older_than_seconds: float) -> int:
+    # Finished jobs are only kept so pages can show their outcome
+    try:
+        with transaction() as sqliteConnection:
+            return sqliteConnection.execute("""
+                DELETE FROM FetchJobs
+                WHERE status IN ('done', 'failed') AND finished_at < ?
+            """, (time.time() - older_than_seconds,)).rowcount
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return 0
+
+def enqueue_missing_summaries(priority: int = PRIORITY_BACKGROUND) -> int:
+    # Queues an enrich job for every library article without a stored summary, e.g. after a bulk import
+    try:
+        with connection() as sqliteConnection:
+            rows = sqliteConnection.execute("""
+                SELECT a.title, a.lang
+                FROM Articles a
+                WHERE NOT EXISTS (SELECT 1 FROM ArticleSummaries s WHERE s.title = a.title AND s.lang = a.lang)
+            """).fetchall()
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return 0
+    if rows and not enqueue_many(("enrich", title, lang, priority) for title, lang in rows):
+        return 0
+    return len(rows)
+
+def enqueue_stale_summaries(ttl_seconds: float, priority: int = PRIORITY_BACKGROUND) -> int:
+    # Queues a refetch for every stored summary of a library article that is older than ttl_seconds
+    try:
+        with connection() as sqliteConnection:
+            rows = sqliteConnection.execute("""
+                SELECT s.title, s.lang
+                FROM ArticleSummaries s
+                WHERE COALESCE(s.synced_at, s.fetched_at) < ?
+                    AND EXISTS (SELECT 1 FROM Articles a WHERE a.lang = s.lang AND a.title = s.title)
+            """, (time.time() - ttl_seconds,)).fetchall()
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return 0
+    if rows and not enqueue_many(("refetch", title, lang, priority) for title, lang in rows):
+        return 0
+    return len(rows)
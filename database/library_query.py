@@ -0,0 +1,143 @@
+import sqlite3
+
+import pandas as pd # type: ignore
+
+from database.connection import connection
+from database.query_cache import cached_dataframe, cached_rows
+
+DEFAULT_PAGE_SIZE = 25
+
+# Sort keys must be non-null so the (sort_key, article_id) row-value cursor is well ordered
+SORT_EXPRESSIONS = {
+    "title": "a.title",
+    "date_added": "a.date_added",
+    "interest_rating": "COALESCE(r.interest_rating, 0)",
+    "quality_rating": "COALESCE(r.quality_rating, 0)",
+}
+
+class LibraryQuery:
+    def __init__(self, sort_column="title", descending=False, category_ids=None, match_all=False,
+                 date_from=None, date_to=None, interest_range=None, quality_range=None):
+        self.sort_column = sort_column
+        self.descending = descending
+        self.category_ids = [int(category_id) for category_id in (category_ids or [])]
+        self.match_all = match_all
+        self.date_from = date_from
+        self.date_to = date_to
+        self.interest_range = interest_range
+        self.quality_range = quality_range
+
+    def filters(self):
+        where = ["EXISTS (SELECT 1 FROM ArticleCategories ac WHERE ac.article_id = a.article_id)"]
+        params = []
+
+        # Category filters go through the junction table so names that contain each other never collide
+        if self.category_ids:
+            placeholders = ", ".join("?" for _ in self.category_ids)
+            category_filter = f"""a.article_id IN (
+                SELECT ac.article_id
+                FROM ArticleCategories ac
+                WHERE ac.category_id IN ({placeholders})"""
+            params.extend(self.category_ids)
+            if self.match_all:
+                category_filter += " GROUP BY ac.article_id HAVING COUNT(*) = ?"
+                params.append(len(self.category_ids))
+            where.append(category_filter + ")")
+
+        if self.date_from is not None:
+            where.append("a.date_added >= ?")
+            params.append(str(self.date_from))
+        if self.date_to is not None:
+            where.append("a.date_added <= ?")
+            params.append(str(self.date_to))
+
+        for column, rating_range in (("r.interest_rating", self.interest_range), ("r.quality_rating", self.quality_range)):
+            if rating_range is not None:
+                where.append(f"{column} BETWEEN ? AND ?")
+                params.extend(int(rating) for rating in rating_range)
+
+        return where, params
+
+    def page_query(self, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+        sort_expression = SORT_EXPRESSIONS[self.sort_column]
+        direction = "DESC" if self.descending else "ASC"
+        where, params = self.filters()
+
+        if cursor is not None:
+            comparison = "<" if self.descending else ">"
+            where.append(f"({sort_expression}, a.article_id) {comparison} (?, ?)")
+            params.extend(cursor)
+
+        query = f"""
+            SELECT
+                a.article_id,
+                a.title,
+                (
+                    SELECT GROUP_CONCAT(c.category_name, '|')
+                    FROM ArticleCategories ac
+                    INNER JOIN Categories c ON ac.category_id = c.category_id
+                    WHERE ac.article_id = a.article_id
+                ) AS categories,
+                a.date_added,
+                a.was_read,
+                r.interest_rating,
+                r.quality_rating,
+                a.link,
+                a.lang,
+                {sort_expression} AS sort_key
+            FROM Articles a
+            INNER JOIN Reviews r ON a.article_id = r.article_id
+            WHERE {" AND ".join(where)}
+            ORDER BY {sort_expression} {direction}, a.article_id {direction}
+            LIMIT ?
+        """
+        params.append(int(page_size))
+        return query, params
+
+    def count_query(self):
+        where, params = self.filters()
+        query = f"""
+            SELECT COUNT(*)
+            FROM Articles a
+            INNER JOIN Reviews r ON a.article_id = r.article_id
+            WHERE {" AND ".join(where)}
+        """
+        return query, params
+
+def fetch_library_page(library_query: LibraryQuery, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    query, params = library_query.page_query(cursor, page_size)
+    try:
+        return cached_dataframe(query, params)
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return pd.DataFrame()
+
+def count_library(library_query: LibraryQuery):
+    query, params = library_query.count_query()
+    try:
+        return cached_rows(query, params)[0][0]
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return 0
+
+def explain_library_page(library_query: LibraryQuery, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    query, params = library_query.page_query(cursor, page_size)
+    try:
+        with connection() as sqliteConnection:
+            rows = sqliteConnection.execute("EXPLAIN QUERY PLAN " + query, params).fetchall()
+        return [detail for _, _, _, detail in rows]
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return []
+
+def next_cursor(page):
+    if page.empty:
+        return None
+    last = page.iloc[-1]
+    sort_key = last.sort_key
+    if hasattr(sort_key, "item"):
+        sort_key = sort_key.item()
+    return (sort_key, int(last.article_id))
@@ -0,0 +1,586 @@
+import sqlite3
+import time
+
+from wiki.urls import DEFAULT_LANG, article_url, canonical_key, canonical_title
+
+# SQLite 3.40 has no unixepoch('subsec'), so fractional Unix time comes from julianday
+UNIX_NOW = "((julianday('now') - 2440587.5) * 86400.0)"
+# Tables that carry an updated_at column, with the key that identifies one row
+UPDATED_AT_KEYS = {
+    "Articles": ("article_id",),
+    "Categories": ("category_id",),
+    "ArticleCategories": ("article_id", "category_id"),
+    "Reviews": ("review_id",),
+}
+
+# Records an article in ArticleChanges; old and/or new is the row the trigger sees
+JOURNAL_CHANGE = """
+            INSERT INTO ArticleChanges (article_id, revision)
+            SELECT {row}.article_id, revision FROM DataRevision WHERE id = 1
+            ON CONFLICT(article_id) DO UPDATE SET revision = excluded.revision;"""
+JOURNAL_ROWS = {"INSERT": ("new",), "UPDATE": ("old", "new"), "DELETE": ("old",)}
+# Updates only count when they touch a journaled column, so updated_at stamps and renames are skipped
+JOURNAL_COLUMNS = {
+    "Articles": "was_read, date_added",
+    "ArticleCategories": "article_id, category_id",
+    "Reviews": "article_id, interest_rating, quality_rating",
+}
+
+# Search index triggers once articles are keyed by (lang, title); each article takes the summary stored
+# for its own language
+SEARCH_TRIGGERS = {
+    "articles_search_insert": """
+        CREATE TRIGGER IF NOT EXISTS articles_search_insert AFTER INSERT ON Articles BEGIN
+            INSERT INTO ArticleSearch (rowid, title, summary)
+            VALUES (
+                new.article_id,
+                new.title,
+                (SELECT summary FROM ArticleSummaries WHERE title = new.title AND lang = new.lang)
+            );
+        END;
+    """,
+    "articles_search_update": """
+        CREATE TRIGGER IF NOT EXISTS articles_search_update AFTER UPDATE OF title ON Articles BEGIN
+            UPDATE ArticleSearch
+            SET title = new.title,
+                summary = (SELECT summary FROM ArticleSummaries WHERE title = new.title AND lang = new.lang)
+            WHERE rowid = new.article_id;
+        END;
+    """,
+    "articles_search_delete": """
+        CREATE TRIGGER IF NOT EXISTS articles_search_delete AFTER DELETE ON Articles BEGIN
+            DELETE FROM ArticleSearch WHERE rowid = old.article_id;
+        END;
+    """,
+    "summaries_search_insert": """
+        CREATE TRIGGER IF NOT EXISTS summaries_search_insert AFTER INSERT ON ArticleSummaries BEGIN
+            UPDATE ArticleSearch
+            SET summary = new.summary
+            WHERE rowid = (SELECT article_id FROM Articles WHERE lang = new.lang AND title = new.title);
+        END;
+    """,
+    "summaries_search_update": """
+        CREATE TRIGGER IF NOT EXISTS summaries_search_update AFTER UPDATE OF summary ON ArticleSummaries BEGIN
+            UPDATE ArticleSearch
+            SET summary = new.summary
+            WHERE rowid = (SELECT article_id FROM Articles WHERE lang = new.lang AND title = new.title);
+        END;
+    """,
+}
+
+# Python helpers available to migration statements, so stored links are parsed exactly as the app parses them
+SQL_FUNCTIONS = {
+    "page_lang": (1, lambda link: (canonical_key(link) or (DEFAULT_LANG, None))[0]),
+    "page_title": (1, lambda link: (canonical_key(link) or (None, None))[1]),
+    "canonical_title": (1, canonical_title),
+    "article_url": (2, article_url),
+}
+# The language of a canonical link (see wiki.urls.article_url), which every writer stores
+ARTICLE_LANG = "CASE WHEN link LIKE 'https://%.wikipedia.org/wiki/%' THEN substr(link, 9, instr(link, '.wikipedia.org/') - 9) END"
+
+# Articles as rebuilt by migration 14: the page key (lang, title) replaces the base table's UNIQUE(title)
+ARTICLES_TABLE = f"""
+    CREATE TABLE {{table}} (
+        article_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT,
+        link TEXT UNIQUE,
+        date_added DATE DEFAULT CURRENT_DATE,
+        was_read BOOLEAN DEFAULT 0,
+        updated_at REAL,
+        lang TEXT GENERATED ALWAYS AS ({ARTICLE_LANG}) VIRTUAL
+    );
+"""
+
+def rebuild_table(sqliteConnection, table, create_statement):
+    # SQLite can't drop a column constraint, so the table is copied into a new one, swapped in, and its
+    # indexes and triggers are recreated from the schema. Row ids and the AUTOINCREMENT counter carry over.
+    rebuilt = f"{table}Rebuild"
+    dependents = [sql for (sql,) in sqliteConnection.execute("""
+        SELECT sql
+        FROM sqlite_master
+        WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL
+    """, (table,))]
+    # Generated columns are hidden from the copy
+    columns = ", ".join(name for _, name, _, _, _, _, hidden in sqliteConnection.execute(f"PRAGMA table_xinfo({table});") if not hidden)
+    sqliteConnection.execute(create_statement.format(table=rebuilt))
+    sqliteConnection.execute(f"INSERT INTO {rebuilt} ({columns}) SELECT {columns} FROM {table};")
+    sqliteConnection.execute("""
+        UPDATE sqlite_sequence
+        SET seq = MAX(seq, COALESCE((SELECT seq FROM sqlite_sequence WHERE name = ?1), 0))
+        WHERE name = ?2
+    """, (table, rebuilt))
+    sqliteConnection.execute(f"DROP TABLE {table};")
+    # Triggers on other tables still name the dropped table; legacy renaming doesn't re-check them
+    sqliteConnection.execute("PRAGMA legacy_alter_table = ON;")
+    sqliteConnection.execute(f"ALTER TABLE {rebuilt} RENAME TO {table};")
+    sqliteConnection.execute("PRAGMA legacy_alter_table = OFF;")
+    for sql in dependents:
+        sqliteConnection.execute(sql)
+
+# Each migration is (version, name, statements). Versions are applied in order and recorded in
+# PRAGMA user_version, so every statement must also be safe on databases created before tracking.
+# A statement can also be a function of the connection, for steps that need to read the schema first.
+MIGRATIONS = [
+    (1, "Create base tables", [
+    """
+    CREATE TABLE IF NOT EXISTS Articles (
+        article_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT UNIQUE,
+        link TEXT UNIQUE,
+        date_added DATE DEFAULT CURRENT_DATE,
+        was_read BOOLEAN DEFAULT 0
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Categories (
+        category_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        category_name TEXT UNIQUE
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS ArticleCategories (
+        article_id INTEGER,
+        category_id INTEGER,
+        PRIMARY KEY (article_id, category_id),
+        FOREIGN KEY(article_id) REFERENCES Articles(article_id) ON DELETE CASCADE,
+        FOREIGN KEY(category_id) REFERENCES Categories(category_id) ON DELETE CASCADE
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Reviews (
+        review_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        article_id INTEGER,
+        interest_rating INTEGER,
+        quality_rating INTEGER,
+        FOREIGN KEY(article_id) REFERENCES Articles(article_id) ON DELETE CASCADE
+    );
+    """]),
+    (2, "Create summary cache", [
+    """
+    CREATE TABLE IF NOT EXISTS ArticleSummaries (
+        title TEXT NOT NULL,
+        lang TEXT NOT NULL,
+        summary TEXT,
+        pageid INTEGER,
+        fetched_at REAL NOT NULL,
+        PRIMARY KEY (title, lang)
+    );
+    """]),
+    (3, "Index library lookups", [
+        "CREATE INDEX IF NOT EXISTS idx_articlecategories_category ON ArticleCategories(category_id, article_id);",
+        "CREATE INDEX IF NOT EXISTS idx_articles_date_added ON Articles(date_added);",
+    ]),
+    (4, "One review per article", [
+        # Keep the newest review when older add_article runs left duplicates behind
+        """
+        DELETE FROM Reviews
+        WHERE review_id NOT IN (
+            SELECT MAX(review_id)
+            FROM Reviews
+            GROUP BY article_id
+        );
+        """,
+        "DROP INDEX IF EXISTS idx_reviews_article;",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_reviews_article ON Reviews(article_id);",
+    ]),
+    (5, "Full-text search", [
+        # rowid mirrors Articles.article_id; the summary comes from whichever cached language was fetched last
+        "CREATE VIRTUAL TABLE IF NOT EXISTS ArticleSearch USING fts5(title, summary, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3');",
+        """
+        CREATE TRIGGER IF NOT EXISTS articles_search_insert AFTER INSERT ON Articles BEGIN
+            INSERT INTO ArticleSearch (rowid, title, summary)
+            VALUES (
+                new.article_id,
+                new.title,
+                (SELECT summary FROM ArticleSummaries WHERE title = new.title ORDER BY fetched_at DESC LIMIT 1)
+            );
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS articles_search_update AFTER UPDATE OF title ON Articles BEGIN
+            UPDATE ArticleSearch
+            SET title = new.title,
+                summary = (SELECT summary FROM ArticleSummaries WHERE title = new.title ORDER BY fetched_at DESC LIMIT 1)
+            WHERE rowid = new.article_id;
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS articles_search_delete AFTER DELETE ON Articles BEGIN
+            DELETE FROM ArticleSearch WHERE rowid = old.article_id;
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS summaries_search_insert AFTER INSERT ON ArticleSummaries BEGIN
+            UPDATE ArticleSearch
+            SET summary = new.summary
+            WHERE rowid = (SELECT article_id FROM Articles WHERE title = new.title);
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS summaries_search_update AFTER UPDATE OF summary ON ArticleSummaries BEGIN
+            UPDATE ArticleSearch
+            SET summary = new.summary
+            WHERE rowid = (SELECT article_id FROM Articles WHERE title = new.title);
+        END;
+        """,
+        "DELETE FROM ArticleSearch;",
+        """
+        INSERT INTO ArticleSearch (rowid, title, summary)
+        SELECT
+            a.article_id,
+            a.title,
+            (SELECT summary FROM ArticleSummaries s WHERE s.title = a.title ORDER BY fetched_at DESC LIMIT 1)
+        FROM Articles a;
+        """,
+    ]),
+    (6, "Dashboard aggregates", [
+        """
+        CREATE TABLE IF NOT EXISTS CategoryCounts (
+            category_id INTEGER PRIMARY KEY,
+            num_articles INTEGER NOT NULL DEFAULT 0
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS ReadStateCounts (
+            was_read INTEGER PRIMARY KEY,
+            num_articles INTEGER NOT NULL DEFAULT 0
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS DailyCounts (
+            date_added TEXT PRIMARY KEY,
+            num_articles INTEGER NOT NULL DEFAULT 0,
+            num_read INTEGER NOT NULL DEFAULT 0
+        );
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS categories_counts_insert AFTER INSERT ON Categories BEGIN
+            INSERT OR IGNORE INTO CategoryCounts (category_id, num_articles) VALUES (new.category_id, 0);
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS categories_counts_delete AFTER DELETE ON Categories BEGIN
+            DELETE FROM CategoryCounts WHERE category_id = old.category_id;
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS articlecategories_counts_insert AFTER INSERT ON ArticleCategories BEGIN
+            INSERT INTO CategoryCounts (category_id, num_articles) VALUES (new.category_id, 1)
+            ON CONFLICT(category_id) DO UPDATE SET num_articles = num_articles + 1;
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS articlecategories_counts_delete AFTER DELETE ON ArticleCategories BEGIN
+            UPDATE CategoryCounts SET num_articles = num_articles - 1 WHERE category_id = old.category_id;
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS articlecategories_counts_update AFTER UPDATE OF category_id ON ArticleCategories BEGIN
+            UPDATE CategoryCounts SET num_articles = num_articles - 1 WHERE category_id = old.category_id;
+            INSERT INTO CategoryCounts (category_id, num_articles) VALUES (new.category_id, 1)
+            ON CONFLICT(category_id) DO UPDATE SET num_articles = num_articles + 1;
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS articles_counts_insert AFTER INSERT ON Articles BEGIN
+            INSERT INTO ReadStateCounts (was_read, num_articles) VALUES (COALESCE(new.was_read, 0), 1)
+            ON CONFLICT(was_read) DO UPDATE SET num_articles = num_articles + 1;
+            INSERT INTO DailyCounts (date_added, num_articles, num_read) VALUES (new.date_added, 1, COALESCE(new.was_read, 0))
+            ON CONFLICT(date_added) DO UPDATE SET
+                num_articles = num_articles + 1,
+                num_read = num_read + excluded.num_read;
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS articles_counts_delete AFTER DELETE ON Articles BEGIN
+            UPDATE ReadStateCounts SET num_articles = num_articles - 1 WHERE was_read = COALESCE(old.was_read, 0);
+            UPDATE DailyCounts
+            SET num_articles = num_articles - 1,
+                num_read = num_read - COALESCE(old.was_read, 0)
+            WHERE date_added = old.date_added;
+            DELETE FROM DailyCounts WHERE date_added = old.date_added AND num_articles <= 0;
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS articles_counts_update AFTER UPDATE OF was_read, date_added ON Articles BEGIN
+            UPDATE ReadStateCounts SET num_articles = num_articles - 1 WHERE was_read = COALESCE(old.was_read, 0);
+            INSERT INTO ReadStateCounts (was_read, num_articles) VALUES (COALESCE(new.was_read, 0), 1)
+            ON CONFLICT(was_read) DO UPDATE SET num_articles = num_articles + 1;
+            UPDATE DailyCounts
+            SET num_articles = num_articles - 1,
+                num_read = num_read - COALESCE(old.was_read, 0)
+            WHERE date_added = old.date_added;
+            DELETE FROM DailyCounts WHERE date_added = old.date_added AND num_articles <= 0;
+            INSERT INTO DailyCounts (date_added, num_articles, num_read) VALUES (new.date_added, 1, COALESCE(new.was_read, 0))
+            ON CONFLICT(date_added) DO UPDATE SET
+                num_articles = num_articles + 1,
+                num_read = num_read + excluded.num_read;
+        END;
+        """,
+        "DELETE FROM CategoryCounts;",
+        """
+        INSERT INTO CategoryCounts (category_id, num_articles)
+        SELECT c.category_id, COUNT(ac.article_id)
+        FROM Categories c
+        LEFT JOIN ArticleCategories ac ON ac.category_id = c.category_id
+        GROUP BY c.category_id;
+        """,
+        "DELETE FROM ReadStateCounts;",
+        """
+        INSERT INTO ReadStateCounts (was_read, num_articles)
+        SELECT COALESCE(was_read, 0), COUNT(*)
+        FROM Articles
+        GROUP BY COALESCE(was_read, 0);
+        """,
+        "DELETE FROM DailyCounts;",
+        """
+        INSERT INTO DailyCounts (date_added, num_articles, num_read)
+        SELECT date_added, COUNT(*), SUM(COALESCE(was_read, 0))
+        FROM Articles
+        GROUP BY date_added;
+        """,
+    ]),
+    (7, "Data revision counter", [
+        # Bumped by every write to a base table, from any process, so cached reads know when they are stale
+        """
+        CREATE TABLE IF NOT EXISTS DataRevision (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            revision INTEGER NOT NULL
+        );
+        """,
+        "INSERT OR IGNORE INTO DataRevision (id, revision) VALUES (1, 0);",
+    ] + [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table.lower()}_revision_{event.lower()} AFTER {event} ON {table} BEGIN
+            UPDATE DataRevision SET revision = revision + 1 WHERE id = 1;
+        END;
+        """
+        for table in ("Articles", "Categories", "ArticleCategories", "Reviews", "ArticleSummaries")
+        for event in ("INSERT", "UPDATE", "DELETE")
+    ]),
+    (8, "Row change timestamps", [
+        # Unix time of each row's last insert or update, for delta exports. Rows written before this
+        # migration stay NULL and are treated as changed by every delta.
+        f"ALTER TABLE {table} ADD COLUMN updated_at REAL;"
+        for table in UPDATED_AT_KEYS
+    ] + [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table.lower()}_touch_{event.lower()} AFTER {event} ON {table}
+        {"WHEN new.updated_at IS old.updated_at " if event == "UPDATE" else ""}BEGIN
+            UPDATE {table} SET updated_at = {UNIX_NOW}
+            WHERE {" AND ".join(f"{column} = new.{column}" for column in key)};
+        END;
+        """
+        for table, key in UPDATED_AT_KEYS.items()
+        for event in ("INSERT", "UPDATE")
+    ]),
+    (9, "Fetch job queue", [
+        # Serviced by tools.fetch_worker. No revision triggers, so job churn never invalidates cached reads.
+        """
+        CREATE TABLE IF NOT EXISTS FetchJobs (
+            job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            title TEXT NOT NULL,
+            lang TEXT NOT NULL,
+            priority INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL,
+            run_after REAL NOT NULL,
+            leased_until REAL,
+            worker TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            finished_at REAL
+        );
+        """,
+        # At most one live job per page; finished jobs stay behind for their result until pruned
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_fetchjobs_live ON FetchJobs(title, lang)
+        WHERE status IN ('queued', 'leased');
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_fetchjobs_ready ON FetchJobs(status, priority DESC, run_after);",
+        "CREATE INDEX IF NOT EXISTS idx_fetchjobs_page ON FetchJobs(title, lang, job_id);",
+    ]),
+    (10, "Page revisions and redirects", [
+        # revid and touched come from MediaWiki; synced_at is when they were last confirmed upstream
+        "ALTER TABLE ArticleSummaries ADD COLUMN revid INTEGER;",
+        "ALTER TABLE ArticleSummaries ADD COLUMN touched TEXT;",
+        "ALTER TABLE ArticleSummaries ADD COLUMN synced_at REAL;",
+        "CREATE INDEX IF NOT EXISTS idx_articlesummaries_synced ON ArticleSummaries(synced_at);",
+        """
+        CREATE TABLE IF NOT EXISTS PageRedirects (
+            lang TEXT NOT NULL,
+            from_title TEXT NOT NULL,
+            to_title TEXT NOT NULL,
+            recorded_at REAL NOT NULL,
+            PRIMARY KEY (lang, from_title)
+        );
+        """,
+    ]),
+    (11, "Canonical page keys", [
+        # lang is read from the canonical link, so every writer gets it right by storing article_url(title, lang)
+        f"ALTER TABLE Articles ADD COLUMN lang TEXT GENERATED ALWAYS AS ({ARTICLE_LANG}) VIRTUAL;",
+        """
+        CREATE TEMP TABLE CanonicalArticles AS
+        SELECT article_id, page_lang(link) AS lang, COALESCE(page_title(link), canonical_title(title)) AS title
+        FROM Articles;
+        """,
+        # Links that differed only in encoding, host or case are one page: the first logged article keeps
+        # the categories and read state of the others, and its own review unless it had none
+        """
+        CREATE TEMP TABLE DuplicateArticles AS
+        SELECT c.article_id, k.keep_id
+        FROM CanonicalArticles c
+        INNER JOIN (
+            SELECT lang, title, MIN(article_id) AS keep_id
+            FROM CanonicalArticles
+            GROUP BY lang, title
+        ) k ON c.lang = k.lang AND c.title = k.title
+        WHERE c.article_id <> k.keep_id;
+        """,
+        """
+        INSERT OR IGNORE INTO ArticleCategories (article_id, category_id)
+        SELECT d.keep_id, ac.category_id
+        FROM ArticleCategories ac
+        INNER JOIN DuplicateArticles d ON ac.article_id = d.article_id;
+        """,
+        """
+        UPDATE OR IGNORE Reviews
+        SET article_id = (SELECT keep_id FROM DuplicateArticles d WHERE d.article_id = Reviews.article_id)
+        WHERE article_id IN (SELECT article_id FROM DuplicateArticles);
+        """,
+        """
+        UPDATE Articles
+        SET was_read = 1
+        WHERE article_id IN (
+            SELECT d.keep_id
+            FROM DuplicateArticles d
+            INNER JOIN Articles a ON a.article_id = d.article_id
+            WHERE a.was_read
+        );
+        """,
+        "DELETE FROM ArticleCategories WHERE article_id IN (SELECT article_id FROM DuplicateArticles);",
+        "DELETE FROM Reviews WHERE article_id IN (SELECT article_id FROM DuplicateArticles);",
+        "DELETE FROM Articles WHERE article_id IN (SELECT article_id FROM DuplicateArticles);",
+        # title stays UNIQUE on its own from the base table, so a title already taken in another language is left as it was
+        """
+        UPDATE OR IGNORE Articles
+        SET title = c.title, link = article_url(c.title, c.lang)
+        FROM CanonicalArticles c
+        WHERE c.article_id = Articles.article_id
+            AND (Articles.title IS NOT c.title OR Articles.link IS NOT article_url(c.title, c.lang));
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_articles_page ON Articles(lang, title);",
+        "DROP TABLE temp.DuplicateArticles;",
+        "DROP TABLE temp.CanonicalArticles;",
+        # Summaries and jobs were keyed by the old parse_title, which left most percent-escapes in place
+        """
+        UPDATE OR IGNORE ArticleSummaries
+        SET title = canonical_title(title)
+        WHERE title <> canonical_title(title);
+        """,
+        "DELETE FROM ArticleSummaries WHERE title <> canonical_title(title);",
+        "DELETE FROM FetchJobs WHERE title <> canonical_title(title);",
+    ]),
+    (12, "Article change journal", [
+        # The data revision at each article's latest change to itself, its categories or its review, so
+        # in-memory copies such as the recommender's matrix can re-read only what changed
+        """
+        CREATE TABLE IF NOT EXISTS ArticleChanges (
+            article_id INTEGER PRIMARY KEY,
+            revision INTEGER NOT NULL
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_articlechanges_revision ON ArticleChanges(revision);",
+    ] + [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table.lower()}_changes_{event.lower()}
+        AFTER {event}{f" OF {JOURNAL_COLUMNS[table]}" if event == "UPDATE" else ""} ON {table} BEGIN
+            {"".join(JOURNAL_CHANGE.format(row=row) for row in JOURNAL_ROWS[event])}
+        END;
+        """
+        for table in JOURNAL_COLUMNS
+        for event in ("INSERT", "UPDATE", "DELETE")
+    ]),
+    (13, "Search summaries by page key", [
+        # The triggers from migration 5 matched summaries on title alone, so a title logged in one
+        # language could be indexed with another language's summary
+        f"DROP TRIGGER IF EXISTS {name};"
+        for name in SEARCH_TRIGGERS
+    ] + list(SEARCH_TRIGGERS.values()) + [
+        "DELETE FROM ArticleSearch;",
+        """
+        INSERT INTO ArticleSearch (rowid, title, summary)
+        SELECT
+            a.article_id,
+            a.title,
+            (SELECT summary FROM ArticleSummaries s WHERE s.title = a.title AND s.lang = a.lang)
+        FROM Articles a;
+        """,
+    ]),
+    (14, "Page key replaces title key", [
+        # Migration 11 had to leave UNIQUE(title) in place, so a title logged in one language couldn't be
+        # logged in another
+        lambda sqliteConnection: rebuild_table(sqliteConnection, "Articles", ARTICLES_TABLE),
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def current_version(sqliteConnection):
+    return sqliteConnection.execute("PRAGMA user_version;").fetchone()[0]
+
+def migrate(sqliteConnection, verbose=False, analyze=False):
+    applied = []
+    if current_version(sqliteConnection) >= LATEST_VERSION and not analyze:
+        return applied
+
+    for function_name, (num_params, function) in SQL_FUNCTIONS.items():
+        sqliteConnection.create_function(function_name, num_params, function, deterministic=True)
+
+    # Foreign keys are off while migrations run, so rebuilding a table never cascades into its children.
+    # The pragma is ignored inside a transaction, so it is set around them.
+    foreign_keys = sqliteConnection.execute("PRAGMA foreign_keys;").fetchone()[0]
+    sqliteConnection.execute("PRAGMA foreign_keys = OFF;")
+    try:
+        applied = apply_migrations(sqliteConnection, verbose)
+    finally:
+        sqliteConnection.execute(f"PRAGMA foreign_keys = {int(foreign_keys)};")
+
+    if applied or analyze:
+        start = time.perf_counter()
+        sqliteConnection.execute("ANALYZE;")
+        if verbose:
+            print(f'ANALYZE completed in {(time.perf_counter() - start) * 1000:.1f} ms')
+
+    return applied
+
+def apply_migrations(sqliteConnection, verbose):
+    applied = []
+    for version, name, statements in MIGRATIONS:
+        start = time.perf_counter()
+        # BEGIN IMMEDIATE serialises concurrent starters, so the version is re-read under the lock
+        sqliteConnection.execute("BEGIN IMMEDIATE;")
+        try:
+            if current_version(sqliteConnection) >= version:
+                sqliteConnection.execute("COMMIT;")
+                continue
+            for statement in statements:
+                if callable(statement):
+                    statement(sqliteConnection)
+                else:
+                    sqliteConnection.execute(statement)
+            sqliteConnection.execute(f"PRAGMA user_version = {int(version)};")
+            sqliteConnection.execute("COMMIT;")
+
+        except sqlite3.Error:
+            sqliteConnection.execute("ROLLBACK;")
+            raise
+
+        elapsed = time.perf_counter() - start
+        applied.append((version, name, elapsed))
+        if verbose:
+            print(f'Migration {version} ({name}) applied in {elapsed * 1000:.1f} ms')
+
+    return applied
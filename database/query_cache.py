@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd # type: ignore
+
+from database.connection import connection
+from instrumentation.recorder import recorder, statement_name
+
+MAX_ENTRIES = 256
+MAX_BYTES = 64 * 1024 * 1024
+
+def current_revision(sqliteConnection):
+    row = sqliteConnection.execute("SELECT revision FROM DataRevision WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+def result_size(result):
+    if isinstance(result, pd.DataFrame):
+        return int(result.memory_usage(deep=True).sum())
+    return 64 * (len(result) if hasattr(result, "__len__") else 1)
+
+class QueryCache:
+    # Results are keyed on (query, params) and tagged with the DataRevision they were read at.
+    # Any committed write bumps the revision, so the whole cache is dropped the next time it is read.
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.revision = None
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _lookup(self, key, revision):
+        with self.lock:
+            if revision != self.revision:
+                if self.entries:
+                    self.invalidations += 1
+                self.entries.clear()
+                self.total_bytes = 0
+                self.revision = revision
+                return None
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def _store(self, key, revision, result):
+        size = result_size(result)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if revision != self.revision:
+                return
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (result, size)
+            self.total_bytes += size
+            while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def read(self, query, params, loader):
+        start = time.perf_counter()
+        result, status = self._read(query, params, loader)
+        recorder.record("query", statement_name(query), time.perf_counter() - start, len(result), status)
+        return result
+
+    def _read(self, query, params, loader):
+        key = (query, tuple(params))
+        with connection() as sqliteConnection:
+            # The revision and the result are read in one transaction so they always match
+            sqliteConnection.execute("BEGIN;")
+            try:
+                revision = current_revision(sqliteConnection)
+                result = self._lookup(key, revision)
+                if result is not None:
+                    with self.lock:
+                        self.hits += 1
+                    return result, "hit"
+                with self.lock:
+                    self.misses += 1
+                result = loader(sqliteConnection, query, params)
+            finally:
+                sqliteConnection.execute("COMMIT;")
+        self._store(key, revision, result)
+        return result, "miss"
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+            self.revision = None
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "revision": self.revision,
+            }
+
+# Module-level instance so every session in the server process shares one cache
+query_cache = QueryCache()
+
+def load_dataframe(sqliteConnection, query, params):
+    return pd.read_sql_query(query, sqliteConnection, params=list(params))
+
+def load_rows(sqliteConnection, query, params):
+    return tuple(sqliteConnection.execute(query, params).fetchall())
+
+def cached_dataframe(query, params=()):
+    # A shallow copy keeps callers from adding or dropping columns on the shared frame
+    return query_cache.read(query, params, load_dataframe).copy(deep=False)
+
+def cached_rows(query, params=()):
+    return query_cache.read(query, params, load_rows)
@@ -0,0 +1,246 @@
+import datetime
+import json
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd # type: ignore
+
+from database.connection import connection
+from database.query_cache import current_revision
+from instrumentation.recorder import recorder
+
+DEFAULT_LIMIT = 10
+# Score weights; each signal is scaled to 0..1 first
+AFFINITY_WEIGHT = 0.5
+SIMILARITY_WEIGHT = 0.3
+RECENCY_WEIGHT = 0.2
+# Reviews a category needs before its affinity counts fully; fewer pull it towards neutral
+AFFINITY_PRIOR = 3.0
+# Reads rated at least this (the mean of interest and quality) make up the taste profile
+TOP_RATING = 4.0
+RECENCY_HALF_LIFE_DAYS = 30.0
+# A sync that would patch more than this share of the library rebuilds it instead
+REBUILD_FRACTION = 0.2
+INITIAL_CAPACITY = 1024
+# Days since 1970-01-01, which is what datetime64[D] counts
+UNIX_DAY = "CAST(julianday(a.date_added) - 2440587.5 AS INTEGER)"
+
+class Recommendation:
+    def __init__(self, article_id, score, affinity, similarity, recency):
+        self.article_id = article_id
+        self.score = score
+        self.affinity = affinity
+        self.similarity = similarity
+        self.recency = recency
+
+class ReadingMatrix:
+    # Article x category incidence matrix from ArticleCategories, with each article's read state, logged
+    # day and mean rating alongside. Rows are kept in arrays with spare capacity, so new articles are
+    # appended and deleted ones are zeroed and marked dead; ArticleChanges says which rows to re-read.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.revision = None
+        self.size = 0
+        self.dead = 0
+        self.rows = {}
+        self.columns = {}
+        self.article_ids = np.zeros(0, np.int64)
+        self.incidence = np.zeros((0, 0), np.float32)
+        self.live = np.zeros(0, bool)
+        self.was_read = np.zeros(0, bool)
+        self.day = np.zeros(0, np.int64)
+        self.rating = np.zeros(0, np.float32)
+        self.scores = None
+
+    def reserve(self, rows, columns):
+        # Grows the arrays by doubling so appends stay amortised O(1)
+        capacity, width = self.incidence.shape
+        if rows <= capacity and columns <= width:
+            return
+        capacity = max(capacity, INITIAL_CAPACITY)
+        while capacity < rows:
+            capacity *= 2
+        width = max(width, columns)
+        incidence = np.zeros((capacity, width), np.float32)
+        incidence[:self.size, :self.incidence.shape[1]] = self.incidence[:self.size]
+        self.incidence = incidence
+        for name in ("article_ids", "live", "was_read", "day", "rating"):
+            values = getattr(self, name)
+            grown = np.zeros(capacity, values.dtype)
+            grown[:self.size] = values[:self.size]
+            setattr(self, name, grown)
+
+    def sync(self, sqliteConnection):
+        # Brings the matrix up to the database's revision. Returns "hit", "patched" or "rebuilt".
+        revision = current_revision(sqliteConnection)
+        if revision == self.revision:
+            return "hit"
+        changed = None
+        if self.revision is not None:
+            changed = [article_id for (article_id,) in sqliteConnection.execute("""
+                SELECT article_id
+                FROM ArticleChanges
+                WHERE revision >= ?
+            """, (self.revision,))]
+        # Changes stamped with the revision read here are re-read next time too, which is harmless
+        if changed is None or len(changed) > REBUILD_FRACTION * max(self.size - self.dead, 1) or self.dead > self.size // 2:
+            self.reset()
+            self.load(sqliteConnection, None)
+            status = "rebuilt"
+        else:
+            self.load(sqliteConnection, changed)
+            status = "patched"
+        self.revision = revision
+        self.scores = None
+        return status
+
+    def load(self, sqliteConnection, article_ids):
+        # Reads every article when article_ids is None, otherwise re-reads just those
+        where = ""
+        params = ()
+        if article_ids is not None:
+            if not article_ids:
+                return
+            where = "WHERE a.article_id IN (SELECT value FROM json_each(?))"
+            params = (json.dumps(article_ids),)
+        articles = sqliteConnection.execute(f"""
+            SELECT a.article_id, a.was_read, {UNIX_DAY}, (r.interest_rating + r.quality_rating) / 2.0
+            FROM Articles a
+            LEFT JOIN Reviews r ON r.article_id = a.article_id
+            {where}
+        """, params).fetchall()
+        links = sqliteConnection.execute(f"""
+            SELECT ac.article_id, ac.category_id
+            FROM ArticleCategories ac
+            {where.replace("a.article_id", "ac.article_id")}
+        """, params).fetchall()
+
+        # Articles asked for but no longer stored were deleted
+        if article_ids is not None:
+            found = {row[0] for row in articles}
+            gone = [self.rows.pop(article_id) for article_id in article_ids if article_id not in found and article_id in self.rows]
+            if gone:
+                self.live[gone] = False
+                self.incidence[gone] = 0
+                self.dead += len(gone)
+        if not articles:
+            return
+
+        ids = np.array([row[0] for row in articles], np.int64)
+        new_ids = [article_id for article_id in ids.tolist() if article_id not in self.rows]
+        for category_id in sorted({category_id for _, category_id in links} - self.columns.keys()):
+            self.columns[category_id] = len(self.columns)
+        self.reserve(self.size + len(new_ids), len(self.columns))
+        for article_id in new_ids:
+            self.rows[article_id] = self.size
+            self.size += 1
+        positions = np.array([self.rows[article_id] for article_id in ids.tolist()], np.int64)
+
+        self.article_ids[positions] = ids
+        self.live[positions] = True
+        self.was_read[positions] = np.array([bool(row[1]) for row in articles])
+        today = (datetime.date.today() - datetime.date(1970, 1, 1)).days
+        self.day[positions] = np.array([today if row[2] is None else row[2] for row in articles], np.int64)
+        self.rating[positions] = np.array([np.nan if row[3] is None else row[3] for row in articles], np.float32)
+        self.incidence[positions] = 0
+        if links:
+            link_rows = np.array([self.rows[article_id] for article_id, _ in links], np.int64)
+            link_columns = np.array([self.columns[category_id] for _, category_id in links], np.int64)
+            self.incidence[link_rows, link_columns] = 1
+
+    def score(self, today):
+        # Scores every unread article; returns (rows, score, affinity, similarity, recency) as arrays
+        if self.scores is not None and self.scores[0] == today:
+            return self.scores[1]
+        size, width = self.size, len(self.columns)
+        incidence = self.incidence[:size, :width]
+        live = self.live[:size]
+        read = live & self.was_read[:size]
+        rating = self.rating[:size]
+        rated = read & ~np.isnan(rating)
+
+        # Category affinity: each category's mean centred rating (-1..1), shrunk towards 0 while it has few reviews
+        centred = np.where(rated, (np.nan_to_num(rating) - 3) / 2, 0).astype(np.float32)
+        reviews = incidence.T @ rated.astype(np.float32)
+        affinity = (incidence.T @ centred) / (reviews + AFFINITY_PRIOR)
+        # Taste profile: the rating-weighted category mix of the best reads
+        top = rated & (np.nan_to_num(rating) >= TOP_RATING)
+        profile = incidence.T @ np.where(top, rating, 0).astype(np.float32)
+        profile_norm = np.linalg.norm(profile)
+
+        rows = np.flatnonzero(live & ~self.was_read[:size])
+        unread = incidence[rows]
+        categories = np.maximum(unread.sum(axis=1), 1)
+        affinity_score = (unread @ affinity) / categories
+        if profile_norm:
+            # Rows are 0/1, so a row's norm is the square root of its category count
+            similarity = (unread @ profile) / (np.sqrt(categories) * profile_norm)
+        else:
+            similarity = np.zeros(len(rows), np.float32)
+        age = np.maximum(today - self.day[rows], 0)
+        recency = np.power(0.5, age / RECENCY_HALF_LIFE_DAYS)
+        score = AFFINITY_WEIGHT * (affinity_score + 1) / 2 + SIMILARITY_WEIGHT * similarity + RECENCY_WEIGHT * recency
+        self.scores = (today, (rows, score, affinity_score, similarity, recency))
+        return self.scores[1]
+
+    def recommend(self, limit=DEFAULT_LIMIT, today=None):
+        today = today if today is not None else (datetime.date.today() - datetime.date(1970, 1, 1)).days
+        rows, score, affinity, similarity, recency = self.score(today)
+        if not len(rows):
+            return []
+        limit = min(int(limit), len(rows))
+        # Only the top few are sorted; ties go to the newer article
+        best = np.argpartition(-score, limit - 1)[:limit]
+        best = best[np.lexsort((-self.article_ids[rows[best]], -score[best]))]
+        return [
+            Recommendation(int(self.article_ids[rows[i]]), float(score[i]), float(affinity[i]), float(similarity[i]), float(recency[i]))
+            for i in best
+        ]
+
+# Module-level instance so every session in the server process shares one matrix
+reading_matrix = ReadingMatrix()
+
+def read_next(limit: int = DEFAULT_LIMIT) -> pd.DataFrame:
+    # Top unread articles with their titles and links, best first
+    start = time.perf_counter()
+    try:
+        with connection() as sqliteConnection:
+            # The revision and the rows it re-reads come from one transaction so they always match
+            sqliteConnection.execute("BEGIN;")
+            try:
+                with reading_matrix.lock:
+                    status = reading_matrix.sync(sqliteConnection)
+                    recommendations = reading_matrix.recommend(limit)
+            finally:
+                sqliteConnection.execute("COMMIT;")
+            rows = sqliteConnection.execute("""
+                SELECT article_id, title, link
+                FROM Articles
+                WHERE article_id IN (SELECT value FROM json_each(?))
+            """, (json.dumps([recommendation.article_id for recommendation in recommendations]),)).fetchall()
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        recorder.record("query", "read_next", time.perf_counter() - start, 0, "failed")
+        return pd.DataFrame()
+
+    articles = {article_id: (title, link) for article_id, title, link in rows}
+    frame = pd.DataFrame([
+        {
+            "article_id": recommendation.article_id,
+            "Title": articles[recommendation.article_id][0],
+            "Link": articles[recommendation.article_id][1],
+            "Score": recommendation.score,
+            "Category Affinity": recommendation.affinity,
+            "Similarity": recommendation.similarity,
+            "Recency": recommendation.recency,
+        }
+        for recommendation in recommendations if recommendation.article_id in articles
+    ])
+    recorder.record("query", "read_next", time.perf_counter() - start, len(frame), status)
+    return frame
@@ -0,0 +1,323 @@
+import json
+import sqlite3
+import time
+from typing import Iterable, Optional
+
+import pandas as pd # type: ignore
+
+from database.connection import connection, transaction
+from database.query_cache import cached_dataframe, cached_rows
+from instrumentation.recorder import recorder
+from wiki.urls import DEFAULT_LANG, article_url, canonical_key, canonical_title
+
+class Category:
+  def __init__(self, category_id, category_name):
+    self.category_id = category_id
+    self.category_name = category_name
+
+def grab_categories() -> list[Category]:
+    try:
+        rows = cached_rows("""
+            SELECT category_id, category_name
+            FROM Categories
+            ORDER BY category_name
+        """)
+        return [Category(category_id, category_name) for category_id, category_name in rows]
+
+    except sqlite3.Error as error:
+        print('Error grabbing categories -', error)
+        return []
+
+def category_article_counts() -> pd.DataFrame:
+    return cached_dataframe("""
+        SELECT category_id, COUNT(article_id) AS num_articles
+        FROM ArticleCategories
+        GROUP BY category_id
+    """)
+
+def add_category(category_name: str) -> bool:
+    try:
+        with transaction() as sqliteConnection:
+            sqliteConnection.execute("""
+                INSERT INTO Categories (category_name)
+                VALUES (?);
+            """, (category_name,))
+        return True
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return False
+
+def delete_category(category_id: int) -> bool:
+    try:
+        with transaction() as sqliteConnection:
+            sqliteConnection.execute("""
+                DELETE FROM Categories
+                WHERE category_id = ?
+            """, (int(category_id),))
+            # Articles left without any category are removed with it
+            sqliteConnection.execute("""
+                DELETE FROM Articles
+                WHERE NOT EXISTS (
+                    SELECT 1
+                    FROM ArticleCategories ac
+                    WHERE Articles.article_id = ac.article_id
+                );
+            """)
+        return True
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return False
+
+def rename_category(category_id: int, new_name: str) -> bool:
+    try:
+        with transaction() as sqliteConnection:
+            sqliteConnection.execute("""
+                UPDATE Categories
+                SET category_name = ?
+                WHERE category_id = ?
+            """, (new_name, int(category_id)))
+        return True
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return False
+
+class ArticleWrite:
+    def __init__(self, article_id, categories_added, categories_removed, elapsed):
+        self.article_id = article_id
+        self.categories_added = categories_added
+        self.categories_removed = categories_removed
+        self.elapsed = elapsed
+
+def sync_categories(sqliteConnection, article_id: int, category_ids: Iterable[int]):
+    # Set-based diff: only links that changed are deleted or inserted. Returns (added, removed).
+    wanted = json.dumps(sorted({int(category_id) for category_id in category_ids}))
+    removed = sqliteConnection.execute("""
+        DELETE FROM ArticleCategories
+        WHERE article_id = ?
+            AND category_id NOT IN (SELECT value FROM json_each(?))
+    """, (article_id, wanted)).rowcount
+    added = sqliteConnection.execute("""
+        INSERT OR IGNORE INTO ArticleCategories(article_id, category_id)
+        SELECT ?, value FROM json_each(?)
+    """, (article_id, wanted)).rowcount
+    return added, removed
+
+def followed_redirect(sqliteConnection, lang: str, title: str) -> str:
+    # A page move recorded by tools.refresh sends an old link to the article already logged under the new title
+    row = sqliteConnection.execute("""
+        SELECT to_title
+        FROM PageRedirects
+        WHERE lang = ? AND from_title = ?
+    """, (lang, title)).fetchone()
+    return row[0] if row else title
+
+def page_key(url: str) -> Optional[tuple[str, str]]:
+    # (lang, title) of the page a link points at, or None when it isn't a Wikipedia article
+    key = canonical_key(url)
+    if key is None:
+        return None
+    lang, title = key
+    try:
+        with connection() as sqliteConnection:
+            return lang, followed_redirect(sqliteConnection, lang, title)
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return key
+
+def add_article(title: str, link: str, date_added, was_read: bool, category_ids: Iterable[int],
+                interest_rating: Optional[int], quality_rating: Optional[int]) -> Optional[ArticleWrite]:
+    start = time.perf_counter()
+    # Every way of linking to a page is stored as the same (lang, title) key and canonical link
+    lang, title = canonical_key(link) or (DEFAULT_LANG, canonical_title(title))
+    try:
+        # Four statements in one IMMEDIATE transaction: the lock is taken once and held only for these
+        with transaction(immediate=True) as sqliteConnection:
+            title = followed_redirect(sqliteConnection, lang, title)
+            article_id = sqliteConnection.execute("""
+                INSERT INTO Articles (title, link, date_added, was_read)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(lang, title) DO UPDATE SET
+                    date_added = excluded.date_added,
+                    was_read = excluded.was_read
+                RETURNING article_id;
+            """, (title, article_url(title, lang), date_added, was_read)).fetchone()[0]
+
+            added, removed = sync_categories(sqliteConnection, article_id, category_ids)
+
+            sqliteConnection.execute("""
+                INSERT INTO Reviews(article_id, interest_rating, quality_rating)
+                VALUES(?, ?, ?)
+                ON CONFLICT(article_id) DO UPDATE SET
+                    interest_rating = excluded.interest_rating,
+                    quality_rating = excluded.quality_rating
+            """, (article_id, interest_rating, quality_rating))
+        elapsed = time.perf_counter() - start
+        recorder.record("write", "add_article", elapsed, added + removed, "ok")
+        return ArticleWrite(article_id, added, removed, elapsed)
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        recorder.record("write", "add_article", time.perf_counter() - start, 0, "failed")
+        return None
+
+def update_review(article_id: int, new_interest: int, new_quality: int) -> bool:
+    try:
+        with transaction() as sqliteConnection:
+            sqliteConnection.execute("""
+                UPDATE Reviews
+                SET interest_rating = ?, quality_rating = ?
+                WHERE article_id = ?
+            """, (new_interest, new_quality, int(article_id)))
+        return True
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return False
+
+def switch_read(was_read: bool, article_id: int) -> bool:
+    try:
+        with transaction() as sqliteConnection:
+            sqliteConnection.execute("""
+                UPDATE Articles
+                SET was_read = ?
+                WHERE article_id = ?
+            """, (int(was_read), int(article_id)))
+        return True
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return False
+
+def delete_article(article_id: int) -> bool:
+    try:
+        with transaction() as sqliteConnection:
+            sqliteConnection.execute("""
+                DELETE FROM Articles
+                WHERE article_id = ?
+            """, (int(article_id),))
+        return True
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return False
+
+def update_categories(article_id: int, category_ids: Iterable[int]) -> bool:
+    try:
+        with transaction(immediate=True) as sqliteConnection:
+            sync_categories(sqliteConnection, int(article_id), category_ids)
+        return True
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return False
+
+def update_date(article_id: int, new_date) -> bool:
+    try:
+        with transaction() as sqliteConnection:
+            sqliteConnection.execute("""
+                UPDATE Articles
+                SET date_added = ?
+                WHERE article_id = ?
+            """, (new_date, int(article_id)))
+        return True
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return False
+
+# Bulk edits are (action, value) pairs; each runs as one executemany over the selected articles
+BULK_EDITS = {
+    "set_read": """
+        UPDATE Articles
+        SET was_read = ?
+        WHERE article_id = ?
+    """,
+    "add_category": """
+        INSERT OR IGNORE INTO ArticleCategories(category_id, article_id)
+        VALUES(?, ?)
+    """,
+    # An article never loses its last category, matching the single-article editor
+    "remove_category": """
+        DELETE FROM ArticleCategories
+        WHERE category_id = ?1 AND article_id = ?2
+            AND EXISTS (
+                SELECT 1 FROM ArticleCategories other
+                WHERE other.article_id = ?2 AND other.category_id <> ?1
+            )
+    """,
+    "set_date": """
+        UPDATE Articles
+        SET date_added = ?
+        WHERE article_id = ?
+    """,
+}
+
+def apply_bulk_edits(article_ids: Iterable[int], edits) -> bool:
+    article_ids = [int(article_id) for article_id in article_ids]
+    try:
+        # Every queued edit lands in one transaction, so a failure leaves nothing half applied
+        with transaction() as sqliteConnection:
+            for action, value in edits:
+                if action == "delete":
+                    sqliteConnection.executemany("DELETE FROM Articles WHERE article_id = ?", [(article_id,) for article_id in article_ids])
+                else:
+                    sqliteConnection.executemany(BULK_EDITS[action], [(value, article_id) for article_id in article_ids])
+        return True
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return False
+
+def grab_table(table_name: str) -> pd.DataFrame:
+    # Table names can't be bound as parameters, so only known tables are accepted
+    if table_name not in ("Articles", "Categories", "ArticleCategories", "Reviews"):
+        raise ValueError(f"Unknown table {table_name}")
+    return cached_dataframe(f"SELECT * FROM {table_name}")
+
+def grab_combined_articles() -> pd.DataFrame:
+    return cached_dataframe("""
+        SELECT 
+            a.article_id,
+            a.title, 
+            GROUP_CONCAT(c.category_name, ', ') AS categories,
+            a.date_added,
+            CASE
+                WHEN a.was_read = 0 THEN 'False'
+                ELSE 'True'
+            END as was_read,
+            r.interest_rating,
+            r.quality_rating,
+            a.link
+        FROM Articles a
+        INNER JOIN ArticleCategories ac ON a.article_id = ac.article_id
+        INNER JOIN Categories c ON ac.category_id = c.category_id
+        INNER JOIN Reviews r ON a.article_id = r.article_id
+        GROUP BY a.article_id, a.title, a.was_read, a.date_added, r.interest_rating, r.quality_rating,  a.link
+    """)
+
+def grab_top_categories(limit: int = 10) -> pd.DataFrame:
+    return cached_dataframe("""
+        SELECT
+            c.category_name AS "Category Name",
+            COALESCE(cc.num_articles, 0) AS "Number of Categories"
+        FROM Categories c
+        LEFT JOIN CategoryCounts cc ON cc.category_id = c.category_id
+        ORDER BY "Number of Categories" DESC, "Category Name" ASC
+        LIMIT ?
+    """, (int(limit),))
+
+def grab_read_state_counts() -> dict[bool, int]:
+    try:
+        rows = cached_rows("SELECT was_read, num_articles FROM ReadStateCounts")
+        counts = {False: 0, True: 0}
+        for was_read, num_articles in rows:
+            counts[bool(was_read)] += num_articles
+        return counts
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return {False: 0, True: 0}
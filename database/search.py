@@ -0,0 +1,70 @@
+import re
+import sqlite3
+
+import pandas as pd # type: ignore
+
+from database.query_cache import cached_dataframe, cached_rows
+
+DEFAULT_PAGE_SIZE = 25
+# Title matches count ten times as much as summary matches
+TITLE_WEIGHT = 10.0
+SUMMARY_WEIGHT = 1.0
+SNIPPET_TOKENS = 24
+# bm25 has to score every match before sorting, so queries matching more rows than this
+# are listed newest first instead, which FTS5 can stop early on
+BROAD_MATCH_LIMIT = 5000
+
+def match_expression(text):
+    # Quote every word so user input can never be parsed as FTS5 syntax; the last word is a prefix
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    terms = ['"' + word.replace('"', '""') + '"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+def search_articles(text, page=0, page_size=DEFAULT_PAGE_SIZE):
+    expression = match_expression(text)
+    if expression is None:
+        return pd.DataFrame(), 0, True
+
+    try:
+        total = cached_rows("""
+            SELECT COUNT(*)
+            FROM ArticleSearch
+            WHERE ArticleSearch MATCH ?
+        """, (expression,))[0][0]
+        ranked = total <= BROAD_MATCH_LIMIT
+        order = "score" if ranked else "ArticleSearch.rowid DESC"
+
+        results = cached_dataframe(f"""
+            SELECT
+                a.article_id,
+                a.title,
+                (
+                    SELECT GROUP_CONCAT(c.category_name, '|')
+                    FROM ArticleCategories ac
+                    INNER JOIN Categories c ON ac.category_id = c.category_id
+                    WHERE ac.article_id = a.article_id
+                ) AS categories,
+                a.date_added,
+                a.was_read,
+                r.interest_rating,
+                r.quality_rating,
+                a.link,
+                a.lang,
+                highlight(ArticleSearch, 0, '**', '**') AS title_match,
+                snippet(ArticleSearch, 1, '**', '**', '…', {SNIPPET_TOKENS}) AS summary_match,
+                bm25(ArticleSearch, {TITLE_WEIGHT}, {SUMMARY_WEIGHT}) AS score
+            FROM ArticleSearch
+            INNER JOIN Articles a ON a.article_id = ArticleSearch.rowid
+            LEFT JOIN Reviews r ON r.article_id = a.article_id
+            WHERE ArticleSearch MATCH ?
+            ORDER BY {order}
+            LIMIT ? OFFSET ?
+        """, (expression, int(page_size), int(page) * int(page_size)))
+        return results, total, ranked
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return pd.DataFrame(), 0, True
@@ -0,0 +1,160 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from database import job_queue
+from database.connection import connection, transaction
+from instrumentation.recorder import recorder
+
+MAX_ENTRIES = 512
+TTL_SECONDS = 7 * 24 * 60 * 60
+
+class Summary:
+    def __init__(self, title, lang, summary, pageid, fetched_at, revid=None, touched=None, synced_at=None):
+        self.title = title
+        self.lang = lang
+        self.summary = summary
+        self.pageid = pageid
+        self.fetched_at = fetched_at
+        self.revid = revid
+        self.touched = touched
+        # A refresh that finds the page unchanged upstream counts as a fetch
+        self.synced_at = synced_at or fetched_at
+
+    def is_stale(self, now=None):
+        return ((now or time.time()) - self.synced_at) > TTL_SECONDS
+
+SUMMARY_UPSERT = """
+    INSERT INTO ArticleSummaries (title, lang, summary, pageid, fetched_at, revid, touched, synced_at)
+    VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?5)
+    ON CONFLICT(title, lang) DO UPDATE SET
+        summary = excluded.summary,
+        pageid = excluded.pageid,
+        fetched_at = excluded.fetched_at,
+        revid = excluded.revid,
+        touched = excluded.touched,
+        synced_at = excluded.synced_at;
+"""
+
+class SummaryCache:
+    # Two layers: a bounded in-process LRU in front of the ArticleSummaries table.
+    # Lookups never go upstream: missing and stale entries are queued for tools.fetch_worker,
+    # and a stale entry is served until the worker replaces it.
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def _remember(self, entry):
+        with self.lock:
+            key = (entry.title, entry.lang)
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def _from_memory(self, title, lang):
+        with self.lock:
+            entry = self.entries.get((title, lang))
+            if entry is None:
+                return None
+            if entry.is_stale():
+                del self.entries[(title, lang)]
+                return None
+            self.entries.move_to_end((title, lang))
+            self.memory_hits += 1
+            return entry
+
+    def _from_db(self, title, lang):
+        try:
+            with connection() as sqliteConnection:
+                row = sqliteConnection.execute("""
+                    SELECT title, lang, summary, pageid, fetched_at, revid, touched, synced_at
+                    FROM ArticleSummaries
+                    WHERE title = ? AND lang = ?
+                """, (title, lang)).fetchone()
+            return Summary(*row) if row else None
+
+        except sqlite3.Error as error:
+            print('Error reading summary cache -', error)
+            return None
+
+    def put(self, title, lang, summary, pageid=None, revid=None, touched=None):
+        entry = Summary(title, lang, summary, pageid, time.time(), revid, touched)
+        try:
+            with transaction() as sqliteConnection:
+                sqliteConnection.execute(SUMMARY_UPSERT, (entry.title, entry.lang, entry.summary, entry.pageid,
+                                                          entry.fetched_at, entry.revid, entry.touched))
+
+        except sqlite3.Error as error:
+            print('Error writing summary cache -', error)
+
+        self._remember(entry)
+        return entry
+
+    def put_many(self, pages):
+        # Stores fetched pages in one transaction; returns False if none could be written
+        fetched_at = time.time()
+        entries = [Summary(page.title, page.lang, page.summary, page.pageid, fetched_at, page.revid, page.touched)
+                   for page in pages]
+        try:
+            with transaction() as sqliteConnection:
+                sqliteConnection.executemany(SUMMARY_UPSERT, [
+                    (entry.title, entry.lang, entry.summary, entry.pageid, entry.fetched_at, entry.revid, entry.touched)
+                    for entry in entries
+                ])
+
+        except sqlite3.Error as error:
+            print('Error writing summary cache -', error)
+            return False
+
+        for entry in entries:
+            self._remember(entry)
+        return True
+
+    def peek(self, title, lang):
+        # Returns whatever is cached, however old, without going upstream
+        return self._from_memory(title, lang) or self._from_db(title, lang)
+
+    def get(self, title, lang):
+        start = time.perf_counter()
+        entry, status = self._get(title, lang)
+        recorder.record("summary", f"{lang}:{title}", time.perf_counter() - start, status=status)
+        return entry
+
+    def _get(self, title, lang):
+        # Returns (entry, where it came from) so lookups can be traced by cache layer
+        entry = self._from_memory(title, lang)
+        if entry is not None:
+            return entry, "memory"
+
+        stored = self._from_db(title, lang)
+        if stored is not None and not stored.is_stale():
+            with self.lock:
+                self.db_hits += 1
+            self._remember(stored)
+            return stored, "db"
+
+        with self.lock:
+            self.misses += 1
+        if stored is not None:
+            job_queue.enqueue("refetch", title, lang, job_queue.PRIORITY_REFRESH)
+            return stored, "stale"
+        job_queue.enqueue("fetch", title, lang, job_queue.PRIORITY_INTERACTIVE)
+        return None, "queued"
+
+    def stats(self):
+        with self.lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "entries": len(self.entries),
+            }
+
+# Module-level instance so the LRU layer is shared by every session in the server process
+summary_cache = SummaryCache()
@@ -0,0 +1,104 @@
+import sqlite3
+
+import pandas as pd # type: ignore
+
+from database.query_cache import cached_dataframe, cached_rows
+
+DEFAULT_PAGE_SIZE = 100
+
+# Each view is (query, columns, tie-breaker columns). The tie-breaker makes every sort a total order,
+# so rows never repeat or go missing between LIMIT/OFFSET pages.
+TABLE_VIEWS = {
+    "Combined Data": ("""
+        SELECT
+            a.article_id,
+            a.title,
+            (
+                SELECT GROUP_CONCAT(c.category_name, ', ')
+                FROM ArticleCategories ac
+                INNER JOIN Categories c ON ac.category_id = c.category_id
+                WHERE ac.article_id = a.article_id
+            ) AS categories,
+            a.date_added,
+            CASE
+                WHEN a.was_read = 0 THEN 'False'
+                ELSE 'True'
+            END as was_read,
+            r.interest_rating,
+            r.quality_rating,
+            a.link
+        FROM Articles a
+        INNER JOIN Reviews r ON a.article_id = r.article_id
+        WHERE EXISTS (SELECT 1 FROM ArticleCategories ac WHERE ac.article_id = a.article_id)
+    """, ["article_id", "title", "categories", "date_added", "was_read", "interest_rating", "quality_rating", "link"],
+        ["article_id"]),
+    "Articles": ("SELECT * FROM Articles", ["article_id", "title", "link", "date_added", "was_read", "updated_at", "lang"], ["article_id"]),
+    "Categories": ("SELECT * FROM Categories", ["category_id", "category_name", "updated_at"], ["category_id"]),
+    "ArticleCategories": ("SELECT * FROM ArticleCategories", ["article_id", "category_id", "updated_at"], ["article_id", "category_id"]),
+    "Reviews": ("SELECT * FROM Reviews", ["review_id", "article_id", "interest_rating", "quality_rating", "updated_at"], ["review_id"]),
+}
+
+def like_pattern(text):
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+class TableQuery:
+    def __init__(self, view, sort_column=None, descending=False, filter_column=None, filter_text=""):
+        if view not in TABLE_VIEWS:
+            raise ValueError(f"Unknown table {view}")
+        self.view = view
+        self.sort_column = sort_column
+        self.descending = descending
+        self.filter_column = filter_column
+        self.filter_text = filter_text
+
+    @property
+    def columns(self):
+        return TABLE_VIEWS[self.view][1]
+
+    def filters(self):
+        # Column names can't be bound as parameters, so only the view's own columns are accepted
+        if not self.filter_text or self.filter_column not in self.columns:
+            return "", []
+        return f"""WHERE CAST("{self.filter_column}" AS TEXT) LIKE ? ESCAPE '\\'""", [like_pattern(self.filter_text)]
+
+    def page_query(self, page=0, page_size=DEFAULT_PAGE_SIZE):
+        base_query, columns, tie_breakers = TABLE_VIEWS[self.view]
+        where, params = self.filters()
+        direction = "DESC" if self.descending else "ASC"
+        order = [f'"{column}" {direction}' for column in tie_breakers]
+        if self.sort_column in columns and self.sort_column not in tie_breakers:
+            order.insert(0, f'"{self.sort_column}" {direction}')
+
+        query = f"""
+            SELECT *
+            FROM ({base_query})
+            {where}
+            ORDER BY {", ".join(order)}
+            LIMIT ? OFFSET ?
+        """
+        params.extend([int(page_size), int(page) * int(page_size)])
+        return query, params
+
+    def count_query(self):
+        base_query = TABLE_VIEWS[self.view][0]
+        where, params = self.filters()
+        return f"SELECT COUNT(*) FROM ({base_query}) {where}", params
+
+def fetch_table_page(table_query: TableQuery, page=0, page_size=DEFAULT_PAGE_SIZE):
+    query, params = table_query.page_query(page, page_size)
+    try:
+        return cached_dataframe(query, params)
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return pd.DataFrame(columns=table_query.columns)
+
+def count_table(table_query: TableQuery):
+    query, params = table_query.count_query()
+    try:
+        return cached_rows(query, params)[0][0]
+
+    except sqlite3.Error as error:
+        print('Error occurred -', error)
+        return 0
@@ -0,0 +1,87 @@
+import streamlit as st # type: ignore
+from streamlit.runtime.scriptrunner import get_script_run_ctx # type: ignore
+
+from instrumentation.recorder import recorder
+
+TOP_STATEMENTS = 10
+
+def session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "local"
+
+def start_page(page):
+    # Call right after st.set_page_config; timing starts here and ends at finish_page()
+    recorder.discard()
+    # Widget state is dropped when switching pages, so the setting lives in its own session key
+    enabled = st.sidebar.toggle("Debug Instrumentation", value=st.session_state.get("instrumentation_enabled", False))
+    st.session_state.instrumentation_enabled = enabled
+    if enabled:
+        recorder.start(session_id(), page)
+
+def in_fragment_run():
+    ctx = get_script_run_ctx()
+    return bool(ctx and ctx.fragment_ids_this_run)
+
+def start_fragment(name):
+    # Fragment reruns skip start_page, so they open their own scope; during a full run the page's scope is used
+    if in_fragment_run() and st.session_state.get("instrumentation_enabled", False):
+        recorder.start(session_id(), name)
+
+def finish_fragment():
+    if in_fragment_run():
+        recorder.finish()
+
+def finish_page():
+    if not recorder.active():
+        return
+    recorder.finish()
+    render_panel()
+
+def rerun():
+    finish_page()
+    st.rerun()
+
+def rerun_fragment():
+    # Streamlit only allows a fragment-scoped rerun during a fragment run, so a fragment
+    # drawn by a full run falls back to rerunning the page
+    if in_fragment_run():
+        finish_fragment()
+        st.rerun(scope="fragment")
+    rerun()
+
+def stop():
+    finish_page()
+    st.stop()
+
+def render_panel():
+    session = session_id()
+    page = recorder.events(session)[-1]["page"]
+
+    with st.sidebar:
+        st.markdown("**Instrumentation**")
+        scope = st.radio("Scope", ["This page", "All pages"], horizontal=True, key="instrumentation_scope")
+        events = recorder.events(session, page if scope == "This page" else None)
+
+        reruns = recorder.summary(events, "rerun", by="page")
+        st.caption(f"Last rerun: {events[-1]['duration_ms']:.1f} ms")
+        if reruns:
+            st.markdown("Reruns")
+            st.dataframe(reruns, hide_index=True, use_container_width=True)
+
+        statements = recorder.summary(events, "sql", by="name")
+        if statements:
+            st.markdown(f"SQL ({sum(row['count'] for row in statements)} statements)")
+            st.dataframe(statements[:TOP_STATEMENTS], hide_index=True, use_container_width=True)
+
+        for kind, label in (("query", "Query Cache"), ("summary", "Summary Lookups"), ("fetch", "Wikipedia Fetches"), ("write", "Writes")):
+            rows = recorder.summary(events, kind, by="status")
+            if rows:
+                st.markdown(label)
+                st.dataframe(rows, hide_index=True, use_container_width=True)
+
+        export, clear = st.columns(2)
+        export.download_button("Export JSONL", recorder.jsonl(session), file_name="instrumentation.jsonl",
+                               mime="application/x-ndjson", use_container_width=True)
+        if clear.button("Clear", use_container_width=True, key="instrumentation_clear"):
+            recorder.clear(session)
+            st.rerun()
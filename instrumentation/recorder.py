@@ -0,0 +1,118 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+
+# INSTRUMENTATION_LOG=<path> appends every recorded run to a JSONL file for offline analysis
+LOG_ENV = "INSTRUMENTATION_LOG"
+MAX_EVENTS_PER_SESSION = 5000
+PERCENTILES = (50, 95, 99)
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-pct * len(sorted_values) // 100))
+    return sorted_values[int(rank) - 1]
+
+def statement_name(sql):
+    # Collapses whitespace and bound values so repeated statements group together
+    return re.sub(r"\s+", " ", sql).strip()[:120]
+
+class Recorder:
+    # Events are only recorded on threads that opened a scope with start(), which the debug
+    # sidebar does for sessions that switched it on. Everything else pays one attribute lookup.
+    def __init__(self, max_events=MAX_EVENTS_PER_SESSION, log_path=None):
+        self.max_events = max_events
+        self.log_path = log_path
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def start(self, session_id, page):
+        self.local.scope = (session_id, page)
+        self.local.run = []
+        self.local.started = time.perf_counter()
+
+    def discard(self):
+        # Drops a scope left open by a run that ended early, e.g. through st.rerun()
+        self.local.scope = None
+        self.local.run = []
+
+    def active(self):
+        return getattr(self.local, "scope", None) is not None
+
+    def record(self, kind, name, duration, rows=None, status=None):
+        scope = getattr(self.local, "scope", None)
+        if scope is None:
+            return None
+        session_id, page = scope
+        event = {
+            "ts": time.time(),
+            "session": session_id,
+            "page": page,
+            "kind": kind,
+            "name": name,
+            "duration_ms": round(duration * 1000, 3),
+            "rows": rows,
+            "status": status,
+        }
+        self.local.run.append(event)
+        with self.lock:
+            self.sessions.setdefault(session_id, deque(maxlen=self.max_events)).append(event)
+        return event
+
+    def finish(self):
+        # Records the rerun itself, then writes the whole run to the JSONL log
+        scope = getattr(self.local, "scope", None)
+        if scope is None:
+            return
+        self.record("rerun", scope[1], time.perf_counter() - self.local.started)
+        run = self.local.run
+        self.discard()
+        if self.log_path:
+            lines = "".join(json.dumps(event) + "\n" for event in run)
+            with self.lock:
+                with open(self.log_path, "a", encoding="utf-8") as log_file:
+                    log_file.write(lines)
+
+    def run_events(self):
+        # Events recorded so far in this thread's open scope
+        return list(getattr(self.local, "run", []))
+
+    def events(self, session_id, page=None):
+        with self.lock:
+            events = list(self.sessions.get(session_id, ()))
+        if page is not None:
+            events = [event for event in events if event["page"] == page]
+        return events
+
+    def clear(self, session_id):
+        with self.lock:
+            self.sessions.pop(session_id, None)
+
+    def summary(self, events, kind, by=None):
+        # Returns [{name, count, p50, p95, p99, total}] for one kind of event grouped on the
+        # event field `by` (or not at all), slowest total first
+        groups = {}
+        for event in events:
+            if event["kind"] == kind:
+                groups.setdefault(str(event[by]) if by else kind, []).append(event["duration_ms"])
+        rows = []
+        for name, durations in groups.items():
+            durations.sort()
+            row = {"name": name, "count": len(durations)}
+            for pct in PERCENTILES:
+                row[f"p{pct}_ms"] = percentile(durations, pct)
+            row["total_ms"] = round(sum(durations), 3)
+            rows.append(row)
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return rows
+
+    def jsonl(self, session_id):
+        return "".join(json.dumps(event) + "\n" for event in self.events(session_id))
+
+# Module-level instance shared by the connection pool, the fetchers and every page
+recorder = Recorder(log_path=os.environ.get(LOG_ENV))
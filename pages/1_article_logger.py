@@ -1,14 +1,19 @@
 import streamlit as st # type: ignore
-import sqlite3
 import sys
-import wikipedia # type: ignore
-import pandas as pd # type: ignore
 import datetime
+import time
 from streamlit_star_rating import st_star_rating # type: ignore
+from database import job_queue, repository
+from database.summary_cache import summary_cache
+from wiki.fetcher import FetchedPage
+from wiki.urls import article_url
+from instrumentation.panel import finish_page, rerun, rerun_fragment, start_page
 
 sys.stdout.reconfigure(encoding='utf-8')
 st.set_page_config(page_title="Wikipedia Logger", page_icon="✍️")
-DB_PATH = './database/articles.db'
+start_page("pages/1_article_logger.py")
+POLL_SECONDS = 1
+WORKER_HINT_SECONDS = 10
 
 class Article:
   def __init__(self, title, lang, data, link, date_read, interest_rating, quality_rating):
@@ -20,113 +25,65 @@ class Article:
     self.interest_rating = interest_rating
     self.quality_rating = quality_rating
 
-class Category:
-  def __init__(self, category_id, category_name):
-    self.category_id = category_id
-    self.category_name = category_name
+def grab_article(page_key):
+    pageLang, pageTitle = page_key
 
-def parse_title(url):
-    split_url = url.split('/wiki/')
-    return split_url[-1].split('#')[0].replace('_', ' ').replace('%27', '\'')
-
-def parse_lang(url):
-    lang = url.split('.wikipedia.org')[0].replace('https://', '')
-    if(lang == 'www' or lang == ''):
-        return 'en'
-    else:
-        return lang
-
-def grab_article(url):
-    pageLang = parse_lang(url)
-    pageTitle = parse_title(url)
-
-    wikipedia.set_lang(pageLang)
-    try:
-        page = wikipedia.WikipediaPage(title=pageTitle)
-        return Article(pageTitle, pageLang, page, url, datetime.date.today(), None, None)
-    except Exception as e:
+    # Only reads what is stored; a missing or stale summary is queued for the fetch worker
+    cached = summary_cache.get(pageTitle, pageLang)
+    if cached is None:
         return None
-
-def grab_categories():
-    categories = []
-    try:
-        sqliteConnection = sqlite3.connect(DB_PATH)
-
-        df = pd.read_sql_query("""
-            SELECT *
-            FROM Categories
-            ORDER BY category_name
-        """, sqliteConnection)
-        
-        for _,row in df.iterrows():
-            categories.append(Category(row.category_id, row.category_name))
-
-
-    except sqlite3.Error as error:
-        print('Error grabbing categories -', error)
-
-    finally:
-        if sqliteConnection:
-            sqliteConnection.close()
-            return categories
-
+    page = FetchedPage(cached.title, cached.lang, cached.summary, cached.pageid)
+    return Article(pageTitle, pageLang, page, article_url(pageTitle, pageLang), datetime.date.today(), None, None)
+
+@st.fragment(run_every=POLL_SECONDS)
+def await_summary(title, lang):
+    # Polls the queue without rerunning the page, which reruns once the summary is stored
+    if summary_cache.peek(title, lang) is not None:
+        rerun()
+    job = job_queue.latest_job(title, lang)
+    if job is not None and job.status == "failed":
+        st.error(f"Could not fetch \"{title}\". {job.error}", icon="⚠️")
+        if st.button("Try Again", icon="🔄", key="fetch_retry"):
+            job_queue.enqueue("fetch", title, lang, job_queue.PRIORITY_INTERACTIVE)
+            rerun_fragment()
+        return
+    st.info("Fetching summary...", icon="⏳")
+    if job is not None and job.status == "queued" and time.time() - job.created_at > WORKER_HINT_SECONDS:
+        st.caption("Still queued. Is the fetch worker running? Start it with `python -m tools.fetch_worker`.")
 
 def add_article(button, wasRead: bool, article: Article, categories):
-    try:
-        sqliteConnection = sqlite3.connect(DB_PATH)
-        cursor = sqliteConnection.cursor()
-
-        cursor.execute("""
-            INSERT INTO Articles (title, link, date_added, was_read)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(title) DO UPDATE SET
-                link = excluded.link,
-                date_added = excluded.date_added,
-                was_read = excluded.was_read;
-        """, (article.title, article.link, article.date_read, wasRead))
-
-        cursor.execute("SELECT article_id FROM Articles WHERE title = ?", (article.title,))
-        article_id = cursor.fetchone()[0]
-
-        cursor.execute("DELETE FROM ArticleCategories WHERE article_id = ?", (article_id,))
-
-        for category in categories:
-            cursor.execute("""
-                INSERT OR IGNORE INTO ArticleCategories(article_id, category_id)
-                VALUES(?, ?)
-            """, (article_id, category.category_id))
-
-        cursor.execute("DELETE FROM Reviews WHERE article_id = ?", (article_id,))
-        cursor.execute("""
-            INSERT OR IGNORE INTO Reviews(article_id, interest_rating, quality_rating)
-            VALUES(?, ?, ?)
-        """, (article_id, article.interest_rating, article.quality_rating))
-
-        print('Article added')
-        sqliteConnection.commit()
-        cursor.close()
-
-        if(wasRead):
-            st.success("Article added to read list.", icon="✅")
-        else:
-            st.success("Article added to want-to-read list.", icon="✅")
-
-    except sqlite3.Error as error:
-        print('Error occurred -', error)
-
-    finally:
-        if sqliteConnection:
-            sqliteConnection.close()
+    write = repository.add_article(
+        article.title,
+        article.link,
+        article.date_read,
+        wasRead,
+        [category.category_id for category in categories],
+        article.interest_rating,
+        article.quality_rating,
+    )
+    if write is None:
+        st.error(f"Could not add \"{article.title}\". Nothing was saved.", icon="⚠️")
+        return
+
+    print('Article added')
+
+    if(wasRead):
+        st.success("Article added to read list.", icon="✅")
+    else:
+        st.success("Article added to want-to-read list.", icon="✅")
+    st.caption(f"Saved in {write.elapsed * 1000:.1f} ms")
 
 st.title("Wikipedia Logger")
 
-categories = grab_categories()
+categories = repository.grab_categories()
 if not categories:
     with st.container(border=True):
         st.write("No categories exist. Create one in Category Setup to start logging articles!")
 else:
-    wiki_url = st.text_input("Url Goes Here")
-    page = grab_article(wiki_url)
+    wiki_url = st.text_input("Url Goes Here").strip()
+    # Mobile, percent-encoded and index.php links all resolve to the same page
+    page_key = repository.page_key(wiki_url) if wiki_url else None
+    page = grab_article(page_key) if page_key else None
 
     if isinstance(page, Article) and categories:
         interest_select, quality_select = st.columns(2)
@@ -156,6 +113,9 @@ else:
         st.markdown(f"**Title:**\n\n{page.title}")
         st.markdown(f"**Summary:**\n\n{page.data.summary}")
 
-    else:
-        if(page is not None):
-            st.write("Invalid URL.")
\ No newline at end of file
+    elif page_key:
+        await_summary(page_key[1], page_key[0])
+    elif wiki_url:
+        st.write("Invalid URL.")
+
+finish_page()
@@ -1,214 +1,255 @@
 import streamlit as st  # type: ignore
-import sqlite3
-import pandas as pd # type: ignore
-import wikipedia #type: ignore
 from streamlit_star_rating import st_star_rating # type: ignore
+from database import repository
+from database.summary_cache import summary_cache
+from database.search import search_articles
+from database.recommender import read_next
+from database.library_query import DEFAULT_PAGE_SIZE, LibraryQuery, fetch_library_page, count_library, explain_library_page, next_cursor
+from instrumentation.panel import finish_fragment, finish_page, rerun, rerun_fragment, start_fragment, start_page, stop
 
 st.set_page_config(page_title="Article Library", page_icon="📚", layout="wide")
-DB_PATH = './database/articles.db'
+start_page("pages/2_library.py")
 MAX_SUMMARY_LENGTH = 350
 WIDTH_SORT = [4, 2, 1]
 WIDTH_FILTER = [4, 1, 1]
+WIDTH_FILTER_MATCH = [5, 1]
 WIDTH_ARTICLE_BADGE = [4, 4, 1]
 WIDTH_EDIT_ENTRY = [4, 1]
 WIDTH_RATING_EDIT = [2, 2, 1]
+PAGE_SIZE_OPTIONS = [10, 25, 50, 100]
+READ_NEXT_LIMIT = 5
+WIDTH_BULK_CATEGORY = [3, 1, 1]
+
+def rating_value(rating):
+    # Bulk-imported articles have no review yet, and pandas reads those ratings as NaN
+    if rating is None or rating != rating:
+        return 0
+    return int(rating)
+
+def reset_pages():
+    st.session_state.library_cursors = [None]
+
+def reset_search():
+    st.session_state.search_page = 0
+
+def reset_selection():
+    st.session_state.library_selected = set()
+    st.session_state.library_edits = []
+    for key in [key for key in st.session_state if str(key).startswith("select_")]:
+        del st.session_state[key]
+
+def toggle_selected(article_id):
+    selected = st.session_state.library_selected
+    if article_id in selected:
+        selected.discard(article_id)
+    else:
+        selected.add(article_id)
+
+def queue_edit(action, value, label):
+    st.session_state.library_edits.append((action, value, label))
+
+def render_bulk_editor(df_page):
+    selected = st.session_state.library_selected
+    edits = st.session_state.library_edits
+
+    with st.container(border=True):
+        st.markdown(f"**Bulk Edit** ({len(selected)} selected)")
+        select_page, clear_selection = st.columns(2)
+        if select_page.button("Select Page", icon="☑️", use_container_width=True, key="bulk_select_page"):
+            for article_id in df_page.article_id:
+                selected.add(int(article_id))
+                st.session_state[f"select_{article_id}"] = True
+            rerun()
+        if clear_selection.button("Clear Selection", icon="✖️", use_container_width=True, key="bulk_clear"):
+            reset_selection()
+            rerun()
+
+        # Each button only queues the edit; nothing is written until Apply
+        mark_read, mark_unread, delete = st.columns(3)
+        if mark_read.button("Mark as Read", icon="✅", use_container_width=True, key="bulk_read"):
+            queue_edit("set_read", 1, "Mark as read")
+        if mark_unread.button("Mark as Want to Read", icon="⌛️", use_container_width=True, key="bulk_unread"):
+            queue_edit("set_read", 0, "Mark as want to read")
+        if delete.button("Delete", icon="🗑️", use_container_width=True, key="bulk_delete"):
+            queue_edit("delete", None, "Delete from library")
+
+        category_options, category_add, category_remove = st.columns(WIDTH_BULK_CATEGORY, vertical_alignment="bottom")
+        bulk_category = category_options.selectbox("Category", list(category_map.keys()), key="bulk_category")
+        if category_add.button("Add", icon="➕", use_container_width=True, key="bulk_category_add", disabled=bulk_category is None):
+            queue_edit("add_category", int(category_map[bulk_category].category_id), f"Add category {bulk_category}")
+        if category_remove.button("Remove", icon="➖", use_container_width=True, key="bulk_category_remove", disabled=bulk_category is None):
+            queue_edit("remove_category", int(category_map[bulk_category].category_id), f"Remove category {bulk_category}")
+
+        date_options, date_set = st.columns(WIDTH_EDIT_ENTRY, vertical_alignment="bottom")
+        bulk_date = date_options.date_input("Date Read", key="bulk_date")
+        if date_set.button("Set Date", icon="📅", use_container_width=True, key="bulk_date_set"):
+            queue_edit("set_date", bulk_date.isoformat(), f"Set date to {bulk_date}")
+
+        if edits:
+            st.markdown("**Queued Edits**")
+            for _, _, label in edits:
+                st.markdown(f"- {label}")
+        apply, discard = st.columns(2)
+        if apply.button(f"Apply {len(edits)} Edits to {len(selected)} Articles", icon="💾", use_container_width=True,
+                        key="bulk_apply", disabled=not (edits and selected)):
+            # One transaction and one rerun, however many articles and edits are queued
+            if repository.apply_bulk_edits(selected, [(action, value) for action, value, _ in edits]):
+                reset_selection()
+                reset_pages()
+                rerun()
+            else:
+                st.error("Could not apply the edits. Nothing was changed.", icon="⚠️")
+        if discard.button("Discard Edits", use_container_width=True, key="bulk_discard", disabled=not edits):
+            st.session_state.library_edits = []
+            rerun()
+
+def show_entry(row):
+    # Full runs refresh the stored row; fragment reruns of the entry read it back from here
+    st.session_state.library_rows[int(row.article_id)] = row.copy()
+    render_entry(int(row.article_id))
+
+@st.fragment
+def render_entry(article_id):
+    # Edits rerun only this entry and patch its stored row, so no list query or other entry's
+    # summary lookup runs again. Deleting changes the list, so that still reruns the page.
+    start_fragment("pages/2_library.py#entry")
+    row = st.session_state.library_rows[article_id]
+    cached = summary_cache.get(row.title, row.lang)
+    summary = cached.summary if cached else "*Summary is being fetched.*"
 
-class Category:
-  def __init__(self, category_id, category_name):
-    self.category_id = category_id
-    self.category_name = category_name
-
-def update_review(article_id, new_interest, new_quality):
-    try:
-        sqliteConnection = sqlite3.connect(DB_PATH)
-        cursor = sqliteConnection.cursor()
-        cursor.execute("""
-            UPDATE Reviews
-            SET interest_rating = ?, quality_rating = ?
-            WHERE article_id = ?
-        """, (new_interest, new_quality, article_id))
-        sqliteConnection.commit()
-        cursor.close()
-        st.rerun()
-        return True
-
-    except sqlite3.Error as error:
-        return False
-    
-    finally:
-        if sqliteConnection:
-            sqliteConnection.close()
-
-def switch_read(was_read, article_id):
-    try:
-        sqliteConnection = sqlite3.connect(DB_PATH)
-        cursor = sqliteConnection.cursor()
-        cursor.execute("""
-            UPDATE Reviews
-            SET interest_rating = ?, quality_rating = ?
-            WHERE article_id = ?
-        """, (new_interest, new_quality, article_id))
-        sqliteConnection.commit()
-        cursor.close()
-        st.rerun()
-        return True
-
-    except sqlite3.Error as error:
-        return False
-    
-    finally:
-        if sqliteConnection:
-            sqliteConnection.close()
-
-def switch_read(was_read, article_id):
-    try:
-        sqliteConnection = sqlite3.connect(DB_PATH)
-        cursor = sqliteConnection.cursor()
-        cursor.execute("""
-            UPDATE Articles
-            SET was_read = ?
-            WHERE article_id = ?
-        """, (was_read, article_id))
-        sqliteConnection.commit()
-        cursor.close()
-        st.rerun()
-        return True
-
-    except sqlite3.Error as error:
-        return False
-    
-    finally:
-        if sqliteConnection:
-            sqliteConnection.close()
-
-def delete_article(article_id):
-    try:
-        sqliteConnection = sqlite3.connect(DB_PATH)
-        sqliteConnection.execute("PRAGMA foreign_keys=ON;")
-        cursor = sqliteConnection.cursor()
-        cursor.execute("""
-            DELETE FROM Articles
-            WHERE article_id = ?
-        """, (article_id,))
-        sqliteConnection.commit()
-        cursor.close()
-        st.rerun()
-        return True
-
-    except sqlite3.Error as error:
-        print('Error occurred -', error)
-        return False
-    
-    finally:
-        if sqliteConnection:
-            sqliteConnection.close()
-
-def update_categories(article_id, categories):
-    try:
-        sqliteConnection = sqlite3.connect(DB_PATH)
-        sqliteConnection.execute("PRAGMA foreign_keys=ON;")
-        cursor = sqliteConnection.cursor()
-
-        # Deletes all categories first before adding the new ones
-        cursor.execute("DELETE FROM ArticleCategories WHERE article_id = ?", (article_id,))
-
-        for category in categories:
-            cursor.execute("""
-                INSERT OR IGNORE INTO ArticleCategories(article_id, category_id)
-                VALUES(?, ?)
-            """, (article_id, category.category_id))
-        sqliteConnection.commit()
-        cursor.close()
-        st.rerun()
-        return True
-
-    except sqlite3.Error as error:
-        print('Error occurred -', error)
-        return False
-    
-    finally:
-        if sqliteConnection:
-            sqliteConnection.close()
-
-def update_date(article_id, new_date):
-    try:
-        sqliteConnection = sqlite3.connect(DB_PATH)
-        sqliteConnection.execute("PRAGMA foreign_keys=ON;")
-        cursor = sqliteConnection.cursor()
-
-        cursor.execute("""
-            UPDATE Articles
-            SET date_added = ?
-            WHERE article_id = ?
-        """, (new_date, article_id))
-
-        sqliteConnection.commit()
-        cursor.close()
-        st.rerun()
-        return True
-
-    except sqlite3.Error as error:
-        print('Error occurred -', error)
-        return False
-
-    finally:
-        if sqliteConnection:
-            sqliteConnection.close()
-
-def grab_categories():
-    categories = []
-    try:
-        sqliteConnection = sqlite3.connect(DB_PATH)
-
-        df = pd.read_sql_query("""
-            SELECT *
-            FROM Categories
-            ORDER BY category_name
-        """, sqliteConnection)
-        
-        for _,row in df.iterrows():
-            categories.append(Category(row.category_id, row.category_name))
-
-
-    except sqlite3.Error as error:
-        print('Error grabbing categories -', error)
-
-    finally:
-        if sqliteConnection:
-            sqliteConnection.close()
-            return categories
-
-try:
-    sqliteConnection = sqlite3.connect(DB_PATH)
-
-    category_map = {c.category_name: c for c in grab_categories()}
-    df = pd.read_sql_query("""
-        SELECT 
-            a.article_id,
-            a.title, 
-            GROUP_CONCAT(c.category_name, ', ') AS categories,
-            a.date_added,
-            a.was_read,
-            r.interest_rating,
-            r.quality_rating,
-            a.link
-        FROM Articles a
-        INNER JOIN ArticleCategories ac ON a.article_id = ac.article_id
-        INNER JOIN Categories c ON ac.category_id = c.category_id
-        INNER JOIN Reviews r ON a.article_id = r.article_id
-        GROUP BY a.article_id, a.title, a.was_read, a.date_added, r.interest_rating, r.quality_rating,  a.link
-    """, sqliteConnection)
-    st.session_state.df_using = df.copy()
-
-except sqlite3.Error as error:
-    print('Error occurred -', error)
-
-finally:
-    if sqliteConnection:
-        sqliteConnection.close()
+    st.divider()
+    st.subheader(f"{row.title}")
+    category_markdown = ""
+    lib_categories = row.categories.split("|")
+    lib_categories.sort()
+
+    for category in lib_categories:
+        category_markdown += f":blue-background[{category}] "
+    st.markdown(category_markdown)
+
+    if(len(summary) > MAX_SUMMARY_LENGTH):
+        st.write(summary[:MAX_SUMMARY_LENGTH - 3] + "...")
+    else:
+        st.write(summary)
+
+    interest_rating = rating_value(row.interest_rating)
+    quality_rating = rating_value(row.quality_rating)
+    info_string = (
+        f":violet-background[Interest: " + ("😊" * interest_rating) + (" ◼️" * (5-interest_rating)) + "]" + " | "
+        f":violet-background[Quality: " + ("⭐" * quality_rating) + (" ◼️" * (5-quality_rating)) + "]" + " | "
+        f":blue-background[📅 " + row.date_added + "]" + " | "
+    )
+    if(row.was_read):
+        info_string += f":green-background[✔️Read]"
+    else:
+        info_string += f":orange-background[❌Unread]"
+    st.markdown(info_string)
+
+    st.link_button("Visit 🔗", row.link)
+
+    st.divider()
+    st.markdown("**Edit Entry**")
+    mark_read, delete = st.columns(2, vertical_alignment="center")
+    if(row.was_read):
+        if mark_read.button("Mark as Want to Read", icon="⌛️", use_container_width=True, key=f"wantread_{row.article_id}"):
+            if repository.switch_read(0, row.article_id):
+                row.was_read = 0
+                rerun_fragment()
+    else:
+        if mark_read.button("Mark as Read", icon="✅", use_container_width=True, key=f"read_{row.article_id}"):
+            if repository.switch_read(1, row.article_id):
+                row.was_read = 1
+                rerun_fragment()
+    if delete.button("Delete from Library", icon="🗑️", use_container_width=True, key=f"delete_{row.article_id}"):
+        if repository.delete_article(row.article_id):
+            rerun()
+
+    date_options, date_save = st.columns(WIDTH_EDIT_ENTRY, vertical_alignment="bottom")
+    new_date = date_options.date_input("Date Read", row.date_added, key=f"dateselect_{row.article_id}")
+    if date_save.button("Update Date", icon="🔄", use_container_width=True, key=f"date_{row.article_id}"):
+        if repository.update_date(row.article_id, new_date):
+            row.date_added = new_date.isoformat()
+            rerun_fragment()
+
+    category_options, category_save = st.columns(WIDTH_EDIT_ENTRY, vertical_alignment="bottom")
+    new_categories = category_options.multiselect("Select Categories",
+                            list(category_map.keys()),
+                            accept_new_options=False,
+                            default=lib_categories,
+                            key=f"categories_{row.article_id}")
+    empty_categories = not new_categories
+    if category_save.button("Update Categories", icon="🔄", use_container_width=True, key=f"category_{row.article_id}", disabled=empty_categories):
+        selected_ids = [category_map[name].category_id for name in new_categories]
+        if repository.update_categories(row.article_id, selected_ids):
+            row.categories = "|".join(new_categories)
+            rerun_fragment()
+    with st.container():
+        interest_edit, quality_edit, review_edit_confirm = st.columns(WIDTH_RATING_EDIT, vertical_alignment="center")
+        with interest_edit:
+            new_interest = st_star_rating("Interest", maxValue=5, defaultValue=interest_rating, emoticons=True, key=f"interest_edit_{row.article_id}")
+        with quality_edit:
+            new_quality = st_star_rating("Quality", maxValue=5, defaultValue=quality_rating, key=f"quality_edit_{row.article_id}")
+        if review_edit_confirm.button("Update Review", icon="🔄", use_container_width=True, key=f"rating_edit_{row.article_id}"):
+            if repository.update_review(row.article_id, new_interest, new_quality):
+                row.interest_rating = new_interest
+                row.quality_rating = new_quality
+                rerun_fragment()
+    finish_fragment()
+
+category_map = {c.category_name: c for c in repository.grab_categories()}
+
+if "library_query" not in st.session_state:
+    st.session_state.library_query = LibraryQuery()
+if "library_cursors" not in st.session_state:
+    reset_pages()
+if "search_page" not in st.session_state:
+    reset_search()
+if "library_selected" not in st.session_state:
+    reset_selection()
+# Rebuilt on every full run with just the entries that are open
+st.session_state.library_rows = {}
 
 st.title("Library")
 
+with st.expander("Read Next"):
+    read_next_frame = read_next(READ_NEXT_LIMIT)
+    if read_next_frame.empty:
+        st.write("Nothing on the want-to-read list.")
+    else:
+        st.dataframe(read_next_frame[["Title", "Link", "Score"]], hide_index=True, use_container_width=True, column_config={
+            "Link": st.column_config.LinkColumn("Link", display_text="Visit 🔗"),
+            "Score": st.column_config.ProgressColumn("Score", min_value=0.0, max_value=1.0, format="%.2f"),
+        })
+
+search_text = st.text_input("Search", placeholder="Search titles and summaries", key="library_search", on_change=reset_search).strip()
+if search_text:
+    page_size = st.session_state.get("page_size", DEFAULT_PAGE_SIZE)
+    search_page = st.session_state.search_page
+    df_results, total_results, ranked = search_articles(search_text, search_page, page_size)
+
+    st.markdown(f"**Results** (Size: {total_results})")
+    if not ranked:
+        st.caption("This search matches most of the library, so the newest articles are shown first. Add more words to rank results by relevance.")
+    with st.container(border=True):
+        for index, row in df_results.iterrows():
+            title, open_toggle = st.columns([6, 1], vertical_alignment="center")
+            title.markdown(f"{row.title_match}")
+            if row.summary_match:
+                title.caption(row.summary_match)
+            if open_toggle.toggle("Open", key=f"search_open_{row.article_id}"):
+                with st.container(border=True):
+                    show_entry(row)
+
+    previous_page, page_number, next_page = st.columns([1, 4, 1], vertical_alignment="center")
+    if previous_page.button("Previous", icon="⬅️", use_container_width=True, disabled=search_page == 0, key="search_previous"):
+        st.session_state.search_page -= 1
+        rerun()
+    page_number.markdown(f"Page {search_page + 1}")
+    if next_page.button("Next", icon="➡️", use_container_width=True, disabled=(search_page + 1) * page_size >= total_results, key="search_next"):
+        st.session_state.search_page += 1
+        rerun()
+    stop()
+
 with st.expander("Sort & Filter", icon=":material/sort:"):
 
     SORT_COLUMNS = {
@@ -229,89 +270,86 @@ with st.expander("Sort & Filter", icon=":material/sort:"):
         key="sort_direction"
     )
     if sort_confirm.button("Sort", use_container_width=True, key=f"sort_confirm"):
-        st.session_state.df_using = (df
-            .copy()
-            .sort_values(by=SORT_COLUMNS[sort_selection], ascending=(sort_direction == "Ascending"))
-        )
+        st.session_state.library_query.sort_column = SORT_COLUMNS[sort_selection]
+        st.session_state.library_query.descending = (sort_direction == "Descending")
+        reset_pages()
 
     st.divider()
-    filter_options, filter_confirm, reset_filter = st.columns(WIDTH_FILTER, vertical_alignment="bottom")
-    filter_selection = filter_options.selectbox(
-        "Filter Category",
+    filter_options, filter_match = st.columns(WIDTH_FILTER_MATCH, vertical_alignment="bottom")
+    filter_selection = filter_options.multiselect(
+        "Filter Categories",
         list(category_map.keys()),
+        accept_new_options=False,
+    )
+    filter_mode = filter_match.radio(
+        "Match",
+        ["Any", "All"],
+        key="filter_mode"
     )
+    date_filter, interest_filter, quality_filter = st.columns(3, vertical_alignment="bottom")
+    date_range = date_filter.date_input("Date Range", value=(), key="filter_dates")
+    interest_range = interest_filter.slider("Interest", 1, 5, (1, 5), key="filter_interest")
+    quality_range = quality_filter.slider("Quality", 1, 5, (1, 5), key="filter_quality")
+
+    _, filter_confirm, reset_filter = st.columns(WIDTH_FILTER, vertical_alignment="bottom")
     if filter_confirm.button("Filter", use_container_width=True, key=f"filter_confirm"):
-        st.session_state.df_using = df.copy()[df["categories"].str.contains(f"{filter_selection}", na=False)]
+        library_query = st.session_state.library_query
+        library_query.category_ids = [int(category_map[name].category_id) for name in filter_selection]
+        library_query.match_all = (filter_mode == "All")
+        library_query.date_from = date_range[0] if len(date_range) > 0 else None
+        library_query.date_to = date_range[1] if len(date_range) > 1 else None
+        library_query.interest_range = None if interest_range == (1, 5) else interest_range
+        library_query.quality_range = None if quality_range == (1, 5) else quality_range
+        reset_pages()
     if reset_filter.button("Reset", use_container_width=True, key=f"filter_reset"):
-        st.session_state.df_using = df.copy()
+        library_query = st.session_state.library_query
+        st.session_state.library_query = LibraryQuery(library_query.sort_column, library_query.descending)
+        reset_pages()
 
-    df_using = st.session_state.df_using
+    st.divider()
+    page_size = st.selectbox("Articles per Page", PAGE_SIZE_OPTIONS, index=PAGE_SIZE_OPTIONS.index(DEFAULT_PAGE_SIZE), key="page_size", on_change=reset_pages)
 
-st.markdown(f"**Articles** (Size: {len(df_using)})")
-with st.container(border=True):
-    for index, row in df_using.iterrows():
-        page = wikipedia.WikipediaPage(title=row.title)
-        with st.expander(f"{row.title}"):
-            st.divider()
-            st.subheader(f"{row.title}")
-            category_markdown = ""
-            lib_categories = row.categories.split("|")
-            lib_categories.sort()
-            
-            for category in lib_categories:
-                category_markdown += f":blue-background[{category}] "
-            st.markdown(category_markdown)
-            
-            if(len(page.summary) > MAX_SUMMARY_LENGTH):
-                st.write(page.summary[:MAX_SUMMARY_LENGTH - 3] + "...")
-            else:
-                st.write(page.summary)
-
-            info_string = (
-                f":violet-background[Interest: " + ("😊" * row.interest_rating) + (" ◼️" * (5-row.interest_rating)) + "]" + " | "
-                f":violet-background[Quality: " + ("⭐" * row.quality_rating) + (" ◼️" * (5-row.quality_rating)) + "]" + " | "
-                f":blue-background[📅 " + row.date_added + "]" + " | "
-            )
-            if(row.was_read):
-                info_string += f":green-background[✔️Read]"
-            else:
-                info_string += f":orange-background[❌Unread]"
-            st.markdown(info_string)
+library_query = st.session_state.library_query
+cursors = st.session_state.library_cursors
 
-            st.link_button("Visit 🔗", row.link)
+# One extra row tells us whether a next page exists without a separate query
+df_page = fetch_library_page(library_query, cursors[-1], page_size + 1)
+has_next_page = len(df_page) > page_size
+df_page = df_page.head(page_size)
 
-            st.divider()
-            st.markdown("**Edit Entry**")
-            mark_read, delete = st.columns(2, vertical_alignment="center")
-            if(row.was_read):
-                if mark_read.button("Mark as Want to Read", icon="⌛️", use_container_width=True, key=f"wantread_{row.article_id}"):
-                    switch_read(0, row.article_id)
-            else:
-                if mark_read.button("Mark as Read", icon="✅", use_container_width=True, key=f"read_{row.article_id}"):
-                    switch_read(1, row.article_id)
-            if delete.button("Delete from Library", icon="🗑️", use_container_width=True, key=f"delete_{row.article_id}"):
-                delete_article(row.article_id)
-
-            date_options, date_save = st.columns(WIDTH_EDIT_ENTRY, vertical_alignment="bottom")
-            new_date = date_options.date_input("Date Read", row.date_added, key=f"dateselect_{row.article_id}")
-            if date_save.button("Update Date", icon="🔄", use_container_width=True, key=f"date_{row.article_id}"):
-                update_date(row.article_id, new_date)
-
-            category_options, category_save = st.columns(WIDTH_EDIT_ENTRY, vertical_alignment="bottom")
-            new_categories = category_options.multiselect("Select Categories", 
-                                    list(category_map.keys()), 
-                                    accept_new_options=False,
-                                    default=row.categories.split('|'),
-                                    key=f"categories_{row.article_id}")
-            empty_categories = not new_categories
-            if category_save.button("Update Categories", icon="🔄", use_container_width=True, key=f"category_{row.article_id}", disabled=empty_categories):
-                selected_objects = [category_map[name] for name in new_categories]
-                update_categories(row.article_id, selected_objects)
-            with st.container():
-                interest_edit, quality_edit, review_edit_confirm = st.columns(WIDTH_RATING_EDIT, vertical_alignment="center")
-                with interest_edit:
-                    new_interest = st_star_rating("Interest", maxValue=5, defaultValue=row.interest_rating, emoticons=True, key=f"interest_edit_{row.article_id}")
-                with quality_edit:
-                    new_quality = st_star_rating("Quality", maxValue=5, defaultValue=row.quality_rating, key=f"quality_edit_{row.article_id}")
-                if review_edit_confirm.button("Update Review", icon="🔄", use_container_width=True, key=f"rating_edit_{row.article_id}"):
-                    update_review(row.article_id, new_interest, new_quality)
\ No newline at end of file
+articles_header, select_mode = st.columns([6, 1], vertical_alignment="center")
+articles_header.markdown(f"**Articles** (Size: {count_library(library_query)})")
+selecting = select_mode.toggle("Select", key="library_select_mode")
+if selecting:
+    render_bulk_editor(df_page)
+
+with st.container(border=True):
+    for index, row in df_page.iterrows():
+        title, open_toggle = st.columns([6, 1], vertical_alignment="center")
+        if selecting:
+            # Checkbox state is seeded from the selection, which survives paging
+            select_key = f"select_{row.article_id}"
+            if select_key not in st.session_state:
+                st.session_state[select_key] = int(row.article_id) in st.session_state.library_selected
+            title.checkbox(f"**{row.title}**", key=select_key, on_change=toggle_selected, args=(int(row.article_id),))
+        else:
+            title.markdown(f"**{row.title}**")
+        # Summary lookup and edit widgets are only built for entries that are opened
+        if open_toggle.toggle("Open", key=f"open_{row.article_id}"):
+            with st.container(border=True):
+                show_entry(row)
+
+previous_page, page_number, next_page = st.columns([1, 4, 1], vertical_alignment="center")
+if previous_page.button("Previous", icon="⬅️", use_container_width=True, disabled=len(cursors) == 1):
+    cursors.pop()
+    rerun()
+page_number.markdown(f"Page {len(cursors)}")
+if next_page.button("Next", icon="➡️", use_container_width=True, disabled=not has_next_page):
+    cursors.append(next_cursor(df_page))
+    rerun()
+
+with st.expander("Query Plan", icon=":material/account_tree:"):
+    for detail in explain_library_page(library_query, cursors[-1], page_size + 1):
+        st.text(detail)
+
+finish_page()
@@ -1,72 +1,55 @@
 import streamlit as st  # type: ignore
-import sqlite3
-import pandas as pd # type: ignore
-
-st.set_page_config(page_title="Dataframes", page_icon="🗃️")
-DB_PATH = './database/articles.db'
+from database.table_query import TABLE_VIEWS, TableQuery, count_table, fetch_table_page
+from instrumentation.panel import finish_page, rerun, start_page
+
+st.set_page_config(page_title="Dataframes", page_icon="🗃️", layout="wide")
+start_page("pages/3_dataframe.py")
+PAGE_SIZE_OPTIONS = [50, 100, 500, 1000]
+WIDTH_TABLE_OPTIONS = [2, 1, 2, 3, 1]
+NO_SORT = "(none)"
+
+def reset_page(view):
+    st.session_state[f"table_page_{view}"] = 0
+
+def render_table(view):
+    page_key = f"table_page_{view}"
+    if page_key not in st.session_state:
+        reset_page(view)
+    columns = TABLE_VIEWS[view][1]
+
+    sort_options, sort_direction, filter_options, filter_text, page_size_options = st.columns(WIDTH_TABLE_OPTIONS, vertical_alignment="bottom")
+    sort_column = sort_options.selectbox("Sort By", [NO_SORT] + columns, key=f"table_sort_{view}", on_change=reset_page, args=(view,))
+    descending = sort_direction.toggle("Descending", key=f"table_descending_{view}", on_change=reset_page, args=(view,))
+    filter_column = filter_options.selectbox("Filter Column", columns, key=f"table_filter_column_{view}", on_change=reset_page, args=(view,))
+    filter_value = filter_text.text_input("Contains", key=f"table_filter_{view}", on_change=reset_page, args=(view,)).strip()
+    page_size = page_size_options.selectbox("Rows", PAGE_SIZE_OPTIONS, index=1, key=f"table_page_size_{view}", on_change=reset_page, args=(view,))
+
+    table_query = TableQuery(view, None if sort_column == NO_SORT else sort_column, descending, filter_column, filter_value)
+    total_rows = count_table(table_query)
+    last_page = max(0, (total_rows - 1) // page_size)
+    page = min(st.session_state[page_key], last_page)
+
+    # Only the visible page is read and sent to the browser
+    df_page = fetch_table_page(table_query, page, page_size)
+    st.dataframe(df_page, hide_index=True, use_container_width=True)
+
+    previous_page, page_number, next_page = st.columns([1, 4, 1], vertical_alignment="center")
+    if previous_page.button("Previous", icon="⬅️", use_container_width=True, disabled=page == 0, key=f"table_previous_{view}"):
+        st.session_state[page_key] = page - 1
+        rerun()
+    first_row = page * page_size + 1 if total_rows else 0
+    page_number.markdown(f"Rows {first_row}-{page * page_size + len(df_page)} of {total_rows} (Page {page + 1} of {last_page + 1})")
+    if next_page.button("Next", icon="➡️", use_container_width=True, disabled=page >= last_page, key=f"table_next_{view}"):
+        st.session_state[page_key] = page + 1
+        rerun()
 
 st.title("Dataframes")
-try:
-    sqliteConnection = sqlite3.connect(DB_PATH)
-
-    df_article_combo = pd.read_sql_query("""
-        SELECT 
-            a.article_id,
-            a.title, 
-            GROUP_CONCAT(c.category_name, ', ') AS categories,
-            a.date_added,
-            CASE
-                WHEN a.was_read = 0 THEN "False"
-                ELSE "True"
-            END as was_read,
-            r.interest_rating,
-            r.quality_rating,
-            a.link
-        FROM Articles a
-        INNER JOIN ArticleCategories ac ON a.article_id = ac.article_id
-        INNER JOIN Categories c ON ac.category_id = c.category_id
-        INNER JOIN Reviews r ON a.article_id = r.article_id
-        GROUP BY a.article_id, a.title, a.was_read, a.date_added, r.interest_rating, r.quality_rating,  a.link
-    """, sqliteConnection)
-
-    st.write("Combined Data")
-    st.write(df_article_combo)
-
-    df_articles = pd.read_sql_query("""
-        SELECT *
-        FROM Articles
-    """, sqliteConnection)
-
-    st.write("Articles")
-    st.write(df_articles)
-
-    df_categories = pd.read_sql_query("""
-        SELECT *
-        FROM Categories
-    """, sqliteConnection)
-
-    st.write("Categories")
-    st.write(df_categories)
-
-    df_junction = pd.read_sql_query("""
-        SELECT article_id, category_id
-        FROM ArticleCategories
-    """, sqliteConnection)
-
-    st.write("ArticleCategories")
-    st.write(df_junction)
-
-    df_reviews = pd.read_sql_query("""
-        SELECT *
-        FROM Reviews
-    """, sqliteConnection)
-
-    st.write("Reviews")
-    st.write(df_reviews)
 
-except sqlite3.Error as error:
-    print('Error occurred -', error)
+# Tabs report which one is open, so only that table is queried on each run
+tabs = st.tabs(list(TABLE_VIEWS), key="dataframe_tab", on_change="rerun")
+for view, tab in zip(TABLE_VIEWS, tabs):
+    if tab.open:
+        with tab:
+            render_table(view)
 
-finally:
-    if sqliteConnection:
-        sqliteConnection.close()
\ No newline at end of file
+finish_page()
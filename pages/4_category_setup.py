@@ -1,110 +1,30 @@
 import streamlit as st # type: ignore
 import sqlite3
 import sys
-import wikipedia # type: ignore
-import pandas as pd # type: ignore
-from datetime import datetime
+from database import repository
+from instrumentation.panel import finish_fragment, finish_page, rerun, rerun_fragment, start_fragment, start_page
 
 sys.stdout.reconfigure(encoding='utf-8')
 st.set_page_config(page_title="Category Setup", page_icon="🔧")
-DB_PATH = './database/articles.db'
-
-class Article:
-  def __init__(self, title, lang, data, link):
-    self.title = title
-    self.lang = lang
-    self.data = data
-    self.link = link
-
-def parse_title(url):
-    split_url = url.split('/wiki/')
-    return split_url[-1].split('#')[0].replace('_', ' ').replace('%27', '\'')
-
-def parse_lang(url):
-    lang = url.split('.wikipedia.org')[0].replace('https://', '')
-    if(lang == 'www' or lang == ''):
-        return 'en'
-    else:
-        return lang
-
-def add_category(title):
-    try:
-        sqliteConnection = sqlite3.connect(DB_PATH)
-        cursor = sqliteConnection.cursor()
-
-        cursor.execute("""
-            INSERT INTO Categories (category_name)
-            VALUES (?);
-        """, (title,))
-
-
-        print('Article added')
-        sqliteConnection.commit()
-        cursor.close()
-        return True
-
-    except sqlite3.Error as error:
-        print('Error occurred -', error)
-        return False
-
-    finally:
-        if sqliteConnection:
-            sqliteConnection.close()
-
-def delete_category(category_id):
-    try:
-        sqliteConnection = sqlite3.connect(DB_PATH)
-        sqliteConnection.execute("PRAGMA foreign_keys=ON;")
-        cursor = sqliteConnection.cursor()
-        cursor.execute("""
-            DELETE FROM Categories
-            WHERE category_id = ?
-        """, (category_id,))
-        cursor.execute("""
-            DELETE FROM Articles
-            WHERE NOT EXISTS (
-                SELECT 1
-                FROM ArticleCategories ac
-                WHERE Articles.article_id = ac.article_id
-            );
-        """)
-        sqliteConnection.commit()
-        cursor.close()
-        st.rerun()
-        return True
-
-    except sqlite3.Error as error:
-        print('Error occurred -', error)
-        return False
-    
-    finally:
-        if sqliteConnection:
-            sqliteConnection.close()
-
-def rename_category(category_id, new_name):
-    try:
-        sqliteConnection = sqlite3.connect(DB_PATH)
-        cursor = sqliteConnection.cursor()
-
-        cursor.execute("""
-            UPDATE Categories
-            SET category_name = ?
-            WHERE category_id = ?
-        """, (new_name, category_id))
-
-
-        sqliteConnection.commit()
-        st.rerun()
-        cursor.close()
-        return True
-
-    except sqlite3.Error as error:
-        print('Error occurred -', error)
-        return False
-
-    finally:
-        if sqliteConnection:
-            sqliteConnection.close()
+start_page("pages/4_category_setup.py")
+
+@st.fragment
+def render_category(category_id, articles_in_category):
+    # A rename reruns only this row and patches the stored name; deleting changes the list, so it reruns the page
+    start_fragment("pages/4_category_setup.py#category")
+    row = st.session_state.category_rows[category_id]
+    title, rename_box, rename_confirm, delete = st.columns([2,1,1,1], vertical_alignment="bottom")
+    title.subheader(f"**{row.category_name}**")
+    category_rename = rename_box.text_input("Rename Category (50 char)", key=f"rename_{row.category_id}").strip()
+    if rename_confirm.button("Rename", icon="🔄", key=f"rename_confirm_{row.category_id}", disabled=len(category_rename) > 50):
+        if repository.rename_category(row.category_id, category_rename):
+            row.category_name = category_rename
+            rerun_fragment()
+    if delete.button("Delete Category", icon="🗑️", key=f"delete_{row.category_id}"):
+        if repository.delete_category(row.category_id):
+            rerun()
+    delete.markdown(f"(Articles: {articles_in_category})")
+    finish_fragment()
 
 st.title("Category Setup")
 category_name = st.text_input(f"Add New Category (50 character maximum)").strip()
@@ -113,55 +33,30 @@ if category_name:
         if(len(category_name) > 50):
             st.error(f"Could not add. Category name is over 50 characters.", icon="⚠️")
         else:
-            if add_category(category_name):
+            if repository.add_category(category_name):
                 st.success(f"Successfully added \"{category_name}\"", icon="✅")
             else:
                 st.error(f"Could not add \"{category_name}\". Category already exists.", icon="⚠️")
 
 try:
-    sqliteConnection = sqlite3.connect(DB_PATH)
-
-    df = pd.read_sql_query("""
-        SELECT *
-        FROM Categories
-        ORDER BY category_name
-    """, sqliteConnection)
-
-    article_category_df = pd.read_sql_query("""
-        SELECT category_id, COUNT(article_id) AS num_articles
-        FROM ArticleCategories
-        GROUP BY category_id
-    """, sqliteConnection)
+    categories = repository.grab_categories()
+    # Rows the category fragments read back on their own reruns
+    st.session_state.category_rows = {row.category_id: row for row in categories}
+    article_counts = dict(repository.category_article_counts().itertuples(index=False))
 
     st.divider()
     st.markdown(f"**Categories**")
 
     with st.container(border=True):
-        if(df.empty):
+        if not categories:
             st.write("No categories exist. Create one to start logging articles!")
         else:
-            for index, row in df.iterrows():
+            for index, row in enumerate(categories):
                 if(index != 0):
                     st.divider()
-                title, rename_box, rename_confirm, delete = st.columns([2,1,1,1], vertical_alignment="bottom")
-                filtered = article_category_df.loc[article_category_df['category_id'] == row.category_id, 'num_articles']
-                if not filtered.empty:
-                    articles_in_category = filtered.iloc[0]
-                else:
-                    articles_in_category = 0
-                title.subheader(f"**{row.category_name}**")
-                category_rename = rename_box.text_input("Rename Category (50 char)", key=f"rename_{row.category_id}").strip()
-                if rename_confirm.button("Rename", icon="🔄", key=f"rename_confirm_{row.category_id}", disabled=len(category_rename) > 50):
-                    rename_category(row.category_id, category_rename)
-                if delete.button("Delete Category", icon="🗑️", key=f"delete_{row.category_id}"):
-                    delete_category(row.category_id)
-                delete.markdown(f"(Articles: {articles_in_category})")
-
-            
+                render_category(row.category_id, article_counts.get(row.category_id, 0))
 
 except sqlite3.Error as error:
     print('Error occurred -', error)
 
-finally:
-    if sqliteConnection:
-        sqliteConnection.close()
\ No newline at end of file
+finish_page()
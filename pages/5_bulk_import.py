@@ -0,0 +1,68 @@
+import streamlit as st # type: ignore
+import sys
+import pandas as pd # type: ignore
+from database import repository
+from tools.bulk_import import bulk_import, read_urls
+from instrumentation.panel import finish_page, start_page
+
+sys.stdout.reconfigure(encoding='utf-8')
+st.set_page_config(page_title="Bulk Import", page_icon="📥")
+start_page("pages/5_bulk_import.py")
+
+st.title("Bulk Import")
+
+categories = repository.grab_categories()
+if not categories:
+    with st.container(border=True):
+        st.write("No categories exist. Create one in Category Setup to start importing articles!")
+else:
+    url_file = st.file_uploader("Upload a file of Wikipedia URLs", type=["txt", "csv", "jsonl"])
+    category_map = {c.category_name: c for c in categories}
+    selected_categories = st.multiselect("Default Categories", list(category_map.keys()), accept_new_options=False)
+    was_read = st.toggle("Mark as Read")
+
+    urls, rejected = [], []
+    if url_file is not None:
+        try:
+            urls, rejected = read_urls(url_file.getvalue().decode("utf-8"), url_file.name)
+        except UnicodeDecodeError as error:
+            st.error(f"{url_file.name} is not UTF-8 text - {error}", icon="⚠️")
+            url_file = None
+
+    if url_file is not None:
+        st.markdown(f"**URLs found:** {len(urls)}")
+        if rejected:
+            # The same lines open the error report after an import
+            with st.expander(f"Lines that can't be imported: {len(rejected)}"):
+                st.dataframe(pd.DataFrame(rejected, columns=["URL", "Error"]), use_container_width=True)
+
+        if st.button("Import", icon="📥", use_container_width=True, disabled=not urls):
+            if not selected_categories:
+                st.error(f"Please select at least 1 category.", icon="⚠️")
+            else:
+                progress = st.progress(0.0, text="Importing...")
+
+                def show_progress(result):
+                    progress.progress(
+                        result.processed / result.total,
+                        text=f"{result.processed}/{result.total} processed ({result.throughput:.1f} articles/sec)"
+                    )
+
+                result = bulk_import(
+                    urls,
+                    [category_map[name].category_id for name in selected_categories],
+                    was_read,
+                    on_progress=show_progress,
+                    rejected=rejected,
+                    fetch=False,
+                )
+                st.success(
+                    f"Imported {result.imported} articles, skipped {result.skipped} already logged "
+                    f"({result.throughput:.1f} articles/sec). Their summaries are downloaded by the fetch worker.",
+                    icon="✅"
+                )
+                if result.errors:
+                    st.error(f"{len(result.errors)} URLs could not be imported.", icon="⚠️")
+                    st.dataframe(pd.DataFrame(result.errors, columns=["URL", "Error"]), use_container_width=True)
+
+finish_page()
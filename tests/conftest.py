@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+# The repo is run from its root (streamlit run dashboard.py), so its packages import from there
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import connection # noqa: E402
+from tools.fake_wiki_api import FakeWikiState, serve # noqa: E402
+
+@pytest.fixture
+def database(tmp_path):
+    # A fresh, migrated database file for each test
+    connection.set_database(str(tmp_path / "articles.db"))
+    yield connection
+    connection.pool.close_all()
+
+@pytest.fixture
+def wiki():
+    # A local stand-in for the MediaWiki API on a free port; tests change the state while it runs
+    state = FakeWikiState()
+    server = serve(state, 0)
+    yield state, server.server_address[1]
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from database import job_queue, repository
+from database.connection import connection, transaction
+from tools.bulk_import import bulk_import, read_urls
+from wiki import fetcher as wiki_fetcher
+from wiki.fetcher import LocalFetcher
+
+@pytest.fixture
+def local_pages(database, tmp_path):
+    # Every page the tests import, served from a fixture file instead of Wikipedia
+    path = tmp_path / "pages.jsonl"
+    path.write_text("\n".join(json.dumps(page) for page in [
+        {"title": "Foo", "lang": "en", "summary": "Foo is a page.", "pageid": 1},
+        {"title": "Paris", "lang": "en", "summary": "Paris is a city.", "pageid": 2},
+        {"title": "Paris", "lang": "fr", "summary": "Paris est une ville.", "pageid": 3},
+    ]), encoding="utf-8")
+    previous = wiki_fetcher.fetcher
+    wiki_fetcher.set_fetcher(LocalFetcher(str(path)))
+    repository.add_category("Science")
+    yield
+    wiki_fetcher.fetcher = previous
+
+def test_csv_short_rows_are_rejected_with_their_line():
+    text = "name,url\nFoo,https://en.wikipedia.org/wiki/Foo\nBar\n\nBaz,https://de.wikipedia.org/wiki/Baz\n"
+    urls, rejected = read_urls(text, "urls.csv")
+    assert urls == ["https://en.wikipedia.org/wiki/Foo", "https://de.wikipedia.org/wiki/Baz"]
+    assert rejected == [("Bar", "line 3 has no column 2")]
+
+def test_unreadable_lines_are_rejected_with_a_reason():
+    text = '{"url": "https://en.wikipedia.org/wiki/Foo"}\n{not json\n{"name": "Bar"}\n"https://example.com/"\n'
+    urls, rejected = read_urls(text, "urls.jsonl")
+    assert urls == ["https://en.wikipedia.org/wiki/Foo"]
+    assert [reason.split(" - ")[0] for _, reason in rejected] == [
+        "line 2 is not valid JSON",
+        "line 3 has no url/link/URL/Link field",
+        "not a link to a Wikipedia article",
+    ]
+
+def test_links_to_one_page_are_read_once():
+    text = "https://en.wikipedia.org/wiki/Foo\nhttps://en.m.wikipedia.org/wiki/foo#History\n# comment\n"
+    assert read_urls(text, "urls.txt") == (["https://en.wikipedia.org/wiki/Foo"], [])
+
+def test_same_title_in_two_languages_is_imported_twice(local_pages):
+    result = bulk_import(["https://en.wikipedia.org/wiki/Paris", "https://fr.wikipedia.org/wiki/Paris"], [1])
+    assert result.imported == 2
+    assert result.errors == []
+
+def test_rows_that_clash_are_errors_not_skips(local_pages):
+    # The link is taken by an article stored under another title, so the insert is left out
+    with transaction() as sqliteConnection:
+        sqliteConnection.execute("INSERT INTO Articles (title, link) VALUES ('Old Foo', 'https://en.wikipedia.org/wiki/Foo')")
+    result = bulk_import(["https://en.wikipedia.org/wiki/Foo", "https://en.wikipedia.org/wiki/Paris"], [1])
+    assert result.imported == 1
+    assert result.skipped == 0
+    assert [url for url, _ in result.errors] == ["https://en.wikipedia.org/wiki/Foo"]
+
+def test_queued_import_leaves_downloads_to_the_worker(local_pages):
+    class NoFetcher:
+        def fetch_many(self, titles, lang):
+            raise AssertionError("pages must not fetch")
+
+    wiki_fetcher.set_fetcher(NoFetcher())
+    result = bulk_import(["https://en.wikipedia.org/wiki/Paris", "https://fr.wikipedia.org/wiki/Paris"], [1], fetch=False)
+    assert result.imported == 2
+    assert result.errors == []
+    with connection() as sqliteConnection:
+        assert sqliteConnection.execute("SELECT COUNT(*) FROM ArticleSummaries").fetchone() == (0,)
+        jobs = sqliteConnection.execute("SELECT kind, lang, title, status FROM FetchJobs ORDER BY lang").fetchall()
+    assert jobs == [("enrich", "en", "Paris", "queued"), ("enrich", "fr", "Paris", "queued")]
+    assert job_queue.queue_stats() == {"queued": 2}
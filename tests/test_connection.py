@@ -0,0 +1,20 @@
+import sqlite3
+import time
+
+import pytest
+
+from database.connection import ConnectionPool, PoolTimeoutError
+
+def test_exhausted_pool_times_out(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "articles.db"), size=1, acquire_timeout=0.2)
+    held = pool.acquire()
+    start = time.monotonic()
+    with pytest.raises(PoolTimeoutError) as error:
+        pool.acquire()
+    assert time.monotonic() - start >= 0.2
+    # Callers that handle sqlite3.Error handle this too
+    assert isinstance(error.value, sqlite3.Error)
+    pool.release(held)
+    assert pool.acquire() is held
+    pool.release(held)
+    pool.close_all()
@@ -0,0 +1,137 @@
+import random
+
+import pytest
+
+from wiki import fetcher as wiki_fetcher
+from wiki.client import MediaWikiClient
+from wiki.fetcher import CircuitOpenError, FetchError, GovernedFetcher, RetryableFetchError, WikipediaFetcher
+from wiki.governance import CircuitBreaker, RetryPolicy, TokenBucket
+
+class Clock:
+    # Stands in for time.monotonic so breaker timeouts pass instantly
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # Backoff delays are recorded instead of slept
+    slept = []
+    monkeypatch.setattr(wiki_fetcher.time, "sleep", slept.append)
+    return slept
+
+def governed(port, clock, attempts=3, failure_threshold=5, path="w/api.php"):
+    client = MediaWikiClient(api_url=f"http://127.0.0.1:{port}/{{lang}}/{path}")
+    return GovernedFetcher(
+        WikipediaFetcher(client),
+        rate=1000,
+        retry_policy=RetryPolicy(max_attempts=attempts, base_delay=0.0, seed=1),
+        breaker_factory=lambda: CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=30.0, clock=clock),
+    )
+
+def test_server_errors_are_retried_then_reported(wiki, sleeps):
+    state, port = wiki
+    state.error_rate = 1.0
+    fetcher = governed(port, Clock(), attempts=3)
+    results = fetcher.fetch_many(["Page 1", "Page 2"], "en")
+    assert all(isinstance(page, RetryableFetchError) for page in results.values())
+    assert state.requests == 3
+    assert len(sleeps) == 2
+    metrics = fetcher.metrics.snapshot()
+    assert metrics["requests"] == 3
+    assert metrics["retried"] == 2
+    assert metrics["failed"] == 2
+
+def test_a_retry_that_succeeds_closes_the_circuit(wiki, sleeps):
+    state, port = wiki
+    # With this seed the first request gets a 503 and the second goes through
+    state.random = random.Random(1)
+    state.error_rate = 0.5
+    fetcher = governed(port, Clock(), attempts=3)
+    results = fetcher.fetch_many(["Page 1"], "en")
+    assert results["Page 1"].summary == "Page 1 is a synthetic article."
+    assert state.requests == 2
+    assert fetcher.breakers["en"].state == CircuitBreaker.CLOSED
+    assert fetcher.breakers["en"].failures == 0
+
+def test_throttling_waits_for_retry_after(wiki, sleeps):
+    state, port = wiki
+    state.throttle_rate = 1.0
+    fetcher = governed(port, Clock(), attempts=2)
+    results = fetcher.fetch_many(["Page 1"], "en")
+    assert isinstance(results["Page 1"], RetryableFetchError)
+    assert results["Page 1"].retry_after == 1.0
+    # The fake server asks for one second, which outweighs the zero backoff
+    assert sleeps == [1.0]
+    assert state.requests == 2
+
+def test_breaker_opens_short_circuits_and_recovers(wiki, sleeps):
+    state, port = wiki
+    clock = Clock()
+    fetcher = governed(port, clock, attempts=2, failure_threshold=2)
+    state.error_rate = 1.0
+    fetcher.fetch_many(["Page 1"], "en")
+    breaker = fetcher.breakers["en"]
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # While open, nothing reaches the server
+    requests = state.requests
+    results = fetcher.fetch_many(["Page 1"], "en")
+    assert isinstance(results["Page 1"], CircuitOpenError)
+    assert state.requests == requests
+    assert fetcher.metrics.snapshot()["short_circuited"] == 1
+
+    # After the reset timeout one trial goes through; a failure reopens the circuit at once
+    clock.now += 30.0
+    fetcher.fetch_many(["Page 1"], "en")
+    assert state.requests == requests + 1
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # The next trial succeeds and closes it
+    state.error_rate = 0.0
+    clock.now += 30.0
+    results = fetcher.fetch_many(["Page 1"], "en")
+    assert results["Page 1"].pageid
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_refused_trial_settles_a_half_open_breaker(wiki, sleeps):
+    # A 404 is not retryable, but the host answered, so the trial closes the circuit instead of leaving it half-open
+    state, port = wiki
+    clock = Clock()
+    fetcher = governed(port, clock, attempts=1, failure_threshold=1, path="w/missing.php")
+    _, breaker = fetcher._host("en")
+    breaker.record_failure()
+    clock.now += 30.0
+    results = fetcher.fetch_many(["Page 1"], "en")
+    assert isinstance(results["Page 1"], FetchError)
+    assert not isinstance(results["Page 1"], RetryableFetchError)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+def test_unexpected_error_reopens_a_half_open_breaker(sleeps):
+    class Broken:
+        def fetch_many(self, titles, lang):
+            raise KeyError("pages")
+
+    clock = Clock()
+    fetcher = GovernedFetcher(Broken(), rate=1000, breaker_factory=lambda: CircuitBreaker(failure_threshold=1, clock=clock))
+    results = fetcher.fetch_many(["Page 1"], "en")
+    assert isinstance(results["Page 1"], FetchError)
+    breaker = fetcher.breakers["en"]
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # The half-open trial fails the same way and must reopen the circuit, not leave it stuck half-open
+    clock.now += breaker.reset_timeout
+    fetcher.fetch_many(["Page 1"], "en")
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += breaker.reset_timeout
+    assert breaker.allow()
+
+def test_token_bucket_spaces_requests_after_a_burst():
+    clock = Clock()
+    bucket = TokenBucket(rate=10, capacity=2, clock=clock)
+    assert [bucket._reserve() for _ in range(4)] == pytest.approx([0.0, 0.0, 0.1, 0.2])
+    clock.now += 1.0
+    assert bucket._reserve() == 0.0
@@ -0,0 +1,100 @@
+import pytest
+
+from database import repository
+from database.connection import connection
+from tools import bulk_import, refresh
+from wiki.client import MediaWikiClient
+from wiki import fetcher as wiki_fetcher
+from wiki.fetcher import GovernedFetcher, WikipediaFetcher
+
+PAGES = 10
+
+class RecordingFetcher:
+    # Passes everything through and remembers which titles were downloaded in full
+    def __init__(self, fetcher):
+        self.fetcher = fetcher
+        self.downloaded = []
+
+    def page_info(self, titles, lang):
+        return self.fetcher.page_info(titles, lang)
+
+    def fetch_many(self, titles, lang):
+        self.downloaded.extend(titles)
+        return self.fetcher.fetch_many(titles, lang)
+
+@pytest.fixture
+def library(database, wiki):
+    # PAGES articles imported through the fake API, so each has a stored summary and revision
+    state, port = wiki
+    client = MediaWikiClient(api_url=f"http://127.0.0.1:{port}/{{lang}}/w/api.php")
+    fetcher = RecordingFetcher(GovernedFetcher(WikipediaFetcher(client), rate=1000))
+    previous = wiki_fetcher.fetcher
+    wiki_fetcher.set_fetcher(fetcher)
+    repository.add_category("Science")
+    result = bulk_import.bulk_import([f"https://en.wikipedia.org/wiki/Page_{i}" for i in range(PAGES)], [1])
+    assert result.imported == PAGES
+    fetcher.downloaded.clear()
+    yield state, fetcher
+    wiki_fetcher.fetcher = previous
+
+def rows(query, params=()):
+    with connection() as sqliteConnection:
+        return sqliteConnection.execute(query, params).fetchall()
+
+def test_unchanged_pages_are_not_downloaded(library):
+    state, fetcher = library
+    result = refresh.refresh_library(0, fetcher=fetcher)
+    assert result.checked == PAGES
+    assert result.unchanged == PAGES
+    assert result.changed == 0
+    assert fetcher.downloaded == []
+
+def test_only_edited_pages_are_downloaded(library):
+    state, fetcher = library
+    state.edit("Page 3", "en", "Page 3 was edited.")
+    result = refresh.refresh_library(0, fetcher=fetcher)
+    assert result.changed == 1
+    assert result.refreshed == 1
+    assert result.unchanged == PAGES - 1
+    assert fetcher.downloaded == ["Page 3"]
+    assert rows("SELECT summary, revid FROM ArticleSummaries WHERE title = 'Page 3'") == [("Page 3 was edited.", 2)]
+
+def test_recently_confirmed_pages_are_skipped(library):
+    state, fetcher = library
+    refresh.refresh_library(0, fetcher=fetcher)
+    result = refresh.refresh_library(fetcher=fetcher)
+    assert result.skipped == PAGES
+    assert result.checked == 0
+
+def test_rename_follows_the_page_move(library):
+    state, fetcher = library
+    state.rename("Page 5", "Page Five", "en")
+    result = refresh.refresh_library(0, fetcher=fetcher)
+    assert result.renamed == 1
+    assert result.conflicts == []
+    assert rows("SELECT title, link FROM Articles WHERE title IN ('Page 5', 'Page Five')") == [
+        ("Page Five", "https://en.wikipedia.org/wiki/Page_Five"),
+    ]
+    assert rows("SELECT title FROM ArticleSummaries WHERE title IN ('Page 5', 'Page Five')") == [("Page Five",)]
+    assert rows("SELECT lang, from_title, to_title FROM PageRedirects") == [("en", "Page 5", "Page Five")]
+    # The old link now finds the renamed article
+    assert repository.page_key("https://en.wikipedia.org/wiki/Page_5") == ("en", "Page Five")
+
+def test_rename_onto_an_existing_title_is_a_conflict(library):
+    state, fetcher = library
+    state.rename("Page 7", "Page 8", "en")
+    result = refresh.refresh_library(0, fetcher=fetcher)
+    assert result.renamed == 0
+    assert result.conflicts == [("Page 7", "Page 8")]
+    # Both articles are left as they were; the redirect is still recorded
+    assert rows("SELECT title FROM Articles WHERE title IN ('Page 7', 'Page 8') ORDER BY title") == [("Page 7",), ("Page 8",)]
+    assert rows("SELECT from_title, to_title FROM PageRedirects") == [("Page 7", "Page 8")]
+
+def test_same_title_in_another_language_is_not_a_conflict(library):
+    state, fetcher = library
+    assert bulk_import.bulk_import(["https://de.wikipedia.org/wiki/Page_Neun"], [1]).imported == 1
+    state.rename("Page 9", "Page Neun", "en")
+    result = refresh.refresh_library(0, fetcher=fetcher)
+    assert result.conflicts == []
+    assert result.renamed == 1
+    assert rows("SELECT lang, title FROM Articles WHERE title = 'Page Neun' ORDER BY lang") == [("de", "Page Neun"), ("en", "Page Neun")]
@@ -0,0 +1,29 @@
+import datetime
+
+from database import repository
+from database.connection import connection
+
+def rows(query, params=()):
+    with connection() as sqliteConnection:
+        return sqliteConnection.execute(query, params).fetchall()
+
+def test_same_title_in_two_languages(database):
+    repository.add_category("Cities")
+    today = datetime.date.today()
+    french = repository.add_article("Paris", "https://fr.wikipedia.org/wiki/Paris", today, False, [1], None, None)
+    english = repository.add_article("Paris", "https://en.wikipedia.org/wiki/Paris", today, True, [1], 4, 5)
+    assert french is not None
+    assert english is not None
+    assert french.article_id != english.article_id
+    assert rows("SELECT lang, title, link, was_read FROM Articles ORDER BY lang") == [
+        ("en", "Paris", "https://en.wikipedia.org/wiki/Paris", 1),
+        ("fr", "Paris", "https://fr.wikipedia.org/wiki/Paris", 0),
+    ]
+
+def test_relogging_a_page_updates_it(database):
+    repository.add_category("Cities")
+    today = datetime.date.today()
+    first = repository.add_article("Paris", "https://en.wikipedia.org/wiki/Paris", today, False, [1], None, None)
+    again = repository.add_article("Paris", "https://en.m.wikipedia.org/wiki/paris", today, True, [1], 4, 5)
+    assert again.article_id == first.article_id
+    assert rows("SELECT lang, title, was_read FROM Articles") == [("en", "Paris", 1)]
@@ -0,0 +1,262 @@
+import argparse
+import csv
+import datetime
+import io
+import json
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from database import job_queue
+from database.connection import connection, transaction
+from database.summary_cache import SUMMARY_UPSERT
+from wiki.fetcher import get_fetcher
+from wiki.urls import article_url, canonical_key, parse_lang, parse_title
+
+DEFAULT_WORKERS = 8
+DEFAULT_CHUNK_SIZE = 200
+FETCH_BATCH_SIZE = 20
+URL_COLUMNS = ("url", "link", "URL", "Link")
+
+class ImportResult:
+    def __init__(self, total=0):
+        self.total = total
+        self.imported = 0
+        self.skipped = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    @property
+    def processed(self):
+        return self.imported + self.skipped + len(self.errors)
+
+    @property
+    def throughput(self):
+        return self.imported / self.elapsed if self.elapsed else 0.0
+
+def read_urls(text, file_name=""):
+    # Returns (canonical links, [(line, reason)] for the lines that can't be imported)
+    lines = []
+    rejected = []
+    if file_name.endswith(".jsonl"):
+        for number, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as error:
+                rejected.append((line, f"line {number} is not valid JSON - {error}"))
+                continue
+            if isinstance(record, dict):
+                record = next((record[column] for column in URL_COLUMNS if column in record), None)
+                if record is None:
+                    rejected.append((line, f"line {number} has no {'/'.join(URL_COLUMNS)} field"))
+                    continue
+            lines.append(str(record))
+    elif file_name.endswith(".csv"):
+        reader = csv.reader(io.StringIO(text))
+        # line_num counts physical lines, so quoted fields spanning lines don't throw the numbers off
+        rows = [(reader.line_num, row) for row in reader]
+        column = 0
+        if rows and any(header in URL_COLUMNS for header in rows[0][1]):
+            column = next(i for i, header in enumerate(rows[0][1]) if header in URL_COLUMNS)
+            rows = rows[1:]
+        for number, row in rows:
+            if not any(cell.strip() for cell in row):
+                continue
+            if len(row) > column:
+                lines.append(row[column])
+            else:
+                rejected.append((",".join(row), f"line {number} has no column {column + 1}"))
+    else:
+        lines = [line for line in text.splitlines() if not line.startswith("#")]
+
+    # Every link becomes its page's canonical link, and the first of each page is kept, so the same
+    # page is only fetched once however differently it was linked
+    unique_urls = {}
+    for url in lines:
+        if not url.strip():
+            continue
+        key = canonical_key(url)
+        if key is None:
+            rejected.append((url, "not a link to a Wikipedia article"))
+        else:
+            unique_urls.setdefault(key, article_url(key[1], key[0]))
+    return list(unique_urls.values()), rejected
+
+def existing_links(urls, lang):
+    # urls are canonical links on one language host; a page counts as logged under its own title
+    # or under the title it was moved to
+    if not urls:
+        return set()
+    titles = {url: parse_title(url) for url in urls}
+    placeholders = ", ".join("?" for _ in urls)
+    with connection() as sqliteConnection:
+        rows = sqliteConnection.execute(f"""
+            SELECT title
+            FROM Articles
+            WHERE lang = ? AND title IN ({placeholders})
+            UNION
+            SELECT r.from_title
+            FROM PageRedirects r
+            INNER JOIN Articles a ON a.lang = r.lang AND a.title = r.to_title
+            WHERE r.lang = ? AND r.from_title IN ({placeholders})
+        """, [lang, *titles.values(), lang, *titles.values()]).fetchall()
+    known_titles = {title for (title,) in rows}
+    return {url for url in urls if titles[url] in known_titles}
+
+def fetch_pages(urls, lang):
+    titles = {url: parse_title(url) for url in urls}
+    results = get_fetcher().fetch_many(list(titles.values()), lang)
+    return [(url, titles[url], results[titles[url]]) for url in urls]
+
+def write_batch(pages, lang, category_ids, was_read, date_added):
+    # Returns {link: article_id} for the articles this batch inserted; any other page was left out
+    fetched_at = time.time()
+    with transaction() as sqliteConnection:
+        cursor = sqliteConnection.cursor()
+        inserted = {}
+        # executemany can't return rows, so each insert reports its own id
+        for url, title, _ in pages:
+            row = cursor.execute("""
+                INSERT INTO Articles (title, link, date_added, was_read)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT DO NOTHING
+                RETURNING article_id, link;
+            """, (title, url, date_added, was_read)).fetchone()
+            if row:
+                inserted[row[1]] = row[0]
+        article_ids = list(inserted.values())
+
+        cursor.executemany("""
+            INSERT OR IGNORE INTO ArticleCategories(article_id, category_id)
+            VALUES(?, ?)
+        """, [(article_id, category_id) for article_id in article_ids for category_id in category_ids])
+        cursor.executemany("""
+            INSERT OR IGNORE INTO Reviews(article_id, interest_rating, quality_rating)
+            VALUES(?, NULL, NULL)
+        """, [(article_id,) for article_id in article_ids])
+        # Pages logged without fetching have no summary yet
+        cursor.executemany(SUMMARY_UPSERT, [
+            (title, lang, page.summary, page.pageid, fetched_at, page.revid, page.touched) for _, title, page in pages if page
+        ])
+        cursor.close()
+    return inserted
+
+def bulk_import(urls, category_ids, was_read=False, date_added=None, workers=DEFAULT_WORKERS,
+                chunk_size=DEFAULT_CHUNK_SIZE, on_progress=None, rejected=(), fetch=True):
+    # rejected are the (line, reason) pairs read_urls turned away; they start off the error report.
+    # Without fetch, articles are logged under the title in their link and each gets an enrich job, so
+    # tools.fetch_worker downloads the summaries; pages use this, as they never call Wikipedia themselves.
+    result = ImportResult(len(urls) + len(rejected))
+    result.errors.extend(rejected)
+    category_ids = [int(category_id) for category_id in category_ids]
+    date_added = date_added or datetime.date.today()
+    start = time.perf_counter()
+
+    # Titles are looked up in batches, and a batch can only target one language host
+    by_lang = {}
+    for url in urls:
+        by_lang.setdefault(parse_lang(url), []).append(url)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for lang, lang_urls in by_lang.items():
+            for offset in range(0, len(lang_urls), chunk_size):
+                chunk = lang_urls[offset:offset + chunk_size]
+                already_logged = existing_links(chunk, lang)
+                result.skipped += len(already_logged)
+                pending = [url for url in chunk if url not in already_logged]
+
+                pages = [] if fetch else [(url, parse_title(url), None) for url in pending]
+                batches = [pending[i:i + FETCH_BATCH_SIZE] for i in range(0, len(pending), FETCH_BATCH_SIZE)] if fetch else []
+                futures = [(batch, executor.submit(fetch_pages, batch, lang)) for batch in batches]
+                for batch, future in futures:
+                    try:
+                        fetched = future.result()
+                    except Exception as error:
+                        result.errors.extend((url, str(error) or type(error).__name__) for url in batch)
+                        continue
+                    for url, title, page in fetched:
+                        if isinstance(page, Exception):
+                            result.errors.append((url, str(page)))
+                        else:
+                            pages.append((url, title, page))
+
+                if pages:
+                    try:
+                        inserted = write_batch(pages, lang, category_ids, was_read, date_added)
+                        result.imported += len(inserted)
+                        if not fetch:
+                            # Articles whose job couldn't be queued are picked up by fetch_worker --enqueue-missing
+                            job_queue.enqueue_many(
+                                ("enrich", title, lang, job_queue.PRIORITY_BACKGROUND) for url, title, _ in pages if url in inserted
+                            )
+                        # Pages logged before the batch were already skipped, so anything left out clashed with an article
+                        result.errors.extend(
+                            (url, "not stored - an article with the same title or link already exists")
+                            for url, _, _ in pages if url not in inserted
+                        )
+                    except sqlite3.Error as error:
+                        print('Error occurred -', error)
+                        result.errors.extend((url, str(error)) for url, _, _ in pages)
+
+                result.elapsed = time.perf_counter() - start
+                if on_progress:
+                    on_progress(result)
+
+    result.elapsed = time.perf_counter() - start
+    return result
+
+def resolve_categories(category_names):
+    with connection() as sqliteConnection:
+        rows = dict(sqliteConnection.execute("SELECT category_name, category_id FROM Categories").fetchall())
+    missing = [name for name in category_names if name not in rows]
+    if missing:
+        raise ValueError(f"Unknown categories: {', '.join(missing)}")
+    return [rows[name] for name in category_names]
+
+def print_progress(result):
+    print(f'{result.processed}/{result.total} processed, {result.imported} imported, '
+          f'{result.skipped} skipped, {len(result.errors)} errors ({result.throughput:.1f} articles/sec)')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import Wikipedia URLs from a text, CSV or JSONL file.")
+    parser.add_argument("path", help="File of URLs (.txt, .csv or .jsonl)")
+    parser.add_argument("--category", action="append", default=[], help="Category to assign (repeatable)")
+    parser.add_argument("--read", action="store_true", help="Mark imported articles as read")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--errors", help="Write the per-URL error report to this CSV file")
+    args = parser.parse_args(argv)
+
+    if not args.category:
+        parser.error("at least one --category is required")
+    try:
+        category_ids = resolve_categories(args.category)
+    except ValueError as error:
+        parser.error(str(error))
+
+    try:
+        with open(args.path, encoding="utf-8") as url_file:
+            urls, rejected = read_urls(url_file.read(), args.path)
+    except UnicodeDecodeError as error:
+        print(f'Error reading {args.path} - not UTF-8 text ({error})', file=sys.stderr)
+        return 1
+
+    result = bulk_import(urls, category_ids, args.read, workers=args.workers,
+                         chunk_size=args.chunk_size, on_progress=print_progress, rejected=rejected)
+    print(f'Imported {result.imported} articles in {result.elapsed:.1f}s ({result.throughput:.1f} articles/sec)')
+
+    for url, error in result.errors:
+        print(f'Error importing {url} - {error}', file=sys.stderr)
+    if args.errors:
+        with open(args.errors, "w", newline="", encoding="utf-8") as error_file:
+            writer = csv.writer(error_file)
+            writer.writerow(["url", "error"])
+            writer.writerows(result.errors)
+
+    return 1 if result.errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,352 @@
+import argparse
+import datetime
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import pyarrow as pa # type: ignore
+import pyarrow.parquet as pq # type: ignore
+
+from database.connection import connection, transaction
+from database.migrations import current_version
+
+DEFAULT_BATCH_SIZE = 10000
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+MANIFEST = "manifest.json"
+
+# Tables in foreign-key order, so an import never inserts a child before its parent.
+# Each is (columns with their Arrow types, change-timestamp column or expression for delta exports).
+TABLES = {
+    "Categories": ([
+        ("category_id", pa.int64()),
+        ("category_name", pa.string()),
+        ("updated_at", pa.float64()),
+    ], "updated_at"),
+    "Articles": ([
+        ("article_id", pa.int64()),
+        ("title", pa.string()),
+        ("link", pa.string()),
+        ("date_added", pa.string()),
+        ("was_read", pa.int64()),
+        ("updated_at", pa.float64()),
+    ], "updated_at"),
+    "ArticleCategories": ([
+        ("article_id", pa.int64()),
+        ("category_id", pa.int64()),
+        ("updated_at", pa.float64()),
+    ], "updated_at"),
+    "Reviews": ([
+        ("review_id", pa.int64()),
+        ("article_id", pa.int64()),
+        ("interest_rating", pa.int64()),
+        ("quality_rating", pa.int64()),
+        ("updated_at", pa.float64()),
+    ], "updated_at"),
+    "ArticleSummaries": ([
+        ("title", pa.string()),
+        ("lang", pa.string()),
+        ("summary", pa.string()),
+        ("pageid", pa.int64()),
+        ("fetched_at", pa.float64()),
+        ("revid", pa.int64()),
+        ("touched", pa.string()),
+        ("synced_at", pa.float64()),
+    ], "COALESCE(synced_at, fetched_at)"),
+}
+
+# Columns added after the export format was first written; files without them import with NULLs
+OPTIONAL_COLUMNS = {
+    "ArticleSummaries": ("revid", "touched", "synced_at"),
+}
+
+# Ids are kept so a delta can be applied to an earlier full import. Change timestamps are not
+# imported: the importing database stamps its own rows.
+UPSERTS = {
+    "Categories": ("""
+        INSERT INTO Categories (category_id, category_name)
+        VALUES (?, ?)
+        ON CONFLICT(category_id) DO UPDATE SET category_name = excluded.category_name;
+    """, ("category_id", "category_name")),
+    "Articles": ("""
+        INSERT INTO Articles (article_id, title, link, date_added, was_read)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(article_id) DO UPDATE SET
+            title = excluded.title,
+            link = excluded.link,
+            date_added = excluded.date_added,
+            was_read = excluded.was_read;
+    """, ("article_id", "title", "link", "date_added", "was_read")),
+    "ArticleCategories": ("""
+        INSERT INTO ArticleCategories (article_id, category_id)
+        VALUES (?, ?)
+        ON CONFLICT(article_id, category_id) DO NOTHING;
+    """, ("article_id", "category_id")),
+    "Reviews": ("""
+        INSERT INTO Reviews (article_id, interest_rating, quality_rating)
+        VALUES (?, ?, ?)
+        ON CONFLICT(article_id) DO UPDATE SET
+            interest_rating = excluded.interest_rating,
+            quality_rating = excluded.quality_rating;
+    """, ("article_id", "interest_rating", "quality_rating")),
+    # A newer fetch replaces the row; the same fetch confirmed upstream more recently only moves it forward,
+    # so a refresh in the exporting database doesn't have to be repeated here
+    "ArticleSummaries": ("""
+        INSERT INTO ArticleSummaries (title, lang, summary, pageid, fetched_at, revid, touched, synced_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(title, lang) DO UPDATE SET
+            summary = excluded.summary,
+            pageid = excluded.pageid,
+            fetched_at = excluded.fetched_at,
+            revid = excluded.revid,
+            touched = excluded.touched,
+            synced_at = excluded.synced_at
+        WHERE excluded.fetched_at > ArticleSummaries.fetched_at
+            OR (excluded.fetched_at = ArticleSummaries.fetched_at
+                AND COALESCE(excluded.synced_at, excluded.fetched_at) > COALESCE(ArticleSummaries.synced_at, ArticleSummaries.fetched_at));
+    """, ("title", "lang", "summary", "pageid", "fetched_at", "revid", "touched", "synced_at")),
+}
+
+class TransferResult:
+    def __init__(self):
+        self.rows = {}
+        self.errors = []
+        self.elapsed = 0.0
+
+    def add(self, table, count):
+        self.rows[table] = self.rows.get(table, 0) + count
+
+def table_schema(table):
+    return pa.schema(TABLES[table][0])
+
+def parse_since(value):
+    # Accepts Unix seconds or an ISO date/datetime (local time when no offset is given)
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.datetime.fromisoformat(value).timestamp()
+
+def open_writer(path, schema, file_format):
+    if file_format == "parquet":
+        return pq.ParquetWriter(path, schema, compression="zstd")
+    return pa.ipc.new_file(path, schema)
+
+def export_table(sqliteConnection, table, path, file_format, since=None, batch_size=DEFAULT_BATCH_SIZE):
+    columns, changed_column = TABLES[table]
+    schema = table_schema(table)
+    query = f"SELECT {', '.join(name for name, _ in columns)} FROM {table}"
+    params = []
+    if since is not None:
+        # Rows from before change tracking have no timestamp, so they go out with every delta
+        query += f" WHERE {changed_column} IS NULL OR {changed_column} > ?"
+        params.append(since)
+
+    exported = 0
+    cursor = sqliteConnection.cursor()
+    writer = open_writer(path, schema, file_format)
+    try:
+        cursor.execute(query, params)
+        # Each fetchmany() becomes one record batch (one Parquet row group), so memory stays at one batch
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            exported += len(rows)
+    finally:
+        writer.close()
+        cursor.close()
+    return exported
+
+def export_library(directory, file_format="parquet", since=None, batch_size=DEFAULT_BATCH_SIZE, tables=None):
+    result = TransferResult()
+    start = time.perf_counter()
+    os.makedirs(directory, exist_ok=True)
+    # Taken before reading, so using it as the next --since can only repeat rows, never miss them
+    exported_at = time.time()
+    manifest = {
+        "format": file_format,
+        "exported_at": exported_at,
+        "since": since,
+        "tables": {},
+    }
+
+    with connection() as sqliteConnection:
+        # One read transaction gives every table the same snapshot
+        sqliteConnection.execute("BEGIN;")
+        try:
+            manifest["schema_version"] = current_version(sqliteConnection)
+            for table in tables or TABLES:
+                file_name = table + FORMATS[file_format]
+                rows = export_table(sqliteConnection, table, os.path.join(directory, file_name), file_format, since, batch_size)
+                manifest["tables"][table] = {"file": file_name, "rows": rows}
+                result.add(table, rows)
+        finally:
+            sqliteConnection.execute("COMMIT;")
+
+    with open(os.path.join(directory, MANIFEST), "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    result.elapsed = time.perf_counter() - start
+    return result
+
+def read_batches(path, columns, batch_size=DEFAULT_BATCH_SIZE):
+    # Yields lists of row dicts, never holding more than one batch of the file in memory
+    if path.endswith(".parquet"):
+        batches = pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=columns)
+    else:
+        reader = pa.ipc.open_file(pa.memory_map(path))
+        batches = (reader.get_batch(i).select(columns) for i in range(reader.num_record_batches))
+    for batch in batches:
+        for offset in range(0, batch.num_rows, batch_size):
+            yield batch.slice(offset, batch_size).to_pylist()
+
+def file_columns(path):
+    if path.endswith(".parquet"):
+        return pq.read_schema(path).names
+    return pa.ipc.open_file(pa.memory_map(path)).schema.names
+
+def is_rating(value):
+    return value is None or (isinstance(value, int) and 1 <= value <= 5)
+
+def validate_row(table, row):
+    # Returns an error message, or None when the row can be written
+    if table == "Categories":
+        if row["category_id"] is None or not row["category_name"]:
+            return "category_id and category_name are required"
+    elif table == "Articles":
+        if row["article_id"] is None or not row["title"] or not row["link"]:
+            return "article_id, title and link are required"
+        if row["was_read"] not in (0, 1, None):
+            return f"was_read must be 0 or 1, got {row['was_read']}"
+        if row["date_added"] is not None:
+            try:
+                datetime.date.fromisoformat(row["date_added"])
+            except ValueError:
+                return f"date_added is not an ISO date: {row['date_added']}"
+    elif table == "ArticleCategories":
+        if row["article_id"] is None or row["category_id"] is None:
+            return "article_id and category_id are required"
+    elif table == "Reviews":
+        if row["article_id"] is None:
+            return "article_id is required"
+        if not is_rating(row["interest_rating"]) or not is_rating(row["quality_rating"]):
+            return "ratings must be between 1 and 5"
+    elif table == "ArticleSummaries":
+        if not row["title"] or not row["lang"] or row["fetched_at"] is None:
+            return "title, lang and fetched_at are required"
+    return None
+
+def upsert_chunk(table, rows):
+    # Returns (rows written, [(index in rows, error)]). A chunk is one transaction; if any row breaks a
+    # constraint the chunk is retried row by row, and SQLite rolls back only the failing statements.
+    statement, columns = UPSERTS[table]
+    values = [tuple(row[column] for column in columns) for row in rows]
+    try:
+        with transaction() as sqliteConnection:
+            sqliteConnection.executemany(statement, values)
+        return len(values), []
+    except sqlite3.IntegrityError:
+        pass
+
+    written = 0
+    errors = []
+    with transaction() as sqliteConnection:
+        for index, row_values in enumerate(values):
+            try:
+                sqliteConnection.execute(statement, row_values)
+                written += 1
+            except sqlite3.IntegrityError as error:
+                errors.append((index, str(error)))
+    return written, errors
+
+def import_library(directory, batch_size=DEFAULT_BATCH_SIZE, on_progress=None):
+    result = TransferResult()
+    start = time.perf_counter()
+    manifest_path = os.path.join(directory, MANIFEST)
+    files = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as manifest_file:
+            files = {table: entry["file"] for table, entry in json.load(manifest_file)["tables"].items()}
+    else:
+        for table in TABLES:
+            for extension in FORMATS.values():
+                if os.path.exists(os.path.join(directory, table + extension)):
+                    files[table] = table + extension
+
+    for table in TABLES:
+        if table not in files:
+            continue
+        path = os.path.join(directory, files[table])
+        columns = UPSERTS[table][1]
+        present = file_columns(path)
+        optional = OPTIONAL_COLUMNS.get(table, ())
+        missing = [column for column in columns if column not in present and column not in optional]
+        if missing:
+            result.errors.append((table, None, f"missing columns: {', '.join(missing)}"))
+            continue
+
+        row_number = 0
+        result.add(table, 0)
+        absent = [column for column in columns if column not in present]
+        for rows in read_batches(path, [column for column in columns if column in present], batch_size):
+            for row in rows:
+                row.update(dict.fromkeys(absent))
+            valid = []
+            valid_numbers = []
+            for row in rows:
+                row_number += 1
+                error = validate_row(table, row)
+                if error:
+                    result.errors.append((table, row_number, error))
+                else:
+                    valid.append(row)
+                    valid_numbers.append(row_number)
+            if valid:
+                try:
+                    written, failed = upsert_chunk(table, valid)
+                except sqlite3.Error as error:
+                    print('Error occurred -', error)
+                    written, failed = 0, [(index, str(error)) for index in range(len(valid))]
+                result.add(table, written)
+                result.errors.extend((table, valid_numbers[index], error) for index, error in failed)
+            if on_progress:
+                on_progress(table, result)
+
+    result.elapsed = time.perf_counter() - start
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or import the whole library as Parquet or Arrow IPC files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Write every table to a directory")
+    export_parser.add_argument("directory")
+    export_parser.add_argument("--format", choices=FORMATS, default="parquet")
+    export_parser.add_argument("--since", help="Only rows changed after this Unix time or ISO datetime")
+    export_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per record batch / row group")
+
+    import_parser = commands.add_parser("import", help="Validate and upsert a directory written by export")
+    import_parser.add_argument("directory")
+    import_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per transaction")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        since = parse_since(args.since) if args.since else None
+        result = export_library(args.directory, args.format, since, args.batch_size)
+        for table, rows in result.rows.items():
+            print(f'{table}: {rows} rows')
+        print(f'Exported to {args.directory} in {result.elapsed:.1f}s')
+        return 0
+
+    result = import_library(args.directory, args.batch_size,
+                            on_progress=lambda table, result: print(f'{table}: {result.rows[table]} rows imported'))
+    for table, row_number, error in result.errors:
+        location = f'{table} row {row_number}' if row_number else table
+        print(f'Error importing {location} - {error}', file=sys.stderr)
+    print(f'Imported {sum(result.rows.values())} rows in {result.elapsed:.1f}s with {len(result.errors)} errors')
+    return 1 if result.errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
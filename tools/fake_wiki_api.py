@@ -0,0 +1,148 @@
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from wiki.fetcher import LocalFetcher
+
+DEFAULT_PORT = 8800
+# Every page starts at this revision time; edit() moves it to the current time
+BASE_TOUCHED = "2024-01-01T00:00:00Z"
+
+class FakeWikiState:
+    # Without a source every title exists and gets a generated summary. edit() and rename() change
+    # pages while the server runs, so revision-aware refreshes can be exercised.
+    def __init__(self, source=None, latency=0.0, error_rate=0.0, throttle_rate=0.0, seed=None):
+        self.pages = LocalFetcher(source).pages if source else None
+        self.revisions = {}
+        self.extracts = {}
+        self.redirects = {}
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def roll(self):
+        with self.lock:
+            self.requests += 1
+            return self.random.random()
+
+    def edit(self, title, lang, extract=None):
+        with self.lock:
+            revid, _ = self.revisions.get((lang, title), (1, BASE_TOUCHED))
+            self.revisions[(lang, title)] = (revid + 1, time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+            if extract is not None:
+                self.extracts[(lang, title)] = extract
+
+    def rename(self, old_title, new_title, lang):
+        # Moves the page and leaves a redirect behind, as a MediaWiki page move does
+        with self.lock:
+            self.redirects[(lang, old_title)] = new_title
+            if self.pages is not None and (old_title, lang) in self.pages:
+                page = self.pages.pop((old_title, lang))
+                self.pages[(new_title, lang)] = type(page)(new_title, lang, page.summary, page.pageid)
+            for table in (self.revisions, self.extracts):
+                if (lang, old_title) in table:
+                    table[(lang, new_title)] = table.pop((lang, old_title))
+
+    def resolve(self, titles, lang):
+        # Returns (redirects followed, canonical titles)
+        redirects = []
+        resolved = []
+        with self.lock:
+            for title in titles:
+                if (lang, title) in self.redirects:
+                    redirects.append({"from": title, "to": self.redirects[(lang, title)]})
+                    title = self.redirects[(lang, title)]
+                resolved.append(title)
+        return redirects, resolved
+
+    def page(self, title, lang):
+        if self.pages is None:
+            page = {"title": title, "pageid": zlib.crc32(f"{lang}:{title}".encode()), "extract": f"{title} is a synthetic article."}
+        else:
+            stored = self.pages.get((title, lang))
+            if stored is None:
+                return {"title": title, "missing": True}
+            page = {"title": stored.title, "pageid": stored.pageid, "extract": stored.summary}
+        with self.lock:
+            page["lastrevid"], page["touched"] = self.revisions.get((lang, title), (1, BASE_TOUCHED))
+            page["extract"] = self.extracts.get((lang, title), page["extract"])
+        return page
+
+def make_handler(state):
+    class FakeWikiHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+            if len(parts) != 3 or parts[1:] != ["w", "api.php"]:
+                self.send_error(404)
+                return
+
+            if state.latency:
+                time.sleep(state.latency)
+            roll = state.roll()
+            if roll < state.throttle_rate:
+                self.send_response(429)
+                self.send_header("Retry-After", "1")
+                self.end_headers()
+                return
+            if roll < state.throttle_rate + state.error_rate:
+                self.send_error(503)
+                return
+
+            lang = parts[0]
+            params = parse_qs(url.query)
+            titles = [title for title in params.get("titles", [""])[0].split("|") if title]
+            query = {}
+            if "redirects" in params:
+                query["redirects"], titles = state.resolve(titles, lang)
+            pages = [state.page(title, lang) for title in dict.fromkeys(titles)]
+            if "extracts" not in params.get("prop", [""])[0]:
+                for page in pages:
+                    page.pop("extract", None)
+            query["pages"] = pages
+            body = json.dumps({"query": query}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeWikiHandler
+
+def serve(state, port=DEFAULT_PORT):
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the MediaWiki API.")
+    parser.add_argument("--source", help="Fixture directory or JSONL dump; every title exists when omitted")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    state = FakeWikiState(args.source, args.latency, args.error_rate, args.throttle_rate, args.seed)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(state))
+    print(f'Serving fake MediaWiki API on http://127.0.0.1:{args.port}/{{lang}}/w/api.php')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
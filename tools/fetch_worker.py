@@ -0,0 +1,157 @@
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+
+from database import job_queue
+from database.summary_cache import TTL_SECONDS, summary_cache
+from wiki.fetcher import CircuitOpenError, FetchError, RetryableFetchError, get_fetcher
+from wiki.governance import RetryPolicy
+
+DEFAULT_WORKERS = 4
+POLL_SECONDS = 1.0
+PRUNE_INTERVAL_SECONDS = 60 * 60
+KEEP_FINISHED_SECONDS = 24 * 60 * 60
+# Job retries wait far longer than the fetcher's own retries within one request
+JOB_RETRY_POLICY = RetryPolicy(base_delay=5.0, max_delay=600.0)
+
+class FetchWorker:
+    # Claims a batch of jobs, fetches them a language host at a time and records each outcome.
+    # Jobs whose lease runs out while a worker is stuck are handed to another worker.
+    def __init__(self, name, fetcher=None, batch_size=job_queue.CLAIM_BATCH_SIZE,
+                 lease_seconds=job_queue.LEASE_SECONDS, retry_policy=JOB_RETRY_POLICY):
+        self.name = name
+        self.fetcher = fetcher or get_fetcher()
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.retry_policy = retry_policy
+        self.counts = {"done": 0, "retried": 0, "failed": 0}
+
+    def run_once(self):
+        # Returns how many jobs were claimed
+        jobs = []
+        try:
+            jobs = job_queue.claim(self.name, self.batch_size, self.lease_seconds)
+            by_lang = {}
+            for job in jobs:
+                by_lang.setdefault(job.lang, []).append(job)
+            for lang, lang_jobs in by_lang.items():
+                self.process(lang, lang_jobs)
+
+        except Exception as error:
+            # Anything unexpected fails the jobs this worker still holds and the thread carries on;
+            # jobs already finished in this batch are no longer leased, so they are left alone
+            print('Error occurred -', error)
+            for job in jobs:
+                if job_queue.fail(job.job_id, self.name, f"Worker error - {error!r}"):
+                    self.counts["failed"] += 1
+        return len(jobs)
+
+    def needs_fetch(self, job):
+        if job.kind == "refetch":
+            return True
+        stored = summary_cache.peek(job.title, job.lang)
+        if stored is None:
+            return True
+        return job.kind == "fetch" and stored.is_stale()
+
+    def process(self, lang, jobs):
+        done, pending = [], []
+        for job in jobs:
+            (pending if self.needs_fetch(job) else done).append(job)
+        if pending:
+            try:
+                results = self.fetcher.fetch_many([job.title for job in pending], lang)
+            except FetchError as error:
+                results = {job.title: error for job in pending}
+
+            fetched, pages = [], []
+            for job in pending:
+                result = results.get(job.title, FetchError(f"No result for {lang}:{job.title}"))
+                if isinstance(result, FetchError):
+                    self.give_up_or_retry(job, result)
+                else:
+                    fetched.append(job)
+                    pages.append(result)
+            if summary_cache.put_many(pages):
+                done.extend(fetched)
+            else:
+                for job in fetched:
+                    self.give_up_or_retry(job, RetryableFetchError("Could not store the summary"))
+        if done:
+            self.counts["done"] += job_queue.complete([job.job_id for job in done], self.name)
+
+    def give_up_or_retry(self, job, error):
+        retryable = isinstance(error, (RetryableFetchError, CircuitOpenError))
+        if retryable and job.attempts < job.max_attempts:
+            delay = self.retry_policy.delay(job.attempts, getattr(error, "retry_after", None))
+            job_queue.retry(job.job_id, self.name, str(error), time.time() + delay)
+            self.counts["retried"] += 1
+        else:
+            job_queue.fail(job.job_id, self.name, str(error))
+            self.counts["failed"] += 1
+
+    def run(self, stop, poll_seconds=POLL_SECONDS, drain=False):
+        while not stop.is_set():
+            if not self.run_once():
+                if drain:
+                    return
+                stop.wait(poll_seconds)
+
+def run_pool(workers, stop, batch_size=job_queue.CLAIM_BATCH_SIZE, lease_seconds=job_queue.LEASE_SECONDS,
+             poll_seconds=POLL_SECONDS, drain=False):
+    # Worker threads share one governed fetcher, so rate limits hold across the whole pool
+    prefix = f"{socket.gethostname()}-{os.getpid()}"
+    pool = [FetchWorker(f"{prefix}-{i}", batch_size=batch_size, lease_seconds=lease_seconds) for i in range(workers)]
+    threads = [threading.Thread(target=worker.run, args=(stop, poll_seconds, drain), name=worker.name) for worker in pool]
+    for thread in threads:
+        thread.start()
+
+    last_prune = 0.0
+    try:
+        while any(thread.is_alive() for thread in threads):
+            if time.monotonic() - last_prune >= PRUNE_INTERVAL_SECONDS:
+                job_queue.prune(KEEP_FINISHED_SECONDS)
+                last_prune = time.monotonic()
+            for thread in threads:
+                thread.join(poll_seconds)
+    except KeyboardInterrupt:
+        # Batches in flight are finished; anything left leased is picked up again once its lease runs out
+        print('Stopping after the current batches')
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    totals = {name: sum(worker.counts[name] for worker in pool) for name in ("done", "retried", "failed")}
+    return totals
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Service the Wikipedia fetch job queue.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Worker threads in the pool")
+    parser.add_argument("--batch-size", type=int, default=job_queue.CLAIM_BATCH_SIZE, help="Jobs claimed at a time")
+    parser.add_argument("--lease-seconds", type=float, default=job_queue.LEASE_SECONDS)
+    parser.add_argument("--poll-seconds", type=float, default=POLL_SECONDS)
+    parser.add_argument("--drain", action="store_true", help="Exit once no job is ready")
+    parser.add_argument("--enqueue-missing", action="store_true", help="First queue articles without a summary")
+    parser.add_argument("--enqueue-stale", action="store_true", help="First queue summaries older than the cache TTL")
+    parser.add_argument("--stats", action="store_true", help="Print job counts by status and exit")
+    args = parser.parse_args(argv)
+
+    if args.stats:
+        for status, count in sorted(job_queue.queue_stats().items()):
+            print(f'{status:<8} {count}')
+        return 0
+    if args.enqueue_missing:
+        print(f'Queued {job_queue.enqueue_missing_summaries()} articles without a summary')
+    if args.enqueue_stale:
+        print(f'Queued {job_queue.enqueue_stale_summaries(TTL_SECONDS)} stale summaries')
+
+    print(f'Running {args.workers} fetch workers')
+    totals = run_pool(args.workers, threading.Event(), args.batch_size, args.lease_seconds, args.poll_seconds, args.drain)
+    print(f'{totals["done"]} done, {totals["retried"]} retried, {totals["failed"]} failed')
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
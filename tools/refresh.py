@@ -0,0 +1,216 @@
+import argparse
+import datetime
+import sqlite3
+import sys
+import time
+
+from database.connection import connection, transaction
+from database.summary_cache import summary_cache
+from wiki.client import MAX_INFO_TITLES_PER_REQUEST
+from wiki.fetcher import FetchError, get_fetcher
+from wiki.urls import article_url
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_MAX_AGE_HOURS = 24.0
+
+class RefreshResult:
+    def __init__(self):
+        self.checked = 0
+        self.skipped = 0
+        self.unchanged = 0
+        self.changed = 0
+        self.refreshed = 0
+        self.renamed = 0
+        self.missing = 0
+        self.conflicts = []
+        self.errors = []
+        self.elapsed = 0.0
+
+def touched_seconds(touched):
+    # MediaWiki timestamps look like 2024-01-01T00:00:00Z
+    if not touched:
+        return None
+    return datetime.datetime.fromisoformat(touched.replace("Z", "+00:00")).timestamp()
+
+def has_changed(stored, info):
+    # stored is (revid, touched, fetched_at) or None when no summary is kept yet
+    if stored is None:
+        return True
+    revid, _, fetched_at = stored
+    if revid is not None:
+        return info.get("lastrevid") is not None and info["lastrevid"] != revid
+    # Summaries stored before revisions were tracked: anything touched after the fetch counts as changed
+    touched = touched_seconds(info.get("touched"))
+    return touched is not None and touched > fetched_at
+
+def library_chunk(sqliteConnection, after_id, limit):
+    # Returns [(article_id, title, lang)] for the next chunk of the library in article_id order
+    return sqliteConnection.execute("""
+        SELECT article_id, title, lang
+        FROM Articles
+        WHERE article_id > ?
+        ORDER BY article_id
+        LIMIT ?
+    """, (after_id, limit)).fetchall()
+
+def stored_revisions(sqliteConnection, titles):
+    # Returns {(title, lang): (revid, touched, fetched_at, synced_at)}
+    placeholders = ", ".join("?" for _ in titles)
+    rows = sqliteConnection.execute(f"""
+        SELECT title, lang, revid, touched, fetched_at, COALESCE(synced_at, fetched_at)
+        FROM ArticleSummaries
+        WHERE title IN ({placeholders})
+    """, list(titles)).fetchall()
+    return {(title, lang): (revid, touched, fetched_at, synced_at) for title, lang, revid, touched, fetched_at, synced_at in rows}
+
+def apply_renames(renames, lang, now):
+    # Follows page moves: the redirect is recorded, and the article and its summary take the canonical
+    # title unless another article already has it. Returns the (title, canonical) pairs left alone.
+    conflicts = []
+    with transaction(immediate=True) as sqliteConnection:
+        for title, canonical in renames:
+            sqliteConnection.execute("""
+                INSERT INTO PageRedirects (lang, from_title, to_title, recorded_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(lang, from_title) DO UPDATE SET
+                    to_title = excluded.to_title,
+                    recorded_at = excluded.recorded_at;
+            """, (lang, title, canonical, now))
+            if sqliteConnection.execute("SELECT 1 FROM Articles WHERE lang = ? AND title = ?", (lang, canonical)).fetchone():
+                conflicts.append((title, canonical))
+                continue
+            # The summary moves first so the search index picks it up when the article is renamed
+            sqliteConnection.execute("""
+                UPDATE OR IGNORE ArticleSummaries
+                SET title = ?
+                WHERE title = ? AND lang = ?
+            """, (canonical, title, lang))
+            sqliteConnection.execute("DELETE FROM ArticleSummaries WHERE title = ? AND lang = ?", (title, lang))
+            sqliteConnection.execute("""
+                UPDATE Articles
+                SET title = ?, link = ?
+                WHERE lang = ? AND title = ?
+            """, (canonical, article_url(canonical, lang), lang, title))
+    return conflicts
+
+def mark_unchanged(pages, lang, now):
+    # pages are (title, page info) pairs; records the revision seen and when it was confirmed
+    with transaction() as sqliteConnection:
+        sqliteConnection.executemany("""
+            UPDATE ArticleSummaries
+            SET revid = COALESCE(?, revid), touched = COALESCE(?, touched), synced_at = ?
+            WHERE title = ? AND lang = ?
+        """, [(info.get("lastrevid"), info.get("touched"), now, title, lang) for title, info in pages])
+
+def refresh_batch(titles, lang, stored, result, fetcher):
+    now = time.time()
+    infos = fetcher.page_info(titles, lang)
+    renames = []
+    unchanged = []
+    changed = []
+    for title in titles:
+        info = infos.get(title)
+        if isinstance(info, FetchError):
+            result.errors.append((title, str(info)))
+            continue
+        if info is None:
+            result.missing += 1
+            continue
+        canonical = info["title"]
+        if canonical != title:
+            renames.append((title, canonical))
+        state = stored.get((title, lang))
+        if has_changed(state and state[:3], info):
+            changed.append((title, canonical))
+        else:
+            unchanged.append((title, canonical, info))
+
+    if renames:
+        conflicts = apply_renames(renames, lang, now)
+        result.conflicts.extend(conflicts)
+        result.renamed += len(renames) - len(conflicts)
+        # Articles that could not take their canonical title are left as they are
+        skipped = {title for title, _ in conflicts}
+        changed = [pair for pair in changed if pair[0] not in skipped]
+        unchanged = [page for page in unchanged if page[0] not in skipped]
+    changed = [canonical for _, canonical in changed]
+    if unchanged:
+        mark_unchanged([(canonical, info) for _, canonical, info in unchanged], lang, now)
+    result.unchanged += len(unchanged)
+    result.changed += len(changed)
+
+    # Only pages whose revision moved are downloaded again
+    if changed:
+        pages = []
+        for title, page in fetcher.fetch_many(changed, lang).items():
+            if isinstance(page, FetchError):
+                result.errors.append((title, str(page)))
+            else:
+                pages.append(page)
+        if summary_cache.put_many(pages):
+            result.refreshed += len(pages)
+        else:
+            result.errors.extend((page.title, "could not store the summary") for page in pages)
+
+def refresh_library(max_age_hours=DEFAULT_MAX_AGE_HOURS, chunk_size=DEFAULT_CHUNK_SIZE, fetcher=None, on_progress=None):
+    # Pages confirmed within max_age_hours are skipped, so repeated runs only check what is due
+    fetcher = fetcher or get_fetcher()
+    result = RefreshResult()
+    start = time.perf_counter()
+    cutoff = time.time() - max_age_hours * 60 * 60
+    after_id = 0
+    while True:
+        with connection() as sqliteConnection:
+            chunk = library_chunk(sqliteConnection, after_id, chunk_size)
+            if not chunk:
+                break
+            stored = stored_revisions(sqliteConnection, {title for _, title, _ in chunk})
+        after_id = chunk[-1][0]
+
+        by_lang = {}
+        for _, title, lang in chunk:
+            state = stored.get((title, lang))
+            if state is not None and state[3] >= cutoff:
+                result.skipped += 1
+                continue
+            by_lang.setdefault(lang, []).append(title)
+
+        for lang, titles in by_lang.items():
+            for offset in range(0, len(titles), MAX_INFO_TITLES_PER_REQUEST):
+                batch = titles[offset:offset + MAX_INFO_TITLES_PER_REQUEST]
+                result.checked += len(batch)
+                try:
+                    refresh_batch(batch, lang, stored, result, fetcher)
+                except sqlite3.Error as error:
+                    print('Error occurred -', error)
+                    result.errors.extend((title, str(error)) for title in batch)
+
+        result.elapsed = time.perf_counter() - start
+        if on_progress:
+            on_progress(result)
+
+    result.elapsed = time.perf_counter() - start
+    return result
+
+def print_progress(result):
+    print(f'{result.checked} checked, {result.skipped} skipped, {result.changed} changed, '
+          f'{result.renamed} renamed, {len(result.errors)} errors')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh stored summaries whose Wikipedia page changed.")
+    parser.add_argument("--max-age-hours", type=float, default=DEFAULT_MAX_AGE_HOURS,
+                        help="Skip pages confirmed more recently than this (0 checks everything)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Articles read from the library at a time")
+    args = parser.parse_args(argv)
+
+    result = refresh_library(args.max_age_hours, args.chunk_size, on_progress=print_progress)
+    print(f'Checked {result.checked} pages in {result.elapsed:.1f}s: {result.unchanged} unchanged, '
+          f'{result.refreshed} of {result.changed} changed pages downloaded, {result.renamed} renamed, {result.missing} missing')
+    for title, canonical in result.conflicts:
+        print(f'"{title}" now redirects to "{canonical}", which is already in the library', file=sys.stderr)
+    for title, error in result.errors:
+        print(f'Error refreshing {title} - {error}', file=sys.stderr)
+    return 1 if result.errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
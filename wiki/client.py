@@ -0,0 +1,93 @@
+import threading
+
+import requests # type: ignore
+from requests.adapters import HTTPAdapter # type: ignore
+
+API_URL = "https://{lang}.wikipedia.org/w/api.php"
+USER_AGENT = "wikipedia-logger (https://github.com/vmagdangal/wikipedia-logger)"
+POOL_SIZE = 16
+TIMEOUT_SECONDS = 10
+# TextExtracts only returns intro extracts for up to 20 pages per request
+MAX_TITLES_PER_REQUEST = 20
+# prop=info alone accepts up to 50 titles per request
+MAX_INFO_TITLES_PER_REQUEST = 50
+
+class MediaWikiClient:
+    # One keep-alive session per language host. Nothing here touches module-level state,
+    # so sessions for different languages can be used from any number of threads at once.
+    def __init__(self, api_url=API_URL, pool_size=POOL_SIZE, timeout=TIMEOUT_SECONDS):
+        self.api_url = api_url
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def session(self, lang):
+        with self.lock:
+            session = self.sessions.get(lang)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers["User-Agent"] = USER_AGENT
+                self.sessions[lang] = session
+            return session
+
+    def query(self, lang, **params):
+        params = {"action": "query", "format": "json", "formatversion": 2, **params}
+        response = self.session(lang).get(self.api_url.format(lang=lang), params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def summaries(self, titles, lang):
+        # Returns {requested title: page dict or None}, following title normalisation and redirects
+        results = {}
+        titles = list(dict.fromkeys(titles))
+        for offset in range(0, len(titles), MAX_TITLES_PER_REQUEST):
+            batch = titles[offset:offset + MAX_TITLES_PER_REQUEST]
+            data = self.query(
+                lang,
+                prop="extracts|info",
+                exintro=1,
+                explaintext=1,
+                exlimit="max",
+                redirects=1,
+                titles="|".join(batch),
+            ).get("query", {})
+            results.update(resolve_pages(batch, data))
+        return results
+
+    def page_info(self, titles, lang):
+        # Like summaries() but without extracts: each page dict has its canonical title, lastrevid and
+        # touched, so callers can tell which pages changed before downloading any text
+        results = {}
+        titles = list(dict.fromkeys(titles))
+        for offset in range(0, len(titles), MAX_INFO_TITLES_PER_REQUEST):
+            batch = titles[offset:offset + MAX_INFO_TITLES_PER_REQUEST]
+            data = self.query(lang, prop="info", redirects=1, titles="|".join(batch)).get("query", {})
+            results.update(resolve_pages(batch, data))
+        return results
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+
+def resolve_pages(titles, data):
+    # Maps each requested title to its page in a query response, through normalisation and redirects
+    renamed = {}
+    for mapping in data.get("normalized", []) + data.get("redirects", []):
+        renamed[mapping["from"]] = mapping["to"]
+    pages = {page["title"]: page for page in data.get("pages", []) if not page.get("missing")}
+
+    results = {}
+    for title in titles:
+        resolved = title
+        seen = {title}
+        while resolved in renamed and renamed[resolved] not in seen:
+            resolved = renamed[resolved]
+            seen.add(resolved)
+        results[title] = pages.get(resolved)
+    return results
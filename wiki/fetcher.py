@@ -0,0 +1,262 @@
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+
+import requests # type: ignore
+
+from instrumentation.recorder import recorder
+from wiki.client import API_URL, MediaWikiClient
+from wiki.governance import CircuitBreaker, GovernanceMetrics, RetryPolicy, TokenBucket
+
+# WIKI_FETCHER=local:<fixture dir or dump.jsonl> serves pages offline instead of from Wikipedia
+FETCHER_ENV = "WIKI_FETCHER"
+LATENCY_ENV = "WIKI_FETCH_LATENCY"
+JITTER_ENV = "WIKI_FETCH_JITTER"
+ERROR_RATE_ENV = "WIKI_FETCH_ERROR_RATE"
+# WIKI_API_URL=http://127.0.0.1:8800/{lang}/w/api.php points the live fetcher at tools.fake_wiki_api
+API_URL_ENV = "WIKI_API_URL"
+
+class FetchedPage:
+    def __init__(self, title, lang, summary, pageid, revid=None, touched=None):
+        self.title = title
+        self.lang = lang
+        self.summary = summary
+        self.pageid = pageid
+        self.revid = revid
+        self.touched = touched
+
+class FetchError(Exception):
+    pass
+
+class RetryableFetchError(FetchError):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class CircuitOpenError(FetchError):
+    pass
+
+class ArticleFetcher:
+    def fetch(self, title, lang) -> FetchedPage:
+        raise NotImplementedError
+
+    def fetch_many(self, titles, lang):
+        # Returns {title: FetchedPage or FetchError}; backends that can batch lookups override this
+        results = {}
+        for title in titles:
+            try:
+                results[title] = self.fetch(title, lang)
+            except FetchError as error:
+                results[title] = error
+        return results
+
+    def page_info(self, titles, lang):
+        # Returns {title: page dict with title, pageid, lastrevid and touched, None if missing, or FetchError}
+        raise NotImplementedError
+
+class WikipediaFetcher(ArticleFetcher):
+    def __init__(self, client=None):
+        self.client = client or MediaWikiClient()
+
+    def fetch(self, title, lang) -> FetchedPage:
+        result = self.fetch_many([title], lang)[title]
+        if isinstance(result, FetchError):
+            raise result
+        return result
+
+    def fetch_many(self, titles, lang):
+        summaries = self._query(self.client.summaries, titles, lang)
+        results = {}
+        for title, page in summaries.items():
+            if page is None:
+                results[title] = FetchError(f"Page id \"{title}\" does not match any pages")
+            else:
+                results[title] = FetchedPage(title, lang, page.get("extract", ""), int(page["pageid"]),
+                                             page.get("lastrevid"), page.get("touched"))
+        return results
+
+    def page_info(self, titles, lang):
+        return self._query(self.client.page_info, titles, lang)
+
+    def _query(self, method, titles, lang):
+        try:
+            return method(titles, lang)
+        except requests.HTTPError as error:
+            status = error.response.status_code if error.response is not None else None
+            if status == 429 or (status is not None and status >= 500):
+                retry_after = error.response.headers.get("Retry-After")
+                raise RetryableFetchError(str(error), float(retry_after) if retry_after and retry_after.isdigit() else None) from error
+            raise FetchError(str(error)) from error
+        except (requests.ConnectionError, requests.Timeout) as error:
+            raise RetryableFetchError(str(error)) from error
+        except ValueError as error:
+            # A body that isn't JSON, e.g. an error page from a proxy; requests' JSONDecodeError is a ValueError too
+            raise FetchError(f"Invalid response from {lang}.wikipedia.org - {error}") from error
+        except requests.RequestException as error:
+            raise FetchError(str(error)) from error
+
+class LocalFetcher(ArticleFetcher):
+    # Pages come from *.json / *.jsonl records with title, summary, pageid and an optional lang.
+    # latency, jitter and error_rate make slow or failing upstreams reproducible.
+    def __init__(self, source, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+        self.pages = {}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.load(source)
+
+    def load(self, source):
+        source = Path(source)
+        files = sorted(source.rglob("*.json*")) if source.is_dir() else [source]
+        for path in files:
+            with open(path, encoding="utf-8") as page_file:
+                if path.suffix == ".jsonl":
+                    records = [json.loads(line) for line in page_file if line.strip()]
+                else:
+                    records = json.load(page_file)
+                    if isinstance(records, dict):
+                        records = [records]
+            for record in records:
+                self.add(record["title"], record.get("lang", "en"), record.get("summary", ""), record.get("pageid"))
+
+    def add(self, title, lang, summary, pageid=None):
+        if pageid is None:
+            pageid = len(self.pages) + 1
+        self.pages[(title, lang)] = FetchedPage(title, lang, summary, int(pageid))
+
+    def fetch(self, title, lang) -> FetchedPage:
+        with self.lock:
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            fail = self.random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise RetryableFetchError(f"Injected error fetching {lang}:{title}")
+
+        page = self.pages.get((title, lang))
+        if page is None:
+            raise FetchError(f"Page id \"{title}\" does not match any pages")
+        return page
+
+    def page_info(self, titles, lang):
+        # Local pages carry no revision data, so a refresh never sees them change
+        results = {}
+        for title in titles:
+            page = self.pages.get((title, lang))
+            results[title] = None if page is None else {"title": title, "pageid": page.pageid, "lastrevid": None, "touched": None}
+        return results
+
+class GovernedFetcher(ArticleFetcher):
+    # Wraps another fetcher with a token bucket and circuit breaker per language host,
+    # plus exponential backoff with jitter on retryable errors.
+    def __init__(self, inner, rate=None, retry_policy=None, breaker_factory=CircuitBreaker, bucket_factory=TokenBucket):
+        self.inner = inner
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker_factory = breaker_factory
+        self.bucket_factory = bucket_factory if rate is None else (lambda: TokenBucket(rate=rate))
+        self.buckets = {}
+        self.breakers = {}
+        self.metrics = GovernanceMetrics()
+        self.lock = threading.Lock()
+
+    def _host(self, lang):
+        with self.lock:
+            if lang not in self.buckets:
+                self.buckets[lang] = self.bucket_factory()
+                self.breakers[lang] = self.breaker_factory()
+            return self.buckets[lang], self.breakers[lang]
+
+    def fetch(self, title, lang) -> FetchedPage:
+        result = self.fetch_many([title], lang)[title]
+        if isinstance(result, FetchError):
+            raise result
+        return result
+
+    def fetch_many(self, titles, lang):
+        return self._governed(self.inner.fetch_many, titles, lang)
+
+    def page_info(self, titles, lang):
+        return self._governed(self.inner.page_info, titles, lang)
+
+    def _governed(self, lookup, titles, lang):
+        start = time.perf_counter()
+        results = self._with_retries(lookup, titles, lang)
+        failed = sum(isinstance(page, FetchError) for page in results.values())
+        status = "ok" if not failed else "failed" if failed == len(results) else "partial"
+        recorder.record("fetch", f"{lang}.wikipedia.org", time.perf_counter() - start, len(results), status)
+        return results
+
+    def _with_retries(self, lookup, titles, lang):
+        bucket, breaker = self._host(lang)
+        results = {}
+        pending = list(titles)
+        attempt = 0
+        while pending:
+            if not breaker.allow():
+                self.metrics.increment("short_circuited")
+                error = CircuitOpenError(f"{lang}.wikipedia.org is failing, skipping fetch")
+                results.update({title: error for title in pending})
+                break
+
+            waited = bucket.acquire()
+            if waited:
+                self.metrics.add_throttle(waited)
+            self.metrics.increment("requests")
+
+            try:
+                batch = lookup(pending, lang)
+            except FetchError as error:
+                # A refused request (a 4xx other than 429) still means the host answered, so it closes the circuit
+                batch = {title: error for title in pending}
+            except Exception as error:
+                # Anything else must still settle a half-open trial, or the host would stay short-circuited for good
+                breaker.record_failure()
+                self.metrics.increment("failed", len(pending))
+                error = FetchError(f"Unexpected error fetching from {lang}.wikipedia.org - {error!r}")
+                results.update({title: error for title in pending})
+                break
+            results.update(batch)
+
+            retryable = [title for title, page in batch.items() if isinstance(page, RetryableFetchError)]
+            if not retryable:
+                breaker.record_success()
+                break
+
+            breaker.record_failure()
+            attempt += 1
+            if attempt >= self.retry_policy.max_attempts:
+                self.metrics.increment("failed", len(retryable))
+                break
+            self.metrics.increment("retried")
+            retry_after = max(batch[title].retry_after or 0 for title in retryable)
+            time.sleep(self.retry_policy.delay(attempt, retry_after))
+            pending = retryable
+        return results
+
+def fetcher_from_env():
+    setting = os.environ.get(FETCHER_ENV, "")
+    if setting.startswith("local:"):
+        return LocalFetcher(
+            setting[len("local:"):],
+            latency=float(os.environ.get(LATENCY_ENV, 0)),
+            jitter=float(os.environ.get(JITTER_ENV, 0)),
+            error_rate=float(os.environ.get(ERROR_RATE_ENV, 0)),
+        )
+    return WikipediaFetcher(MediaWikiClient(api_url=os.environ.get(API_URL_ENV, API_URL)))
+
+fetcher = None
+
+def get_fetcher() -> ArticleFetcher:
+    global fetcher
+    if fetcher is None:
+        fetcher = GovernedFetcher(fetcher_from_env())
+    return fetcher
+
+def set_fetcher(new_fetcher: ArticleFetcher):
+    global fetcher
+    fetcher = new_fetcher
@@ -0,0 +1,105 @@
+import random
+import threading
+import time
+
+REQUESTS_PER_SECOND = 10.0
+BURST_SIZE = 20
+MAX_ATTEMPTS = 4
+BASE_DELAY_SECONDS = 0.5
+MAX_DELAY_SECONDS = 8.0
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT_SECONDS = 30.0
+
+class TokenBucket:
+    def __init__(self, rate=REQUESTS_PER_SECOND, capacity=BURST_SIZE, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.clock = clock
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def _reserve(self):
+        # Takes a token now or reserves the next one, returning how long the caller must wait
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+        return wait
+
+class RetryPolicy:
+    def __init__(self, max_attempts=MAX_ATTEMPTS, base_delay=BASE_DELAY_SECONDS, max_delay=MAX_DELAY_SECONDS, seed=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.random = random.Random(seed)
+
+    def delay(self, attempt, retry_after=None):
+        # Full jitter: a random delay up to the exponential ceiling, never shorter than Retry-After
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        delay = self.random.uniform(0, ceiling)
+        if retry_after:
+            delay = max(delay, retry_after)
+        return delay
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT_SECONDS, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        # After reset_timeout a single trial request is let through; its outcome closes or reopens the circuit
+        with self.lock:
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return self.state == self.CLOSED
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+class GovernanceMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "throttled": 0, "retried": 0, "short_circuited": 0, "failed": 0}
+        self.throttled_seconds = 0.0
+
+    def increment(self, name, amount=1):
+        with self.lock:
+            self.counts[name] += amount
+
+    def add_throttle(self, seconds):
+        with self.lock:
+            self.counts["throttled"] += 1
+            self.throttled_seconds += seconds
+
+    def snapshot(self):
+        with self.lock:
+            return {**self.counts, "throttled_seconds": round(self.throttled_seconds, 3)}
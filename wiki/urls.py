@@ -0,0 +1,77 @@
+from typing import Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+WIKI_DOMAIN = "wikipedia.org"
+DEFAULT_LANG = "en"
+# Host labels that are not a language: www. is the portal and m. the mobile site
+HOST_PREFIXES = ("www", "m")
+ARTICLE_PATH = "/wiki/"
+INDEX_PATH = "/w/index.php"
+# Pages that are never articles, whatever language the link is in
+SPECIAL_PREFIXES = ("special:", "media:")
+MAX_DECODE_PASSES = 5
+
+def canonical_title(title):
+    # MediaWiki forbids %XX sequences in titles, so decoding until nothing changes is safe and undoes
+    # double-encoded links. Underscores are spaces, whitespace runs collapse and the first letter is upper case.
+    for _ in range(MAX_DECODE_PASSES):
+        decoded = unquote(title)
+        if decoded == title:
+            break
+        title = decoded
+    title = " ".join(title.replace("_", " ").split())
+    if not title:
+        return ""
+    first = title[0].upper()
+    # A few letters upper-case to more than one character (ß to SS); MediaWiki leaves those alone
+    return (first if len(first) == 1 else title[0]) + title[1:]
+
+def canonical_key(url) -> Optional[tuple[str, str]]:
+    # Returns (lang, title) for any link to a Wikipedia article, or None when the link isn't one.
+    # Mobile and www hosts, /w/index.php?title= links, oldid revisions and #fragments all map to their page.
+    url = url.strip()
+    if url.startswith("//"):
+        url = "https:" + url
+    elif "://" not in url:
+        url = "https://" + url
+    try:
+        parts = urlsplit(url)
+        host = parts.hostname or ""
+    except ValueError:
+        return None
+    if parts.scheme.lower() not in ("http", "https"):
+        return None
+    if host != WIKI_DOMAIN and not host.endswith("." + WIKI_DOMAIN):
+        return None
+    labels = [label for label in host[:-len(WIKI_DOMAIN)].split(".") if label and label not in HOST_PREFIXES]
+    if len(labels) > 1:
+        return None
+    lang = labels[0] if labels else DEFAULT_LANG
+
+    if parts.path.startswith(ARTICLE_PATH):
+        title = parts.path[len(ARTICLE_PATH):]
+    elif parts.path == INDEX_PATH:
+        # An oldid or curid without a title can only be resolved upstream
+        title = parse_qs(parts.query).get("title", [""])[0]
+    else:
+        return None
+    title = canonical_title(title)
+    if not title or title.lower().startswith(SPECIAL_PREFIXES):
+        return None
+    return lang, title
+
+def parse_title(url):
+    key = canonical_key(url)
+    return key[1] if key else ""
+
+def parse_lang(url):
+    key = canonical_key(url)
+    return key[0] if key else DEFAULT_LANG
+
+def is_article_url(url):
+    return canonical_key(url) is not None
+
+def article_url(title, lang):
+    # Only what would cut the path short is escaped, so links stay readable and canonical_key reads them back
+    path = title.replace('%', '%25').replace('?', '%3F').replace('#', '%23').replace(' ', '_')
+    return f"https://{lang}.wikipedia.org/wiki/{path}"